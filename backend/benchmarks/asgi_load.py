@@ -0,0 +1,141 @@
+"""
+Throughput and latency of the hot endpoints under concurrent load, to
+compare the same code served over WSGI (sync DRF viewsets) and over ASGI
+(async views, ASYNC_API_VIEWS=true).
+
+Start each server against the same database, e.g. from backend/:
+    gunicorn config.wsgi:application -b 127.0.0.1:8001 -w 4
+    ASYNC_API_VIEWS=true uvicorn config.asgi:application --port 8002 --workers 4
+
+then run the load against both (the script logs in once per target):
+    python benchmarks/asgi_load.py --email user@x --password secret \\
+        --target wsgi=http://127.0.0.1:8001 --target asgi=http://127.0.0.1:8002 \\
+        --concurrency 64 --requests 5000
+
+Only the standard library is used; each worker thread keeps one
+keep-alive connection, so the client is rarely the bottleneck below a few
+hundred concurrent workers.
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = (
+    "/api/v1/consommations/?page_size=200",
+    "/api/v1/consommations/aggregate/?bucket=month",
+    "/api/v1/notifications/",
+)
+
+
+def login(base_url, email, password):
+    """Return the session cookie header for the given credentials."""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port)
+    connection.request(
+        "POST",
+        "/api/v1/login/",
+        body=json.dumps({"email": email, "password": password}),
+        headers={"Content-Type": "application/json"},
+    )
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise SystemExit(f"login failed on {base_url}: HTTP {response.status}")
+    cookies = [
+        value.split(";", 1)[0]
+        for name, value in response.getheaders()
+        if name.lower() == "set-cookie"
+    ]
+    connection.close()
+    return "; ".join(cookies)
+
+
+def run_load(base_url, paths, cookie, concurrency, total):
+    parts = urlsplit(base_url)
+    local = threading.local()
+    counter = iter(range(total))
+    counter_lock = threading.Lock()
+
+    def worker():
+        latencies, errors = [], 0
+        while True:
+            with counter_lock:
+                index = next(counter, None)
+            if index is None:
+                return latencies, errors
+            if not hasattr(local, "connection"):
+                local.connection = http.client.HTTPConnection(
+                    parts.hostname, parts.port, timeout=60
+                )
+            started = time.perf_counter()
+            try:
+                local.connection.request(
+                    "GET", paths[index % len(paths)], headers={"Cookie": cookie}
+                )
+                response = local.connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                local.connection.close()
+                del local.connection
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(
+        latency for worker_latencies, _ in results for latency in worker_latencies
+    )
+    errors = sum(worker_errors for _, worker_errors in results)
+    return elapsed, latencies, errors
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="label=base_url, repeatable (e.g. asgi=http://127.0.0.1:8002)",
+    )
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", action="append", help="GET path, repeatable")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    paths = args.path or list(DEFAULT_PATHS)
+    print(f"{'target':<8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for target in args.target:
+        label, _, base_url = target.partition("=")
+        cookie = login(base_url, args.email, args.password)
+        elapsed, latencies, errors = run_load(
+            base_url, paths, cookie, args.concurrency, args.requests
+        )
+        print(
+            f"{label:<8} {len(latencies) / elapsed:>9.1f} "
+            f"{percentile(latencies, 0.50) * 1000:>8.1f} "
+            f"{percentile(latencies, 0.99) * 1000:>8.1f} {errors:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
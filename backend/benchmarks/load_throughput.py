@@ -0,0 +1,100 @@
+"""
+Rows per second of energy.loading.load_consommations: PostgreSQL COPY
+versus chunked bulk_create, on a throwaway test database.
+
+COPY is only measured when the configured database is PostgreSQL. Rollup
+and alert feeding are off so the numbers isolate the insert path.
+
+Usage (from backend/):
+    python benchmarks/load_throughput.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from energy.loading import copy_supported, load_consommations  # noqa: E402
+from energy.models import Category, Consommation, User  # noqa: E402
+from energy.seeding import generate_user_readings, user_rng  # noqa: E402
+
+
+def build_readings(user_id, categories, count):
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    days = -(-count // len(categories))
+    timestamps = [start + timedelta(hours=index) for index in range(days)]
+    readings = []
+    for category_id, values, unit_prices in generate_user_readings(
+        user_rng(0, user_id), categories, days
+    ):
+        readings.extend(
+            zip(
+                [user_id] * days,
+                [category_id] * days,
+                timestamps,
+                [f"{value:.2f}" for value in values.tolist()],
+                [f"{price:.4f}" for price in unit_prices.tolist()],
+            )
+        )
+    return readings[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        user = User.objects.create(email="load@managenergy.local", password="!")
+        categories = [
+            (Category.objects.create(name=name, unit=unit).id, name)
+            for name, unit in (("Electricite", "kWh"), ("Gaz", "m3"), ("Eau", "L"))
+        ]
+        methods = [("bulk_create", False)]
+        if copy_supported():
+            methods.append(("COPY", True))
+
+        print(f"{'rows':>10} {'method':<12} {'seconds':>8} {'rows/s':>10}")
+        for count in args.rows:
+            readings = build_readings(user.id, categories, count)
+            for label, use_copy in methods:
+                # Raw DELETE: the ORM one would load every row for the signals.
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DELETE FROM {Consommation._meta.db_table}")
+                started = time.perf_counter()
+                load_consommations(
+                    readings,
+                    chunk_size=args.chunk_size,
+                    use_copy=use_copy,
+                    update_rollups=False,
+                    notify=False,
+                )
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{count:>10} {label:<12} {elapsed:>8.2f} {count / elapsed:>10.0f}",
+                    flush=True,
+                )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
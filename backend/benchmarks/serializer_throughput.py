@@ -0,0 +1,83 @@
+"""
+Rows per second of the consommation list serialization paths:
+ConsommationSerializer(many=True) on model instances versus
+ConsommationReadMapper on `.values()` rows.
+
+Rows are built in memory so the numbers isolate Python-side cost (the
+database fetch is excluded for both paths).
+
+Usage (from backend/):
+    python benchmarks/serializer_throughput.py --rows 10000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from energy.models import Consommation  # noqa: E402
+from energy.serializers import ConsommationReadMapper, ConsommationSerializer  # noqa: E402
+
+
+def build_rows(count):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    value = Decimal("42.50")
+    unit_price = Decimal("0.1800")
+    total_price = Decimal("7.65")
+    return [
+        {
+            "id": index + 1,
+            "user_id": 1,
+            "category_id": index % 3 + 1,
+            "value": value,
+            "unit_price": unit_price,
+            "date_consommation": start + timedelta(minutes=index),
+            "total_price": total_price,
+        }
+        for index in range(count)
+    ]
+
+
+def bench_model_serializer(rows):
+    started = time.perf_counter()
+    # Building instances is part of what the ORM does on the default path.
+    instances = [Consommation(**row) for row in rows]
+    ConsommationSerializer(instances, many=True).data
+    return time.perf_counter() - started
+
+
+def bench_read_mapper(rows):
+    started = time.perf_counter()
+    ConsommationReadMapper().map(rows)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'serializer rows/s':>20} {'mapper rows/s':>16} {'speedup':>8}")
+    for count in args.rows:
+        rows = build_rows(count)
+        serializer_seconds = bench_model_serializer(rows)
+        mapper_seconds = bench_read_mapper(rows)
+        print(
+            f"{count:>10} {count / serializer_seconds:>20,.0f} "
+            f"{count / mapper_seconds:>16,.0f} {serializer_seconds / mapper_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
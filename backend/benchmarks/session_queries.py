@@ -0,0 +1,95 @@
+"""
+Database queries per authenticated API call for each SESSION_MODE.
+
+Logs in once per mode on a throwaway test database, then replays the same
+GET requests and counts the SQL statements executed, split between
+`django_session` reads and the rest.
+
+Usage (from backend/):
+    python benchmarks/session_queries.py --requests 200
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from energy.models import User  # noqa: E402
+
+PATHS = (
+    "/api/v1/consommations/?page_size=50",
+    "/api/v1/alerts/",
+    "/api/v1/notifications/unread-count/",
+)
+
+
+def measure(mode, requests):
+    cache.clear()
+    with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[mode]):
+        client = Client()
+        response = client.post(
+            "/api/v1/login/",
+            data=json.dumps(
+                {"email": "bench@managenergy.local", "password": "Bench1234"}
+            ),
+            content_type="application/json",
+        )
+        assert response.status_code == 200, response.content
+
+        with CaptureQueriesContext(connection) as queries:
+            for index in range(requests):
+                response = client.get(PATHS[index % len(PATHS)])
+                assert response.status_code == 200, response.content
+
+        session_reads = sum(
+            '"django_session"' in query["sql"] for query in queries.captured_queries
+        )
+        return len(queries.captured_queries), session_reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        User.objects.create(
+            email="bench@managenergy.local",
+            password=make_password("Bench1234"),
+            is_active=True,
+            role="user",
+        )
+        print(f"{'mode':<16} {'queries/req':>12} {'session/req':>12}")
+        for mode in settings.SESSION_ENGINES:
+            total, session_reads = measure(mode, args.requests)
+            print(
+                f"{mode:<16} {total / args.requests:>12.2f} "
+                f"{session_reads / args.requests:>12.2f}"
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == "__main__":
+    main()
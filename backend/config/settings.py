@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -100,6 +101,13 @@ DATABASES = {
 }
 
 
+# Password hashing (login/register) runs in a dedicated pool of this many threads;
+# beyond PASSWORD_HASH_MAX_PENDING queued hashes requests get a 503 (0 = unbounded).
+# Under ASGI the event loop is free while hashing; under WSGI the request worker
+# still waits for its hash, so only the PASSWORD_HASH_MAX_PENDING bound protects it.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -136,6 +144,102 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Cache
+# Local-memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache, redis://host:6379/1)
+# when running several workers.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "managenergy"),
+    }
+}
+ALERT_LIMITS_CACHE_TIMEOUT = int(os.getenv("ALERT_LIMITS_CACHE_TIMEOUT", "300"))
+UNREAD_COUNT_CACHE_TIMEOUT = int(os.getenv("UNREAD_COUNT_CACHE_TIMEOUT", "300"))
+# Anomaly detection (energy.anomalies): readings scored against a per-user,
+# per-category exponentially weighted baseline; |z| >= ANOMALY_Z_THRESHOLD
+# after ANOMALY_MIN_READINGS readings creates an "anomaly" notification
+ANOMALY_DETECTION = os.getenv("ANOMALY_DETECTION", "true").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+ANOMALY_EWMA_ALPHA = float(os.getenv("ANOMALY_EWMA_ALPHA", "0.1"))
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "4"))
+ANOMALY_MIN_READINGS = int(os.getenv("ANOMALY_MIN_READINGS", "14"))
+# /consommations/stats/ results, keyed by the user's data version (new
+# readings switch to a new key, so this only bounds memory use)
+CONSOMMATION_STATS_CACHE_TIMEOUT = int(
+    os.getenv("CONSOMMATION_STATS_CACHE_TIMEOUT", "3600")
+)
+
+# Session storage: db (one django_session read per request), cached_db or cache
+# (served from CACHES["default"]), signed_cookies (no server-side read; logout
+# revokes the session's token in the cache until the cookie would expire).
+# Use a cache shared by all workers (Redis, Memcached) with the non-db modes.
+SESSION_ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "cache": "django.contrib.sessions.backends.cache",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+SESSION_MODE = os.getenv("SESSION_MODE", "db").lower()
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f"SESSION_MODE must be one of: {', '.join(SESSION_ENGINES)}."
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+
+# Real-time notification stream (/notifications/stream/, served over ASGI)
+NOTIFICATION_BROKER = os.getenv("NOTIFICATION_BROKER", "energy.events.InProcessBroker")
+NOTIFICATION_STREAM_HEARTBEAT = int(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", "15"))
+
+# API pagination (opt-in keyset pagination on /consommations/)
+CONSOMMATION_PAGE_SIZE = int(os.getenv("CONSOMMATION_PAGE_SIZE", "200"))
+CONSOMMATION_MAX_PAGE_SIZE = int(os.getenv("CONSOMMATION_MAX_PAGE_SIZE", "1000"))
+
+# Bulk ingestion (/consommations/bulk/): rows validated and inserted per chunk
+CONSOMMATION_BULK_CHUNK_SIZE = int(os.getenv("CONSOMMATION_BULK_CHUNK_SIZE", "1000"))
+
+# Streaming export (/consommations/export/): rows fetched per database round-trip
+CONSOMMATION_EXPORT_CHUNK_SIZE = int(os.getenv("CONSOMMATION_EXPORT_CHUNK_SIZE", "2000"))
+
+# Monthly range partitioning of consommations on date_consommation (PostgreSQL
+# only, applied by `manage.py manage_partitions --convert`; see
+# energy.partitions). Partitions are kept this many months ahead.
+CONSOMMATION_PARTITIONS_AHEAD = int(os.getenv("CONSOMMATION_PARTITIONS_AHEAD", "3"))
+
+# Delta sync (/api/v1/sync/): deleted rows are reported for this many days;
+# older tokens get a full resync. `manage.py prune_sync_tombstones` purges them.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# DRF: request.user is the session's energy User (None when anonymous)
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "energy.authentication.SessionUserAuthentication",
+    ],
+    "UNAUTHENTICATED_USER": None,
+}
+
+# Seconds a worker trusts its in-process Category catalogue before comparing
+# its version with the shared cache (energy.categories)
+CATEGORY_CACHE_CHECK_INTERVAL = int(os.getenv("CATEGORY_CACHE_CHECK_INTERVAL", "5"))
+
+# Seconds a session's User stays cached (dropped on User save/delete)
+USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", "60"))
+
+# Serve the hot list/create/aggregate endpoints from async views (energy.async_views).
+# Enable when running under ASGI (uvicorn config.asgi:application).
+ASYNC_API_VIEWS = os.getenv("ASYNC_API_VIEWS", "false").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+
 # CORS / CSRF
 CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL", "false").lower() in {
     "1",
@@ -1,6 +1,15 @@
 from django.contrib import admin
 
-from .models import Alert, Category, Consommation, Notification, User
+from .models import (
+    Alert,
+    AnomalyBaseline,
+    Category,
+    Consommation,
+    DailyConsumptionRollup,
+    MonthlyConsumptionRollup,
+    Notification,
+    User,
+)
 
 
 @admin.register(User)
@@ -36,7 +45,31 @@ class AlertAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "alert", "type", "read", "created_at")
+    list_display = ("id", "user", "alert", "type", "category", "value", "read", "created_at")
     list_filter = ("created_at", "read", "type")
     search_fields = ("user__email", "alert__message")
     ordering = ("-created_at",)
+
+
+@admin.register(DailyConsumptionRollup)
+class DailyConsumptionRollupAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "category", "day", "total_value", "total_cost", "count")
+    list_filter = ("category",)
+    search_fields = ("user__email", "category__name")
+    ordering = ("-day",)
+
+
+@admin.register(MonthlyConsumptionRollup)
+class MonthlyConsumptionRollupAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "category", "month", "total_value", "total_cost", "count")
+    list_filter = ("category",)
+    search_fields = ("user__email", "category__name")
+    ordering = ("-month",)
+
+
+@admin.register(AnomalyBaseline)
+class AnomalyBaselineAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "category", "count", "mean", "variance", "last_reading_at")
+    list_filter = ("category",)
+    search_fields = ("user__email", "category__name")
+    ordering = ("-last_reading_at",)
@@ -0,0 +1,107 @@
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Alert
+from .notifications import create_notifications
+
+ACTIVE_STATUS = "active"
+
+
+def breached_alerts(consommations):
+    """
+    Active alerts breached by at least one of `consommations` (a Consommation
+    queryset or a list of ids), found with a single joined query.
+    """
+    # Conditions in one filter() call apply to the same joined consommation row.
+    return Alert.objects.filter(
+        status=ACTIVE_STATUS,
+        user__consommations__in=consommations,
+        user__consommations__category_id=F("category_id"),
+        user__consommations__value__gte=F("limit"),
+    ).distinct()
+
+
+def notify_breached_alerts(consommations):
+    """
+    Create the missing notifications for every alert breached by
+    `consommations` with one bulk insert. Returns the number of breached alerts.
+    """
+    breached = list(breached_alerts(consommations).values_list("id", "user_id"))
+    create_notifications(breached)
+    return len(breached)
+
+
+def _limits_cache_key(user_id, category_id):
+    return f"alert-limits:{user_id}:{category_id}"
+
+
+def active_limits(user_id, category_id):
+    """
+    Sorted active limits for (user, category) as a (limits, alert_ids) pair of
+    aligned lists, served from the cache and loaded from the database on a miss.
+    """
+    key = _limits_cache_key(user_id, category_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = list(
+        Alert.objects.filter(
+            user_id=user_id, category_id=category_id, status=ACTIVE_STATUS
+        )
+        .order_by("limit", "id")
+        .values_list("limit", "id")
+    )
+    limits = ([limit for limit, _ in rows], [alert_id for _, alert_id in rows])
+    cache.set(key, limits, settings.ALERT_LIMITS_CACHE_TIMEOUT)
+    return limits
+
+
+def invalidate_alert_limits(user_id, category_id):
+    key = _limits_cache_key(user_id, category_id)
+    cache.delete(key)
+    # Again after commit: a concurrent reading may refill it with the
+    # pre-commit limits meanwhile.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def notify_reading(consommation):
+    """
+    Notify the alerts breached by one new reading. Costs a cache lookup and a
+    bisect; the database is only hit to store notifications on a breach.
+    """
+    limits, alert_ids = active_limits(consommation.user_id, consommation.category_id)
+    breached = alert_ids[: bisect_right(limits, consommation.value)]
+    if breached:
+        create_notifications((alert_id, consommation.user_id) for alert_id in breached)
+    return len(breached)
+
+
+def notify_readings(readings):
+    """
+    notify_reading() for a batch of rollup-style readings (user_id,
+    category_id, date_consommation, value, unit_price), e.g. rows loaded
+    without ids: one cached limits lookup per (user, category) and a single
+    notification insert. Returns the number of breached alerts.
+    """
+    peaks = {}
+    for user_id, category_id, _date_value, value, _unit_price in readings:
+        value = Decimal(str(value))
+        key = (user_id, category_id)
+        if key not in peaks or value > peaks[key]:
+            peaks[key] = value
+
+    breached = []
+    for (user_id, category_id), peak in peaks.items():
+        limits, alert_ids = active_limits(user_id, category_id)
+        breached.extend(
+            (alert_id, user_id) for alert_id in alert_ids[: bisect_right(limits, peak)]
+        )
+    if breached:
+        create_notifications(breached)
+    return len(breached)
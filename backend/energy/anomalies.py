@@ -0,0 +1,237 @@
+"""
+Consumption anomaly detection.
+
+Each (user, category) keeps an exponentially weighted mean and variance of
+its readings (AnomalyBaseline). A new reading is scored against the
+baseline before being folded into it: z = (value - mean) / std. Once the
+baseline has seen ANOMALY_MIN_READINGS readings, |z| >= ANOMALY_Z_THRESHOLD
+creates an "anomaly" notification. Updating costs O(1) per reading, so live
+writes never rescan history; `manage.py detect_anomalies` rebuilds the
+baselines from the stored readings, stepping every (user, category) series
+at once with NumPy, and backfills the notifications.
+
+The same update and score formulas serve both paths (they take scalars or
+arrays).
+"""
+
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import AnomalyBaseline, Consommation
+from .notifications import create_anomaly_notifications
+from .rollups import reading_from_instance
+
+ANOMALY_BATCH_SIZE = 500
+# Floor of the standard deviation relative to the mean, so a near-constant
+# series does not turn a tiny deviation into a huge score.
+MIN_RELATIVE_STD = 0.05
+
+
+def anomaly_scores(mean, variance, count, values):
+    """z-scores of values against baselines; 0 while a baseline warms up."""
+    std = np.maximum(np.sqrt(variance), MIN_RELATIVE_STD * np.abs(mean))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (values - mean) / std
+    return np.where((count >= settings.ANOMALY_MIN_READINGS) & (std > 0), scores, 0.0)
+
+
+def update_baselines(mean, variance, count, values):
+    """(mean, variance, count) after folding values into the baselines."""
+    alpha = settings.ANOMALY_EWMA_ALPHA
+    diff = values - mean
+    increment = alpha * diff
+    first = count == 0
+    return (
+        np.where(first, values, mean + increment),
+        np.where(first, 0.0, (1 - alpha) * (variance + diff * increment)),
+        count + 1,
+    )
+
+
+def _is_anomaly(score):
+    return abs(score) >= settings.ANOMALY_Z_THRESHOLD
+
+
+def _apply(series):
+    existing = AnomalyBaseline.objects.select_for_update().filter(
+        user_id__in={user_id for user_id, _ in series},
+        category_id__in={category_id for _, category_id in series},
+    )
+    by_key = {(row.user_id, row.category_id): row for row in existing}
+
+    anomalies, to_create, to_update = [], [], []
+    for (user_id, category_id), readings in series.items():
+        baseline = by_key.get((user_id, category_id))
+        if baseline is None:
+            baseline = AnomalyBaseline(user_id=user_id, category_id=category_id)
+            to_create.append(baseline)
+        else:
+            to_update.append(baseline)
+        for date_value, value in readings:
+            score = float(
+                anomaly_scores(baseline.mean, baseline.variance, baseline.count, value)
+            )
+            if _is_anomaly(score):
+                anomalies.append(
+                    (user_id, category_id, date_value, value, baseline.mean, score)
+                )
+            mean, variance, count = update_baselines(
+                baseline.mean, baseline.variance, baseline.count, value
+            )
+            baseline.mean, baseline.variance, baseline.count = (
+                float(mean),
+                float(variance),
+                int(count),
+            )
+            if baseline.last_reading_at is None or date_value > baseline.last_reading_at:
+                baseline.last_reading_at = date_value
+
+    if to_update:
+        AnomalyBaseline.objects.bulk_update(
+            to_update, ["mean", "variance", "count", "last_reading_at"]
+        )
+    if to_create:
+        AnomalyBaseline.objects.bulk_create(to_create)
+    return anomalies
+
+
+def detect_anomalies(readings):
+    """
+    Score new readings, (user_id, category_id, date_consommation, value,
+    unit_price) tuples as used by the rollups, fold them into their
+    baselines and notify the anomalous ones. Readings of one series are
+    taken in date order. Returns the number of anomalies found.
+    """
+    if not settings.ANOMALY_DETECTION:
+        return 0
+    series = defaultdict(list)
+    for user_id, category_id, date_value, value, _unit_price in readings:
+        series[(user_id, category_id)].append((date_value, float(value)))
+    if not series:
+        return 0
+    for readings_of_series in series.values():
+        readings_of_series.sort(key=lambda reading: reading[0])
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                anomalies = _apply(series)
+            break
+        except IntegrityError:
+            # A concurrent writer created one of our baselines first; retry
+            # once so it is picked up by select_for_update.
+            if attempt:
+                raise
+    create_anomaly_notifications(anomalies)
+    return len(anomalies)
+
+
+def detect_reading(consommation):
+    """detect_anomalies() for one saved Consommation."""
+    return detect_anomalies([reading_from_instance(consommation)])
+
+
+def score_series(starts, lengths, values):
+    """
+    Walk several series at once. `values` holds the series back to back
+    (series i is values[starts[i]:starts[i] + lengths[i]], in date order).
+    Returns (scores, expected) aligned with values, expected being the mean
+    each value was scored against, then the final (mean, variance, count)
+    per series. Loops once per position, i.e. over the longest series, not
+    over the rows.
+    """
+    series_count = len(starts)
+    mean = np.zeros(series_count)
+    variance = np.zeros(series_count)
+    count = np.zeros(series_count, dtype=np.int64)
+    scores = np.zeros(len(values))
+    expected = np.zeros(len(values))
+    for position in range(int(lengths.max(initial=0))):
+        active = np.flatnonzero(lengths > position)
+        rows = starts[active] + position
+        current = values[rows]
+        scores[rows] = anomaly_scores(
+            mean[active], variance[active], count[active], current
+        )
+        expected[rows] = mean[active]
+        mean[active], variance[active], count[active] = update_baselines(
+            mean[active], variance[active], count[active], current
+        )
+    return scores, expected, (mean, variance, count)
+
+
+def _rebuild_batch(user_ids, since):
+    rows = list(
+        Consommation.objects.filter(user_id__in=user_ids)
+        .order_by("user_id", "category_id", "date_consommation", "id")
+        .values_list("user_id", "category_id", "date_consommation", "value")
+    )
+    AnomalyBaseline.objects.filter(user_id__in=user_ids).delete()
+    if not rows:
+        return 0, []
+
+    users = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    categories = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    boundaries = (np.diff(users) != 0) | (np.diff(categories) != 0)
+    starts = np.concatenate(([0], np.flatnonzero(boundaries) + 1))
+    lengths = np.diff(np.append(starts, len(rows)))
+
+    scores, expected, (mean, variance, count) = score_series(starts, lengths, values)
+    ends = (starts + lengths - 1).tolist()
+    AnomalyBaseline.objects.bulk_create(
+        [
+            AnomalyBaseline(
+                user_id=rows[end][0],
+                category_id=rows[end][1],
+                mean=float(mean[index]),
+                variance=float(variance[index]),
+                count=int(count[index]),
+                last_reading_at=rows[end][2],
+            )
+            for index, end in enumerate(ends)
+        ],
+        batch_size=ANOMALY_BATCH_SIZE,
+    )
+
+    anomalies = []
+    for row_index in np.flatnonzero(
+        np.abs(scores) >= settings.ANOMALY_Z_THRESHOLD
+    ).tolist():
+        user_id, category_id, date_value, value = rows[row_index]
+        if since is None or date_value >= since:
+            anomalies.append(
+                (
+                    user_id,
+                    category_id,
+                    date_value,
+                    value,
+                    expected[row_index],
+                    scores[row_index],
+                )
+            )
+    return len(starts), anomalies
+
+
+def rebuild_baselines(user_ids=None, since=None, batch_size=ANOMALY_BATCH_SIZE):
+    """
+    Recompute every baseline (optionally for some users) from the stored
+    readings and notify the anomalies found, only from `since` (an aware
+    datetime) when given. Returns (baselines, anomalies notified).
+    """
+    if user_ids is None:
+        user_ids = Consommation.objects.values_list("user_id", flat=True).distinct()
+    user_ids = sorted(set(user_ids))
+
+    baselines = notified = 0
+    for index in range(0, len(user_ids), batch_size):
+        with transaction.atomic():
+            rebuilt, anomalies = _rebuild_batch(
+                user_ids[index : index + batch_size], since
+            )
+            baselines += rebuilt
+            notified += create_anomaly_notifications(anomalies)
+    return baselines, notified
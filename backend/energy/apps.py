@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class EnergyConfig(AppConfig):
     name = 'energy'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,208 @@
+"""
+Async-native versions of the hot read/write endpoints.
+
+Served ahead of the DRF router when ASYNC_API_VIEWS is enabled and the
+project runs under ASGI (config.asgi): queries go through the async ORM
+(aget/acreate/async iteration), so a worker keeps serving other requests
+while one waits on the database instead of holding a thread per request.
+Payloads and list ETags match the DRF viewsets; everything else (detail routes,
+PUT/PATCH/DELETE, bulk, export) stays on the viewsets.
+"""
+
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+
+from .alerts import notify_reading
+from .anomalies import detect_reading
+from .authentication import asession_user_id
+from .models import Consommation, Notification
+from .pagination import ConsommationKeysetPagination
+from .serializers import ConsommationReadMapper, ConsommationSerializer
+from .versions import (
+    CONSOMMATIONS,
+    NOTIFICATIONS,
+    acurrent_version,
+    list_etag,
+    not_modified,
+    with_etag,
+)
+from .views import (
+    NotificationViewSet,
+    _aggregate_result,
+    _aggregate_rows,
+    _filter_consommations,
+)
+
+read_mapper = ConsommationReadMapper()
+
+NOTIFICATION_COLUMNS = (
+    "id",
+    "user_id",
+    "alert_id",
+    "type",
+    "read",
+    "created_at",
+    "category_id",
+    "reading_at",
+    "value",
+    "baseline",
+    "score",
+)
+
+# POST /notifications/ is rare; it keeps the viewset's validation as is.
+_notification_viewset_create = NotificationViewSet.as_view({"post": "create"})
+
+
+async def conditional_list(request, resource, user_id, build_response):
+    # Async counterpart of views.ConditionalListMixin.
+    version = await acurrent_version(resource, user_id)
+    etag = list_etag(request, resource, user_id, version)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    return with_etag(await build_response(), etag)
+
+
+def async_api_view(methods):
+    """
+    Session-authenticated async endpoint: 405 on other methods, 403 without
+    a session user (as SessionAuthenticated), DRF exceptions as JSON.
+    """
+
+    def decorator(view_func):
+        @csrf_exempt
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({"detail": "Method not allowed."}, status=405)
+            user_id = await asession_user_id(request)
+            if user_id is None:
+                return JsonResponse(
+                    {"detail": "Authentication credentials were not provided."},
+                    status=403,
+                )
+            try:
+                return await view_func(request, user_id, *args, **kwargs)
+            except APIException as exc:
+                detail = exc.detail
+                if not isinstance(detail, (list, dict)):
+                    detail = {"detail": detail}
+                return JsonResponse(detail, status=exc.status_code, safe=False)
+
+        return wrapper
+
+    return decorator
+
+
+@async_api_view(["GET", "POST"])
+async def consommation_collection(request, user_id):
+    """
+    GET/POST /api/v1/consommations/
+    Auth: session (login required)
+    Query (GET): id, category, date_from, date_to, page_size, cursor
+    Body (POST): { "category": 1, "value": "12.5", "unit_price": "0.18", "date_consommation": "..." }
+    Returns: 200 + Consommation list | {next,next_cursor,results} | 304 | 201 + Consommation | 400
+    Description: Async list/create for consommations.
+    """
+    if request.method == "POST":
+        return await _create_consommation(request, user_id)
+    return await conditional_list(
+        request, CONSOMMATIONS, user_id, lambda: _list_consommations(request, user_id)
+    )
+
+
+async def _list_consommations(request, user_id):
+    rows = _filter_consommations(
+        Consommation.objects.filter(user_id=user_id), request.GET
+    ).values(*ConsommationReadMapper.columns)
+
+    paginator = ConsommationKeysetPagination()
+    page = await paginator.apaginate_queryset(rows, request)
+    if page is not None:
+        return JsonResponse(paginator.get_paginated_data(read_mapper.map(page)))
+    return JsonResponse(read_mapper.map([row async for row in rows]), safe=False)
+
+
+async def _create_consommation(request, user_id):
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"detail": "Invalid JSON."}, status=400)
+
+    serializer = ConsommationSerializer(data=payload)
+    # Field validation resolves the category with a (sync) primary key lookup.
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    consommation = await Consommation.objects.acreate(
+        user_id=user_id, **serializer.validated_data
+    )
+    # Auto-create a notification if the consumption exceeds an active alert
+    # or stands out from the user's usual readings in that category.
+    await sync_to_async(notify_reading)(consommation)
+    await sync_to_async(detect_reading)(consommation)
+    return JsonResponse(ConsommationSerializer(consommation).data, status=201)
+
+
+@async_api_view(["GET"])
+async def consommation_aggregate(request, user_id):
+    """
+    GET /api/v1/consommations/aggregate/?bucket=day&category=1&date_from=2026-01-01&date_to=2026-01-31
+    Auth: session (login required)
+    Returns: 200 + {bucket,results[{period,category,value,total_price}]} | 400
+    Description: Async version of the rollup aggregate.
+    """
+    bucket, rows = _aggregate_rows(user_id, request.GET)
+    results = [_aggregate_result(row) async for row in rows]
+    return JsonResponse({"bucket": bucket, "results": results})
+
+
+@async_api_view(["GET", "POST"])
+async def notification_collection(request, user_id):
+    """
+    GET/POST /api/v1/notifications/
+    Auth: session (login required)
+    Returns: 200 + Notification list | 304 (If-None-Match) | POST handled by NotificationViewSet
+    Description: Async listing of the session user's notifications.
+    """
+    if request.method == "POST":
+        return await sync_to_async(_notification_viewset_create)(request)
+    return await conditional_list(
+        request, NOTIFICATIONS, user_id, lambda: _list_notifications(user_id)
+    )
+
+
+def _optional(value, convert):
+    return None if value is None else convert(value)
+
+
+async def _list_notifications(user_id):
+    tz = timezone.get_current_timezone()
+    format_datetime = ConsommationReadMapper.format_datetime
+    results = [
+        {
+            "id": row["id"],
+            "user": row["user_id"],
+            "alert": row["alert_id"],
+            "type": row["type"],
+            "read": row["read"],
+            "created_at": format_datetime(row["created_at"], tz),
+            "category": row["category_id"],
+            "reading_at": _optional(
+                row["reading_at"], lambda value: format_datetime(value, tz)
+            ),
+            "value": _optional(row["value"], "{:f}".format),
+            "baseline": _optional(row["baseline"], "{:f}".format),
+            "score": row["score"],
+        }
+        async for row in Notification.objects.filter(user_id=user_id).values(
+            *NOTIFICATION_COLUMNS
+        )
+    ]
+    return JsonResponse(results, safe=False)
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import BaseAuthentication
+
+from .models import User
+
+_UNSET = object()
+
+# What authentication and the permission checks read; the password hash in
+# particular never goes to the shared cache (other fields load on access).
+CACHED_USER_FIELDS = ("id", "email", "role", "is_active")
+
+
+def _user_cache_key(user_id):
+    return f"session-user:{user_id}"
+
+
+def get_cached_user(user_id):
+    """User by id from a short-TTL cache, or None if it does not exist."""
+    key = _user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.only(*CACHED_USER_FIELDS).filter(id=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    key = _user_cache_key(user_id)
+    cache.delete(key)
+    # Again after commit: a concurrent request may refill it with the
+    # pre-commit row meanwhile.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _uses_signed_cookies():
+    return settings.SESSION_ENGINE.endswith("signed_cookies")
+
+
+def _revoked_token_key(token):
+    return f"revoked-session:{token}"
+
+
+def revoke_session(session):
+    """
+    Revoke the session before logout flushes it. Server-side engines delete
+    the stored session on flush; a signed cookie lives on the client, so its
+    auth token is blocklisted in the cache until the cookie would expire.
+    """
+    token = session.get("auth_token")
+    if token and _uses_signed_cookies():
+        cache.set(_revoked_token_key(token), True, settings.SESSION_COOKIE_AGE)
+
+
+def session_user_id(request):
+    user_id = request.session.get("user_id")
+    if user_id is not None and _uses_signed_cookies():
+        token = request.session.get("auth_token")
+        if not token or cache.get(_revoked_token_key(token)):
+            return None
+    return user_id
+
+
+async def asession_user_id(request):
+    """session_user_id() for async views."""
+    user_id = await request.session.aget("user_id")
+    if user_id is not None and _uses_signed_cookies():
+        token = await request.session.aget("auth_token")
+        if not token or await cache.aget(_revoked_token_key(token)):
+            return None
+    return user_id
+
+
+def session_user(request):
+    """The session's User, resolved at most once per request."""
+    user = getattr(request, "_session_user", _UNSET)
+    if user is _UNSET:
+        user_id = session_user_id(request)
+        user = get_cached_user(user_id) if user_id is not None else None
+        request._session_user = user
+    return user
+
+
+class SessionUserAuthentication(BaseAuthentication):
+    """
+    Authenticates DRF requests from the `user_id` stored in the session by
+    login(): `request.user` is the energy User (None when anonymous), read
+    once per request through the user cache.
+    """
+
+    def authenticate(self, request):
+        user = session_user(request._request)
+        if user is None:
+            return None
+        return user, None
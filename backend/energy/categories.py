@@ -0,0 +1,118 @@
+"""
+Process-local cache of the Category catalogue.
+
+Each worker keeps the whole (tiny) table in memory with the version token
+it was loaded at. The token lives in Django's cache, shared by every
+worker when a shared backend (Redis, Memcached) is configured, and is
+replaced when a Category is written and again once the write commits (the
+writing worker reloads at once); workers compare it at most every
+CATEGORY_CACHE_CHECK_INTERVAL seconds and reload on change. An id missing
+from the local copy is looked up once, so a category created on another
+worker is usable immediately; unknown ids are remembered (at most
+MAX_MISSING_IDS of them) until the next reload.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category
+
+VERSION_KEY = "categories:version"
+# Bound on the unknown ids remembered between reloads: clients choose them.
+MAX_MISSING_IDS = 1000
+
+
+def _shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Never set or evicted: start a generation every worker will adopt.
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+class CategoryCatalogue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._by_id = {}
+        self._by_name = []
+        self._missing = set()
+
+    def _reload(self, version):
+        categories = list(Category.objects.order_by("name", "id"))
+        self._by_id = {category.id: category for category in categories}
+        self._by_name = categories
+        self._missing = set()
+        self._version = version
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        interval = settings.CATEGORY_CACHE_CHECK_INTERVAL
+        if not force and self._version is not None and now - self._checked_at < interval:
+            return
+        version = _shared_version()
+        with self._lock:
+            if force or version != self._version:
+                self._reload(version)
+            self._checked_at = now
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._version
+
+    def all(self):
+        """Every category, ordered by name (as /categories/)."""
+        self._refresh()
+        return self._by_name
+
+    def ids(self):
+        self._refresh()
+        return self._by_id.keys()
+
+    def get(self, category_id):
+        """The category with this id, or None."""
+        self._refresh()
+        category = self._by_id.get(category_id)
+        if category is None and category_id not in self._missing:
+            if Category.objects.filter(pk=category_id).exists():
+                # Created on another worker since our last check.
+                self._refresh(force=True)
+                category = self._by_id.get(category_id)
+            else:
+                # Unknown ids are not looked up again until the next reload.
+                with self._lock:
+                    if len(self._missing) >= MAX_MISSING_IDS:
+                        self._missing = set()
+                    self._missing.add(category_id)
+        return category
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+
+
+catalogue = CategoryCatalogue()
+
+
+def _replace_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_categories():
+    """
+    Reload the catalogue after a Category write: right away in this worker
+    (its transaction sees the write), in the others once it commits. The
+    token is also replaced now so ETags change at once; a worker reloading
+    before the commit is caught by the second replacement.
+    """
+    _replace_version()
+    catalogue.clear()
+    transaction.on_commit(_replace_version)
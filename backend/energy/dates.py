@@ -0,0 +1,34 @@
+"""
+Day parsing and day-range filters shared by the API views and the
+management commands. A range of days is applied as a half-open timestamp
+range [date_from 00:00, date_to + 1 day 00:00), which keeps the column bare
+so the (user, ..., date_consommation) indexes apply.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def parse_day(value):
+    """The date of a YYYY-MM-DD string, or None if it is not a real date."""
+    try:
+        return parse_date(value)
+    except ValueError:  # well formed but impossible, e.g. 2026-02-30
+        return None
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_days(queryset, date_from=None, date_to=None, field="date_consommation"):
+    """Rows whose `field` falls within the days date_from..date_to (either may be None)."""
+    if date_from is not None:
+        queryset = queryset.filter(**{f"{field}__gte": start_of_day(date_from)})
+    if date_to is not None:
+        queryset = queryset.filter(
+            **{f"{field}__lt": start_of_day(date_to + timedelta(days=1))}
+        )
+    return queryset
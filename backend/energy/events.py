@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """One listener on a channel; messages are buffered in an asyncio queue."""
+
+    def __init__(self, broker, channel, loop, queue):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = queue
+
+    async def get(self, timeout=None):
+        """Next message, or raise TimeoutError after `timeout` seconds."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub within one process. publish() is synchronous and thread-safe so
+    it can be called from ORM code running in worker threads; subscribers
+    are asyncio queues owned by the ASGI event loop. Idle subscribers cost
+    one queue each. Deployments with several worker processes should point
+    NOTIFICATION_BROKER at a backend sharing messages across processes.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(
+            self,
+            channel,
+            asyncio.get_running_loop(),
+            asyncio.Queue(maxsize=self.max_queue_size),
+        )
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    self._deliver, subscription.queue, message
+                )
+            except RuntimeError:
+                # The subscriber's event loop is gone; drop the listener.
+                self.unsubscribe(subscription)
+
+    @staticmethod
+    def _deliver(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop the event, clients resync on the next one.
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.NOTIFICATION_BROKER)()
+
+
+def notification_channel(user_id):
+    return f"notifications:{user_id}"
@@ -0,0 +1,110 @@
+"""
+Bulk loader for consommations.
+
+On PostgreSQL rows are streamed with `COPY ... FROM STDIN` (no model
+instances, no parameterized INSERT); other engines fall back to chunked
+bulk_create. total_price is a generated column, so neither path writes it.
+Neither path fires model signals: rollups, alerts and anomaly baselines
+are fed per chunk from the same readings unless the caller opts out (e.g.
+to rebuild them once after a very large load). Rows are always stamped
+with their owner's next revision (one per chunk), as RevisionedModel.save()
+does.
+"""
+
+import io
+from itertools import islice
+
+from django.db import connection, transaction
+
+from .alerts import notify_readings
+from .anomalies import detect_anomalies
+from .models import Consommation
+from .rollups import apply_readings
+from .versions import CONSOMMATIONS, next_revisions
+
+LOAD_CHUNK_SIZE = 10000
+
+COPY_COLUMNS = (
+    "user_id",
+    "category_id",
+    "value",
+    "unit_price",
+    "date_consommation",
+    "revision",
+)
+
+
+def copy_supported():
+    return connection.vendor == "postgresql"
+
+
+def _copy_line(reading, revisions):
+    user_id, category_id, date_value, value, unit_price = reading
+    if not isinstance(date_value, str):
+        date_value = date_value.isoformat()
+    return (
+        f"{user_id}\t{category_id}\t{value}\t{unit_price}\t{date_value}\t"
+        f"{revisions[user_id]}\n"
+    )
+
+
+def _copy_chunk(readings, revisions):
+    sql = f"COPY {Consommation._meta.db_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+    data = "".join(_copy_line(reading, revisions) for reading in readings)
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, io.StringIO(data))
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(data)
+
+
+def _bulk_create_chunk(readings, revisions):
+    Consommation.objects.bulk_create(
+        [
+            Consommation(
+                user_id=user_id,
+                category_id=category_id,
+                value=value,
+                unit_price=unit_price,
+                date_consommation=date_value,
+                revision=revisions[user_id],
+            )
+            for user_id, category_id, date_value, value, unit_price in readings
+        ]
+    )
+
+
+def load_consommations(
+    readings,
+    chunk_size=LOAD_CHUNK_SIZE,
+    use_copy=None,
+    update_rollups=True,
+    notify=True,
+):
+    """
+    Insert readings, (user_id, category_id, date_consommation, value,
+    unit_price) tuples as used by the rollups, in chunks inside one
+    transaction. `use_copy` defaults to COPY when the database supports it.
+    Returns the number of rows inserted.
+    """
+    if use_copy is None:
+        use_copy = copy_supported()
+    write = _copy_chunk if use_copy else _bulk_create_chunk
+
+    readings = iter(readings)
+    loaded = 0
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(readings, chunk_size))
+            if not chunk:
+                break
+            write(chunk, next_revisions(CONSOMMATIONS, [row[0] for row in chunk]))
+            if update_rollups:
+                apply_readings(chunk)
+            if notify:
+                notify_readings(chunk)
+                detect_anomalies(chunk)
+            loaded += len(chunk)
+    return loaded
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from energy.anomalies import ANOMALY_BATCH_SIZE, rebuild_baselines
+from energy.dates import parse_day, start_of_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild anomaly baselines from stored consommations (vectorized with "
+        "NumPy) and notify the anomalous readings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild baselines for this user id (repeatable).",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only notify anomalies from this day on (YYYY-MM-DD); "
+            "baselines still cover the whole history.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ANOMALY_BATCH_SIZE,
+            help="Users loaded and scored per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0:
+            raise CommandError("--batch-size must be positive.")
+        since = None
+        if options["since"]:
+            day = parse_day(options["since"])
+            if day is None:
+                raise CommandError("--since must be YYYY-MM-DD.")
+            since = start_of_day(day)
+
+        baselines, notified = rebuild_baselines(
+            user_ids=options["user_ids"],
+            since=since,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"AnomalyBaseline: {baselines} rows")
+        self.stdout.write(self.style.SUCCESS(f"{notified} anomaly notification(s) created."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from energy.alerts import notify_breached_alerts
+from energy.dates import filter_days, parse_day
+from energy.models import Consommation
+
+
+class Command(BaseCommand):
+    help = "Create notifications for every active alert breached by stored consommations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only evaluate readings of this user id (repeatable).",
+        )
+        parser.add_argument("--date-from", help="First reading day (YYYY-MM-DD).")
+        parser.add_argument("--date-to", help="Last reading day (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        consommations = Consommation.objects.all()
+        if options["user_ids"]:
+            consommations = consommations.filter(user_id__in=options["user_ids"])
+        days = {
+            option: parse_day(options[option]) if options[option] else None
+            for option in ("date_from", "date_to")
+        }
+        for option, day in days.items():
+            if options[option] and day is None:
+                raise CommandError(f"--{option.replace('_', '-')} must be YYYY-MM-DD.")
+        # Same half-open timestamp range as the API, so the indexes on
+        # date_consommation apply (no per-row ::date cast).
+        consommations = filter_days(consommations, **days)
+
+        breached = notify_breached_alerts(consommations.values("id"))
+        self.stdout.write(self.style.SUCCESS(f"{breached} breached alert(s) notified."))
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from energy.partitions import (
+    SCHEMA_NAME,
+    add_months,
+    default_months,
+    detach_partitions,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain the monthly partitions of the consommation table: create the "
+        "upcoming months, detach (archive or drop) old ones, list them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Partition the table first if it is still a plain table.",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.CONSOMMATION_PARTITIONS_AHEAD,
+            help="Months to create ahead of the current month.",
+        )
+        parser.add_argument(
+            "--detach-before",
+            help="Detach partitions of months before this one (YYYY-MM).",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of keeping them as tables.",
+        )
+        parser.add_argument(
+            "--archive-schema",
+            help="Move detached partitions to this schema.",
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="Print the partitions and exit."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs PostgreSQL.")
+        if options["ahead"] < 0:
+            raise CommandError("--ahead must not be negative.")
+        if options["drop"] and options["archive_schema"]:
+            raise CommandError("--drop and --archive-schema are exclusive.")
+        if options["archive_schema"] and not SCHEMA_NAME.fullmatch(
+            options["archive_schema"]
+        ):
+            raise CommandError(
+                "--archive-schema must be a plain identifier (letters, digits, _)."
+            )
+        before = None
+        if options["detach_before"]:
+            try:
+                before = datetime.strptime(options["detach_before"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--detach-before must be YYYY-MM.") from None
+
+        if options["convert"] and partition_table(months_ahead=options["ahead"]):
+            self.stdout.write("Table converted to monthly partitions.")
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError(
+                    "The consommation table is not partitioned (use --convert)."
+                )
+            if options["list"]:
+                for name, bounds in list_partitions(cursor):
+                    self.stdout.write(f"{name}: {bounds}")
+                return
+
+        first = month_start(datetime.now(timezone.utc).date())
+        last = add_months(first, options["ahead"])
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Also give their own partition to months that fell into DEFAULT.
+            stray = default_months(cursor)
+            if stray:
+                first, last = min(first, stray[0]), max(last, stray[1])
+            created = ensure_partitions(cursor, first, last)
+        self.stdout.write(f"{len(created)} partition(s) created.")
+
+        if before is not None:
+            detached = detach_partitions(
+                before, drop=options["drop"], archive_schema=options["archive_schema"]
+            )
+            action = "dropped" if options["drop"] else "detached"
+            self.stdout.write(f"{len(detached)} partition(s) {action}.")
+        self.stdout.write(self.style.SUCCESS("Partitions up to date."))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from energy.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS "
+        "(clients with older tokens resync fully)."
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(
+            f"{deleted} tombstone(s) older than "
+            f"{settings.SYNC_TOMBSTONE_RETENTION_DAYS} days deleted."
+        )
+        self.stdout.write(self.style.SUCCESS("Tombstones pruned."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from energy.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily and monthly consumption rollups from raw consommations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild rollups for this user id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_rollups(user_ids=options["user_ids"])
+        for model_name, count in created.items():
+            self.stdout.write(f"{model_name}: {count} rows")
+        self.stdout.write(self.style.SUCCESS("Rollups rebuilt."))
@@ -0,0 +1,197 @@
+import multiprocessing
+import time as clock
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from energy.alerts import notify_breached_alerts
+from energy.anomalies import rebuild_baselines
+from energy.categories import catalogue
+from energy.loading import copy_supported, load_consommations
+from energy.models import Consommation, User
+from energy.rollups import rebuild_rollups
+from energy.seeding import day_timestamps, generate_user_readings, user_rng
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic consommations (one per day and category) for many users, "
+        "generated with NumPy and written in chunks (COPY on PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Seed this existing user id (repeatable).",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=0,
+            help="Create (or reuse) this many seed-<n>@seed.managenergy.local users.",
+        )
+        parser.add_argument("--days", type=int, default=365, help="Days per user.")
+        parser.add_argument(
+            "--start", default="2025-01-01", help="First reading day (YYYY-MM-DD)."
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed (same seed, same data)."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=50000, help="Rows per insert round-trip."
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Parallel insert processes."
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use chunked bulk_create even on PostgreSQL.",
+        )
+        parser.add_argument(
+            "--skip-rollups",
+            action="store_true",
+            help="Do not rebuild rollups (run rebuild_rollups later).",
+        )
+        parser.add_argument(
+            "--skip-alerts",
+            action="store_true",
+            help="Do not evaluate alerts (run evaluate_alerts later).",
+        )
+        parser.add_argument(
+            "--skip-anomalies",
+            action="store_true",
+            help="Do not rebuild anomaly baselines (run detect_anomalies later).",
+        )
+
+    def handle(self, *args, **options):
+        days, workers = options["days"], options["workers"]
+        if days <= 0 or options["chunk_size"] <= 0 or workers <= 0:
+            raise CommandError("--days, --chunk-size and --workers must be positive.")
+        first_day = parse_date(options["start"])
+        if first_day is None:
+            raise CommandError("--start must be YYYY-MM-DD.")
+        start = timezone.make_aware(datetime.combine(first_day, time.min))
+
+        categories = sorted(
+            (category.id, category.name) for category in catalogue.all()
+        )
+        if not categories:
+            raise CommandError("No categories available.")
+        user_ids = self._user_ids(options["user_ids"] or [], options["users"])
+        if not user_ids:
+            raise CommandError("Pass --user and/or --users.")
+
+        use_copy = copy_supported() and not options["no_copy"]
+        seed = partial(
+            seed_users,
+            categories=categories,
+            start=start,
+            days=days,
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            use_copy=use_copy,
+        )
+        started = clock.perf_counter()
+        if workers == 1:
+            created = seed(user_ids)
+        else:
+            if "fork" not in multiprocessing.get_all_start_methods():
+                raise CommandError("--workers needs the fork start method.")
+            # Children must open their own database connections.
+            connections.close_all()
+            groups = [user_ids[index::workers] for index in range(workers)]
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                created = sum(pool.map(seed, groups))
+        elapsed = clock.perf_counter() - started
+        self.stdout.write(
+            f"{created} consommations for {len(user_ids)} user(s) in {elapsed:.1f}s "
+            f"({created / elapsed:.0f} rows/s, {'COPY' if use_copy else 'bulk_create'})."
+        )
+
+        # Raw inserts bypass the model signals: feed rollups, alerts and
+        # anomaly baselines here.
+        if not options["skip_rollups"]:
+            rebuild_rollups(user_ids)
+            self.stdout.write("Rollups rebuilt.")
+        if not options["skip_alerts"]:
+            end = start + timedelta(days=days)
+            breached = notify_breached_alerts(
+                Consommation.objects.filter(
+                    user_id__in=user_ids,
+                    date_consommation__gte=start,
+                    date_consommation__lt=end,
+                ).values("id")
+            )
+            self.stdout.write(f"{breached} breached alert(s) notified.")
+        if not options["skip_anomalies"] and settings.ANOMALY_DETECTION:
+            _baselines, notified = rebuild_baselines(user_ids, since=start)
+            self.stdout.write(f"{notified} anomaly notification(s) created.")
+        self.stdout.write(self.style.SUCCESS("Seeding done."))
+
+    def _user_ids(self, existing_ids, synthetic_count):
+        found = set(User.objects.filter(id__in=existing_ids).values_list("id", flat=True))
+        missing = sorted(set(existing_ids) - found)
+        if missing:
+            raise CommandError(f"Unknown user id(s): {', '.join(map(str, missing))}.")
+
+        emails = [
+            f"seed-{index}@seed.managenergy.local" for index in range(synthetic_count)
+        ]
+        # Unusable password: seeded accounts exist for data volume, not logins.
+        User.objects.bulk_create(
+            [
+                User(email=email, password=make_password(None), is_active=False)
+                for email in emails
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        seeded = User.objects.filter(email__in=emails).values_list("id", flat=True)
+        return sorted(found | set(seeded))
+
+
+def seed_users(user_ids, categories, start, days, seed, chunk_size, use_copy):
+    """Generate and insert every user's readings; returns the row count."""
+    timestamps = day_timestamps(start, days)
+    if use_copy:
+        # Formatted once, reused for every user and category.
+        timestamps = [timestamp.isoformat() for timestamp in timestamps]
+
+    created = 0
+    for user_id in user_ids:
+        # One transaction per user keeps parallel workers from holding long locks.
+        created += load_consommations(
+            _user_readings(user_id, categories, timestamps, seed),
+            chunk_size=chunk_size,
+            use_copy=use_copy,
+            update_rollups=False,
+            notify=False,
+        )
+    return created
+
+
+def _user_readings(user_id, categories, timestamps, seed):
+    days = len(timestamps)
+    for category_id, values, unit_prices in generate_user_readings(
+        user_rng(seed, user_id), categories, days
+    ):
+        yield from zip(
+            [user_id] * days,
+            [category_id] * days,
+            timestamps,
+            [f"{value:.2f}" for value in values.tolist()],
+            [f"{price:.4f}" for price in unit_prices.tolist()],
+        )
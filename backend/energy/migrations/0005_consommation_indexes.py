@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energy', '0004_notification_read_notification_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consommation',
+            index=models.Index(fields=['user', 'date_consommation'], name='conso_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consommation',
+            index=models.Index(fields=['user', 'category', 'date_consommation'], name='conso_user_cat_date_idx'),
+        ),
+    ]
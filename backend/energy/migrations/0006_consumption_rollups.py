@@ -0,0 +1,94 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DateField, DecimalField, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_rollups(apps, schema_editor):
+    # Existing history must show up in the rollup-backed reads right after
+    # migrate (same aggregation as energy.rollups.rebuild_rollups).
+    Consommation = apps.get_model("energy", "Consommation")
+    for model_name, period_field, trunc in (
+        ("DailyConsumptionRollup", "day", TruncDay),
+        ("MonthlyConsumptionRollup", "month", TruncMonth),
+    ):
+        model = apps.get_model("energy", model_name)
+        rows = (
+            Consommation.objects.annotate(
+                period=trunc("date_consommation", output_field=DateField())
+            )
+            .values("user_id", "category_id", "period")
+            .annotate(
+                total_value=Sum("value"),
+                total_cost=Sum(
+                    F("value") * F("unit_price"),
+                    output_field=DecimalField(max_digits=24, decimal_places=6),
+                ),
+                count=Count("id"),
+            )
+            .order_by()
+            .iterator(chunk_size=BACKFILL_BATCH_SIZE)
+        )
+        batch = []
+        for row in rows:
+            batch.append(
+                model(
+                    user_id=row["user_id"],
+                    category_id=row["category_id"],
+                    total_value=row["total_value"],
+                    total_cost=row["total_cost"],
+                    count=row["count"],
+                    **{period_field: row["period"]},
+                )
+            )
+            if len(batch) == BACKFILL_BATCH_SIZE:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energy', '0005_consommation_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyConsumptionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_cost', models.DecimalField(decimal_places=6, default=0, max_digits=24)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='energy.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='energy.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'day'], name='daily_rollup_user_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'category', 'day'), name='daily_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyConsumptionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_cost', models.DecimalField(decimal_places=6, default=0, max_digits=24)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='energy.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='energy.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'month'], name='monthly_rollup_user_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'category', 'month'), name='monthly_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
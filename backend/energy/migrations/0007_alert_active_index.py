@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:05
+
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_alert_status(apps, schema_editor):
+    Alert = apps.get_model("energy", "Alert")
+    Alert.objects.update(status=Lower(Trim("status")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energy', '0006_consumption_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_alert_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['user', 'category', 'limit'], name='alert_active_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:07
+
+import django.db.models.expressions
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energy', '0007_alert_active_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consommation',
+            name='total_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(models.F('value'), '*', models.F('unit_price')), 2), output_field=models.DecimalField(decimal_places=2, max_digits=24)),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('energy', '0008_consommation_total_price_generated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('read', False)), fields=['user'], name='notif_user_unread_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
-from django.db import models
-from decimal import Decimal, ROUND_HALF_UP
+from django.db import models, transaction
+from django.db.models.functions import Round
 
 
 class User(models.Model):
@@ -21,7 +21,31 @@ class Category(models.Model):
         return self.name
 
 
-class Consommation(models.Model):
+class RevisionedModel(models.Model):
+    """
+    A user's row stamped with the owner's change counter on every save, in
+    the same transaction (energy.versions); /sync/ serves rows above the
+    revision a client already has.
+    """
+
+    revision = models.PositiveBigIntegerField(default=0)
+
+    sync_resource = None
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from .versions import next_revision
+
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "revision"}
+        with transaction.atomic(using=kwargs.get("using")):
+            self.revision = next_revision(self.sync_resource, self.user_id)
+            super().save(*args, **kwargs)
+
+
+class Consommation(RevisionedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="consommations")
     category = models.ForeignKey(
         Category, on_delete=models.PROTECT, related_name="consommations"
@@ -29,19 +53,41 @@ class Consommation(models.Model):
     value = models.DecimalField(max_digits=12, decimal_places=2)
     unit_price = models.DecimalField(max_digits=12, decimal_places=4)
     date_consommation = models.DateTimeField()
+    # Monetary values are rounded to 2 decimals for display/reporting.
+    # Computed and stored by the database (round half away from zero, i.e.
+    # ROUND_HALF_UP), so it can be summed, sorted and filtered in SQL.
+    total_price = models.GeneratedField(
+        expression=Round(models.F("value") * models.F("unit_price"), 2),
+        output_field=models.DecimalField(max_digits=24, decimal_places=2),
+        db_persist=True,
+    )
+
+    sync_resource = "consommations"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "date_consommation"], name="conso_user_date_idx"
+            ),
+            models.Index(
+                fields=["user", "category", "date_consommation"],
+                name="conso_user_cat_date_idx",
+            ),
+            models.Index(fields=["user", "revision"], name="conso_user_revision_idx"),
+        ]
 
-    @property
-    def total_price(self) -> Decimal:
-        # Monetary values are rounded to 2 decimals for display/reporting.
-        return (self.value * self.unit_price).quantize(
-            Decimal("0.01"), rounding=ROUND_HALF_UP
-        )
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember persisted values so rollups can subtract them on update.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     def __str__(self) -> str:
         return f"{self.user.email} - {self.category.name}"
 
 
-class Alert(models.Model):
+class Alert(RevisionedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="alerts")
     category = models.ForeignKey(
         Category, on_delete=models.PROTECT, related_name="alerts"
@@ -50,18 +96,185 @@ class Alert(models.Model):
     status = models.CharField(max_length=30, default="active")
     message = models.CharField(max_length=255)
 
+    sync_resource = "alerts"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "category", "limit"],
+                condition=models.Q(status="active"),
+                name="alert_active_idx",
+            ),
+            models.Index(fields=["user", "revision"], name="alert_user_revision_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Stored lowercase so alert evaluation can use a plain, indexable equality.
+        self.status = (self.status or "").strip().lower()
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return f"{self.user.email} - {self.category.name} - {self.message}"
 
 
-class Notification(models.Model):
+class Notification(RevisionedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    # Set for type "alert"; "anomaly" notifications (energy.anomalies) carry
+    # the scored reading instead.
     alert = models.OneToOneField(
-        Alert, on_delete=models.CASCADE, related_name="notification"
+        Alert,
+        on_delete=models.CASCADE,
+        related_name="notification",
+        null=True,
+        blank=True,
     )
     type = models.CharField(max_length=30, default="alert")
     read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # SET_NULL: a deleted category keeps its anomaly notifications (restamped
+    # for /sync/ by energy.signals).
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        related_name="notifications",
+        null=True,
+        blank=True,
+    )
+    reading_at = models.DateTimeField(null=True, blank=True)
+    value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    baseline = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True
+    )
+    score = models.FloatField(null=True, blank=True)
+
+    sync_resource = "notifications"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category", "reading_at"],
+                condition=models.Q(type="anomaly"),
+                name="notif_anomaly_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user"],
+                condition=models.Q(read=False),
+                name="notif_user_unread_idx",
+            ),
+            models.Index(fields=["user", "revision"], name="notif_user_revision_idx"),
+        ]
 
     def __str__(self) -> str:
+        if self.alert_id is None:
+            return f"{self.user.email} - {self.type} - {self.value}"
         return f"{self.user.email} - {self.alert.message}"
+
+
+class DataVersion(models.Model):
+    # Change counter of a list endpoint ("consommations:<user_id>", or
+    # "categories" for shared data), bumped on writes; see energy.versions.
+    key = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self) -> str:
+        return f"{self.key} v{self.version}"
+
+
+class SyncTombstone(models.Model):
+    # A deleted consommation, alert or notification, reported by /sync/ to
+    # clients holding an older token; pruned after SYNC_TOMBSTONE_RETENTION_DAYS.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tombstones")
+    resource = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    revision = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "resource", "revision"], name="tombstone_user_rev_idx"
+            ),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.resource} {self.object_id} (r{self.revision})"
+
+
+class DailyConsumptionRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_rollups")
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    day = models.DateField()
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_cost = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category", "day"], name="daily_rollup_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "day"], name="daily_rollup_user_day_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} - {self.category_id} - {self.day}"
+
+
+class AnomalyBaseline(models.Model):
+    # Exponentially weighted mean/variance of a user's readings in one
+    # category, updated per reading by energy.anomalies.
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="anomaly_baselines"
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="anomaly_baselines"
+    )
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    variance = models.FloatField(default=0)
+    last_reading_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category"], name="anomaly_baseline_unique"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} - {self.category_id} - {self.mean:.2f}"
+
+
+class MonthlyConsumptionRollup(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="monthly_rollups"
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name="monthly_rollups"
+    )
+    month = models.DateField()
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_cost = models.DecimalField(max_digits=24, decimal_places=6, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "category", "month"], name="monthly_rollup_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "month"], name="monthly_rollup_user_month_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} - {self.category_id} - {self.month}"
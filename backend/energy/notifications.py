@@ -0,0 +1,145 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .events import get_broker, notification_channel
+from .models import Notification
+from .versions import NOTIFICATIONS, next_revisions
+
+
+def _unread_cache_key(user_id):
+    return f"notifications-unread:{user_id}"
+
+
+def unread_count(user_id):
+    """Unread notifications of a user, cached until one of them changes."""
+    key = _unread_cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        # Served by the partial (user_id) WHERE read = false index.
+        count = Notification.objects.filter(user_id=user_id, read=False).count()
+        cache.set(key, count, settings.UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread_count(*user_ids):
+    keys = [_unread_cache_key(user_id) for user_id in set(user_ids)]
+    cache.delete_many(keys)
+    # Again after commit: a concurrent request may refill them with the
+    # pre-commit count meanwhile.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def publish_new_notifications(notifications):
+    """
+    Push a "notification" event to each owner's stream once the current
+    transaction commits. `notifications` are (user_id, alert_id, type) tuples.
+    """
+    events = [
+        (
+            notification_channel(user_id),
+            {"event": "notification", "alert": alert_id, "type": notification_type},
+        )
+        for user_id, alert_id, notification_type in notifications
+    ]
+    if not events:
+        return
+
+    def send():
+        broker = get_broker()
+        for channel, message in events:
+            broker.publish(channel, message)
+
+    transaction.on_commit(send)
+
+
+def create_notifications(pairs):
+    """
+    Create alert notifications for (alert_id, user_id) pairs, skipping alerts
+    already notified. Refreshes unread counters and pushes stream events for
+    the new ones. Returns the number of notifications created.
+    """
+    pairs = list(pairs)
+    if not pairs:
+        return 0
+    existing = set(
+        Notification.objects.filter(
+            alert_id__in=[alert_id for alert_id, _ in pairs]
+        ).values_list("alert_id", flat=True)
+    )
+    new_pairs = [
+        (alert_id, user_id) for alert_id, user_id in pairs if alert_id not in existing
+    ]
+    if not new_pairs:
+        return 0
+    with transaction.atomic():
+        revisions = next_revisions(NOTIFICATIONS, [user_id for _, user_id in new_pairs])
+        # Notification.alert is one-to-one: a concurrent insert is skipped too.
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id, alert_id=alert_id, revision=revisions[user_id]
+                )
+                for alert_id, user_id in new_pairs
+            ],
+            ignore_conflicts=True,
+        )
+    invalidate_unread_count(*(user_id for _, user_id in new_pairs))
+    publish_new_notifications(
+        (user_id, alert_id, "alert") for alert_id, user_id in new_pairs
+    )
+    return len(new_pairs)
+
+
+ANOMALY_TYPE = "anomaly"
+
+
+def _cents(value):
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def create_anomaly_notifications(anomalies):
+    """
+    Create "anomaly" notifications for (user_id, category_id, reading_at,
+    value, baseline, score) tuples, skipping readings already notified.
+    Refreshes unread counters and pushes stream events for the new ones.
+    Returns the number of notifications created.
+    """
+    anomalies = {(anomaly[0], anomaly[1], anomaly[2]): anomaly for anomaly in anomalies}
+    if not anomalies:
+        return 0
+    existing = set(
+        Notification.objects.filter(
+            type=ANOMALY_TYPE,
+            user_id__in={user_id for user_id, _, _ in anomalies},
+            category_id__in={category_id for _, category_id, _ in anomalies},
+            reading_at__in={reading_at for _, _, reading_at in anomalies},
+        ).values_list("user_id", "category_id", "reading_at")
+    )
+    new = [anomaly for key, anomaly in anomalies.items() if key not in existing]
+    if not new:
+        return 0
+    with transaction.atomic():
+        revisions = next_revisions(NOTIFICATIONS, [anomaly[0] for anomaly in new])
+        # notif_anomaly_unique skips a concurrent insert of the same reading.
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id,
+                    category_id=category_id,
+                    type=ANOMALY_TYPE,
+                    reading_at=reading_at,
+                    value=_cents(value),
+                    baseline=_cents(baseline),
+                    score=round(float(score), 2),
+                    revision=revisions[user_id],
+                )
+                for user_id, category_id, reading_at, value, baseline, score in new
+            ],
+            ignore_conflicts=True,
+        )
+    invalidate_unread_count(*(anomaly[0] for anomaly in new))
+    publish_new_notifications((anomaly[0], None, ANOMALY_TYPE) for anomaly in new)
+    return len(new)
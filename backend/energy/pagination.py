@@ -0,0 +1,139 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ConsommationKeysetPagination(BasePagination):
+    """
+    Opt-in keyset pagination ordered on (date_consommation, id).
+
+    Pagination only applies when the client sends `page_size` or `cursor`;
+    otherwise the full list is returned as before. Each page seeks past the
+    last (date_consommation, id) pair instead of using OFFSET, so deep pages
+    cost the same as the first one.
+    """
+
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def get_page_size(self, request):
+        return self._page_size(request.query_params)
+
+    def _page_size(self, params):
+        raw = params.get(self.page_size_query_param)
+        if raw is None:
+            return settings.CONSOMMATION_PAGE_SIZE
+        try:
+            page_size = int(raw)
+        except ValueError:
+            return settings.CONSOMMATION_PAGE_SIZE
+        if page_size <= 0:
+            return settings.CONSOMMATION_PAGE_SIZE
+        return min(page_size, settings.CONSOMMATION_MAX_PAGE_SIZE)
+
+    def encode_cursor(self, row):
+        # Pages hold model instances or `.values()` dicts (fast read path).
+        if isinstance(row, dict):
+            date_value, pk = row["date_consommation"], row["id"]
+        else:
+            date_value, pk = row.date_consommation, row.id
+        payload = json.dumps([date_value.isoformat(), pk])
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+            date_value, pk = json.loads(payload.decode("utf-8"))
+            return datetime.fromisoformat(date_value), int(pk)
+        except (binascii.Error, UnicodeError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _page_window(self, queryset, params):
+        """Return the sliced queryset for the requested page, or None if unpaginated."""
+        if (
+            self.page_size_query_param not in params
+            and self.cursor_query_param not in params
+        ):
+            return None
+
+        self.page_size = self._page_size(params)
+        queryset = queryset.order_by("date_consommation", "id")
+
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            date_value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(date_consommation__gt=date_value)
+                | Q(date_consommation=date_value, id__gt=pk)
+            )
+
+        # Fetch one extra row to know whether a next page exists.
+        return queryset[: self.page_size + 1]
+
+    def _close_page(self, rows):
+        page = rows[: self.page_size]
+        self.next_cursor = (
+            self.encode_cursor(page[-1]) if len(rows) > self.page_size else None
+        )
+        return page
+
+    def page(self, queryset, cursor=None, page_size=None):
+        """
+        The page of queryset following `cursor` (the first one without),
+        paginated whatever the request asked; sets next_cursor.
+        """
+        params = {self.cursor_query_param: cursor}
+        if page_size is not None:
+            params[self.page_size_query_param] = page_size
+        return self._close_page(list(self._page_window(queryset, params)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self._page_window(queryset, request.query_params)
+        if window is None:
+            return None
+        self.request = request
+        return self._close_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Async counterpart for plain Django requests (see energy.async_views)."""
+        window = self._page_window(queryset, request.GET)
+        if window is None:
+            return None
+        self.request = request
+        return self._close_page([row async for row in window])
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "next_cursor": self.next_cursor,
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "next_cursor": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
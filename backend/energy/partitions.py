@@ -0,0 +1,269 @@
+"""
+Optional monthly range partitioning of the consommation table on
+date_consommation (PostgreSQL only).
+
+The Django model is unchanged: `id` stays the ORM primary key and keeps
+its own sequence, while the database key becomes (id, date_consommation)
+as PostgreSQL requires the partition key in it. Monthly partitions use UTC
+boundaries; a DEFAULT partition catches readings outside the created
+months so inserts never fail. Date-filtered queries (list, keyset pages,
+export) are pruned to the matching months by the planner.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from django.db import connection, transaction
+
+from .models import Consommation
+from .sync import raise_sync_floor
+from .versions import CONSOMMATIONS, bump_all_versions
+
+TABLE = Consommation._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+# "ON [ONLY] [schema.]table" in pg_indexes definitions.
+INDEX_TARGET = re.compile(rf" ON (ONLY )?(\S+\.)?{TABLE} ")
+# Names accepted for the archive schema (quote_name() does not escape quotes).
+SCHEMA_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE]
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor):
+    """(name, bounds) of the attached partitions, oldest first."""
+    cursor.execute(
+        """
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        ORDER BY child.relname
+        """,
+        [TABLE],
+    )
+    return cursor.fetchall()
+
+
+def _copy_columns(cursor, table):
+    # Every stored column except generated ones (total_price), read from the
+    # catalog so the copy follows whatever the live table holds.
+    cursor.execute(
+        """
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum)
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+            AND attgenerated = ''
+        """,
+        [table],
+    )
+    return cursor.fetchone()[0]
+
+
+def _table_definitions(cursor, table):
+    # Secondary indexes and foreign keys, replayed on the rebuilt table.
+    cursor.execute(
+        """
+        SELECT indexdef FROM pg_indexes
+        WHERE tablename = %s AND indexname NOT IN (
+            SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass
+        )
+        """,
+        [table, table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+        """,
+        [table],
+    )
+    return indexes, cursor.fetchall()
+
+
+def _rebuild(cursor, partitioned, months_ahead=0):
+    legacy = f"{TABLE}_legacy"
+    # Deferred FK checks queued on the old table would block its DROP.
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    indexes, foreign_keys = _table_definitions(cursor, TABLE)
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {legacy}")
+    # Continue the old sequence: archived partitions may hold the highest ids.
+    cursor.execute(
+        f"SELECT nextval(pg_get_serial_sequence(%s, 'id')), max(id) + 1 FROM {legacy}",
+        [legacy],
+    )
+    next_id = max(value or 0 for value in cursor.fetchone())
+
+    partition_by = " PARTITION BY RANGE (date_consommation)" if partitioned else ""
+    cursor.execute(
+        f"CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING GENERATED){partition_by}"
+    )
+    if partitioned:
+        # Identity columns are not allowed on partitioned tables before
+        # PostgreSQL 17: use an owned sequence instead.
+        sequence = f"{TABLE}_id_part_seq"
+        cursor.execute(f"CREATE SEQUENCE {sequence} START WITH {next_id}")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{sequence}')"
+        )
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id")
+
+        cursor.execute(
+            f"SELECT min(date_consommation), max(date_consommation) FROM {legacy}"
+        )
+        oldest, newest = cursor.fetchone()
+        today = month_start(datetime.now(timezone.utc).date())
+        first = month_start(oldest.astimezone(timezone.utc)) if oldest else today
+        last = month_start(newest.astimezone(timezone.utc)) if newest else today
+        ensure_partitions(cursor, first, add_months(max(last, today), months_ahead))
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+    else:
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY "
+            f"(START WITH {next_id})"
+        )
+
+    columns = _copy_columns(cursor, legacy)
+    cursor.execute(f"INSERT INTO {TABLE} ({columns}) SELECT {columns} FROM {legacy}")
+    cursor.execute(f"DROP TABLE {legacy}")
+
+    # Names below were held by the legacy table until now.
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+    sequence = cursor.fetchone()[0].rsplit(".", 1)[-1]
+    if sequence != f"{TABLE}_id_seq":
+        cursor.execute(f"ALTER SEQUENCE {sequence} RENAME TO {TABLE}_id_seq")
+    key = "id, date_consommation" if partitioned else "id"
+    cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY ({key})")
+    for indexdef in indexes:
+        cursor.execute(INDEX_TARGET.sub(f" ON {TABLE} ", indexdef, count=1))
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+    cursor.execute(f"ANALYZE {TABLE}")
+
+
+def partition_table(months_ahead=3):
+    """Convert the plain table into monthly partitions, keeping every row."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return False
+        _rebuild(cursor, partitioned=True, months_ahead=months_ahead)
+    return True
+
+
+def unpartition_table():
+    """Fold the partitions back into one plain table."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return False
+        _rebuild(cursor, partitioned=False)
+    return True
+
+
+def default_months(cursor):
+    """(first, last) month of the rows held in DEFAULT, or None if empty."""
+    cursor.execute(
+        f"SELECT min(date_consommation), max(date_consommation) FROM {DEFAULT_PARTITION}"
+    )
+    oldest, newest = cursor.fetchone()
+    if oldest is None:
+        return None
+    return (
+        month_start(oldest.astimezone(timezone.utc)),
+        month_start(newest.astimezone(timezone.utc)),
+    )
+
+
+def ensure_partitions(cursor, first_month, last_month):
+    """
+    Create the missing monthly partitions from first_month to last_month
+    (inclusive). Rows already sitting in the DEFAULT partition for a new
+    month are moved into it. Returns the created partition names.
+    """
+    cursor.execute("SELECT 1 FROM pg_class WHERE relname = %s", [DEFAULT_PARTITION])
+    has_default = cursor.fetchone() is not None
+    columns = _copy_columns(cursor, TABLE)
+    existing = {name for name, _bounds in list_partitions(cursor)}
+
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(month)
+        if name not in existing:
+            lower, upper = _bound(month), _bound(add_months(month, 1))
+            bounds = f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+            if has_default:
+                # A new partition may not overlap rows kept in DEFAULT: build
+                # it detached, move those rows over, then attach it.
+                cursor.execute(
+                    f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING GENERATED)"
+                )
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    "WHERE date_consommation >= %s AND date_consommation < %s "
+                    f"RETURNING {columns}) "
+                    f"INSERT INTO {name} ({columns}) "
+                    f"SELECT {columns} FROM moved",
+                    [lower, upper],
+                )
+                cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} {bounds}")
+            else:
+                cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} {bounds}")
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(before_month, drop=False, archive_schema=None):
+    """
+    Detach the monthly partitions entirely older than before_month. They
+    are kept as standalone tables (optionally moved to archive_schema) or
+    dropped. Rollups keep the aggregated history either way. Removed rows
+    get no tombstones: delta-sync clients are sent a full resync instead.
+    Raises ValueError if archive_schema is not a plain identifier.
+    """
+    if archive_schema and not SCHEMA_NAME.fullmatch(archive_schema):
+        raise ValueError(f"Invalid archive schema name: {archive_schema!r}.")
+    quote = connection.ops.quote_name
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if archive_schema:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {quote(archive_schema)}")
+        for name, _bounds in list_partitions(cursor):
+            if name == DEFAULT_PARTITION or name >= partition_name(before_month):
+                continue
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {quote(name)}")
+            # The id default would tie the archive to the live sequence.
+            cursor.execute(f"ALTER TABLE {quote(name)} ALTER COLUMN id DROP DEFAULT")
+            if drop:
+                cursor.execute(f"DROP TABLE {quote(name)}")
+            elif archive_schema:
+                cursor.execute(
+                    f"ALTER TABLE {quote(name)} SET SCHEMA {quote(archive_schema)}"
+                )
+            detached.append(name)
+        if detached:
+            bump_all_versions(CONSOMMATIONS)
+            raise_sync_floor()
+    return detached
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+LATENCY_WINDOW = 1000
+
+
+class HashQueueFull(Exception):
+    """Too many hashes are already waiting for a worker."""
+
+
+class PasswordHashPool:
+    """
+    Dedicated bounded thread pool for password hashing. PBKDF2 releases the
+    GIL, so a few workers hash in parallel; at most `max_pending` jobs wait
+    for a worker, beyond that callers get HashQueueFull instead of queueing
+    unbounded.
+
+    Only under ASGI does the caller stay free while a hash runs (the event
+    loop awaits the future). Under WSGI the request worker still blocks
+    until its hash is done: the pool then only caps concurrent hashes and
+    turns a backlog into fast 503s rather than workers stuck in the queue.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, func, *args):
+        with self._lock:
+            if self.max_pending and self._waiting >= self.max_pending:
+                self._rejected += 1
+                raise HashQueueFull()
+            self._waiting += 1
+        return self._executor.submit(self._run, time.perf_counter(), func, *args)
+
+    def _run(self, queued_at, func, *args):
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                # Queue wait included: that is what the caller experiences.
+                self._latencies.append(time.perf_counter() - queued_at)
+
+    async def run(self, func, *args):
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def metrics(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot = {
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+        for name, fraction in (("latency_p50_ms", 0.50), ("latency_p99_ms", 0.99)):
+            snapshot[name] = None
+            if latencies:
+                index = min(len(latencies) - 1, int(len(latencies) * fraction))
+                snapshot[name] = round(latencies[index] * 1000, 2)
+        return snapshot
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PasswordHashPool(
+                settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+            )
+        return _pool
+
+
+def _verify(password, encoded):
+    # Django asks for a rehash (through the setter) when the preferred hasher
+    # or its work factor differs from the stored one.
+    rehashed = []
+    valid = check_password(
+        password, encoded, setter=lambda raw: rehashed.append(make_password(raw))
+    )
+    return valid, rehashed[0] if rehashed else None
+
+
+async def averify_password(password, user):
+    """
+    Check `password` against `user` in the hash pool. On success with an
+    outdated hash the upgraded one is saved. Raises HashQueueFull.
+    """
+    valid, rehashed = await get_hash_pool().run(_verify, password, user.password)
+    if valid and rehashed is not None:
+        user.password = rehashed
+        await user.asave(update_fields=["password"])
+    return valid
+
+
+async def ahash_password(password):
+    """make_password() in the hash pool. Raises HashQueueFull."""
+    return await get_hash_pool().run(make_password, password)
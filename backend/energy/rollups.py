@@ -0,0 +1,185 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, DecimalField, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import Consommation, DailyConsumptionRollup, MonthlyConsumptionRollup
+
+ROLLUP_BATCH_SIZE = 1000
+
+# (model, period field, database truncation used by rebuild_rollups)
+ROLLUPS = (
+    (DailyConsumptionRollup, "day", TruncDay),
+    (MonthlyConsumptionRollup, "month", TruncMonth),
+)
+
+
+def reading_from_instance(consommation):
+    return (
+        consommation.user_id,
+        consommation.category_id,
+        consommation.date_consommation,
+        consommation.value,
+        consommation.unit_price,
+    )
+
+
+def reading_from_loaded_values(consommation):
+    """Return the reading as last read from the database, or None if unknown."""
+    loaded = getattr(consommation, "_loaded_values", None) or {}
+    try:
+        return (
+            loaded["user_id"],
+            loaded["category_id"],
+            loaded["date_consommation"],
+            loaded["value"],
+            loaded["unit_price"],
+        )
+    except KeyError:
+        return None
+
+
+def _local_day(date_value):
+    if timezone.is_aware(date_value):
+        date_value = timezone.localtime(date_value)
+    return date_value.date()
+
+
+def _collect_deltas(readings, sign):
+    deltas = {"day": defaultdict(list), "month": defaultdict(list)}
+    for user_id, category_id, date_value, value, unit_price in readings:
+        value = Decimal(str(value))
+        cost = value * Decimal(str(unit_price))
+        day = _local_day(date_value)
+        for period_field, period in (("day", day), ("month", day.replace(day=1))):
+            delta = deltas[period_field][(user_id, category_id, period)]
+            if not delta:
+                delta.extend([Decimal("0"), Decimal("0"), 0])
+            delta[0] += sign * value
+            delta[1] += sign * cost
+            delta[2] += sign
+    return deltas
+
+
+def _apply_deltas(model, period_field, deltas):
+    keys = list(deltas)
+    periods = [key[2] for key in keys]
+    existing = model.objects.select_for_update().filter(
+        user_id__in={key[0] for key in keys},
+        category_id__in={key[1] for key in keys},
+        **{f"{period_field}__gte": min(periods), f"{period_field}__lte": max(periods)},
+    )
+    by_key = {
+        (row.user_id, row.category_id, getattr(row, period_field)): row
+        for row in existing
+    }
+
+    to_create, to_update, to_delete = [], [], []
+    for key, (value, cost, count) in deltas.items():
+        row = by_key.get(key)
+        if row is None:
+            if count > 0:
+                to_create.append(
+                    model(
+                        user_id=key[0],
+                        category_id=key[1],
+                        total_value=value,
+                        total_cost=cost,
+                        count=count,
+                        **{period_field: key[2]},
+                    )
+                )
+            continue
+        row.total_value += value
+        row.total_cost += cost
+        row.count += count
+        if row.count <= 0:
+            to_delete.append(row.pk)
+        else:
+            to_update.append(row)
+
+    if to_update:
+        model.objects.bulk_update(
+            to_update, ["total_value", "total_cost", "count"], batch_size=ROLLUP_BATCH_SIZE
+        )
+    if to_delete:
+        model.objects.filter(pk__in=to_delete).delete()
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=ROLLUP_BATCH_SIZE)
+
+
+def apply_readings(readings, sign=1):
+    """
+    Add (sign=1) or subtract (sign=-1) readings from the daily and monthly
+    rollups. Readings are (user_id, category_id, date_consommation, value,
+    unit_price) tuples; work is proportional to the number of buckets touched.
+    """
+    deltas = _collect_deltas(readings, sign)
+    if not deltas["day"]:
+        return
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                for model, period_field, _trunc in ROLLUPS:
+                    _apply_deltas(model, period_field, deltas[period_field])
+            return
+        except IntegrityError:
+            # A concurrent writer created one of our buckets first; retry once
+            # so the bucket is picked up by select_for_update.
+            if attempt:
+                raise
+
+
+def rebuild_rollups(user_ids=None):
+    """Recompute every rollup (optionally for some users) from Consommation rows."""
+    consommations = Consommation.objects.all()
+    if user_ids:
+        consommations = consommations.filter(user_id__in=user_ids)
+
+    created = {}
+    with transaction.atomic():
+        for model, period_field, trunc in ROLLUPS:
+            stale = model.objects.all()
+            if user_ids:
+                stale = stale.filter(user_id__in=user_ids)
+            stale.delete()
+
+            rows = (
+                consommations.annotate(
+                    period=trunc("date_consommation", output_field=DateField())
+                )
+                .values("user_id", "category_id", "period")
+                .annotate(
+                    total_value=Sum("value"),
+                    total_cost=Sum(
+                        F("value") * F("unit_price"),
+                        output_field=DecimalField(max_digits=24, decimal_places=6),
+                    ),
+                    count=Count("id"),
+                )
+                .order_by()
+                .iterator(chunk_size=ROLLUP_BATCH_SIZE)
+            )
+            created[model.__name__] = 0
+            while True:
+                batch = [
+                    model(
+                        user_id=row["user_id"],
+                        category_id=row["category_id"],
+                        total_value=row["total_value"],
+                        total_cost=row["total_cost"],
+                        count=row["count"],
+                        **{period_field: row["period"]},
+                    )
+                    for row in islice(rows, ROLLUP_BATCH_SIZE)
+                ]
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                created[model.__name__] += len(batch)
+    return created
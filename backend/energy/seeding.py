@@ -0,0 +1,75 @@
+"""
+Synthetic consommation data: the per-category value and unit price ranges
+shared by /generate-consumptions/ and `manage.py seed_consumptions`, plus
+the vectorized generator used by the command.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+# Gas readings are higher during the first 90 days (winter start).
+GAS_WINTER_DAYS = 90
+
+
+def get_ranges(category_name, day_index):
+    """(min, max) reading value for a category on the given day index."""
+    name = (category_name or "").lower()
+    if "gaz" in name:
+        if day_index < GAS_WINTER_DAYS:
+            return (25, 50)
+        return (5, 25)
+    if "eau" in name:
+        return (150, 500)
+    if "electric" in name:
+        return (3.3, 6.7)
+    return (100, 500)
+
+
+def get_unit_price_range(category_name):
+    """(min, max) unit price for a category."""
+    name = (category_name or "").lower()
+    if "gaz" in name:
+        return (0.05, 0.12)
+    if "eau" in name:
+        return (0.001, 0.005)
+    if "electric" in name:
+        return (0.12, 0.25)
+    return (0.05, 0.2)
+
+
+def _value_bounds(category_name, days):
+    # get_ranges() over every day index at once.
+    name = (category_name or "").lower()
+    day_index = np.arange(days)
+    if "gaz" in name:
+        winter = day_index < GAS_WINTER_DAYS
+        return np.where(winter, 25.0, 5.0), np.where(winter, 50.0, 25.0)
+    low, high = get_ranges(category_name, 0)
+    return np.full(days, float(low)), np.full(days, float(high))
+
+
+def user_rng(seed, user_id):
+    """Per-user generator: output depends on (seed, user), not on worker split."""
+    return np.random.default_rng([seed, user_id])
+
+
+def generate_user_readings(rng, categories, days):
+    """
+    One reading per day and category for one user.
+
+    `categories` is a list of (category_id, name). Yields
+    (category_id, values, unit_prices) with float arrays of length `days`
+    rounded to the model's decimal places.
+    """
+    for category_id, name in categories:
+        low, high = _value_bounds(name, days)
+        price_low, price_high = get_unit_price_range(name)
+        values = np.round(rng.uniform(low, high), 2)
+        unit_prices = np.round(rng.uniform(price_low, price_high, days), 4)
+        yield category_id, values, unit_prices
+
+
+def day_timestamps(start, days):
+    """Aware datetimes start, start + 1 day, ... as in /generate-consumptions/."""
+    return [start + timedelta(days=index) for index in range(days)]
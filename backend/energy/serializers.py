@@ -1,5 +1,7 @@
+from django.utils import timezone
 from rest_framework import serializers
 
+from .categories import catalogue
 from .models import Alert, Category, Consommation, Notification, User
 
 
@@ -16,7 +18,32 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "unit"]
 
 
+class CatalogueCategoryField(serializers.PrimaryKeyRelatedField):
+    """Category by primary key, resolved from the in-process catalogue."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", Category.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        # Integers or integer strings only: int() would truncate 1.9 to 1.
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            category = catalogue.get(int(data))
+        except ValueError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if category is None:
+            self.fail("does_not_exist", pk_value=data)
+        return category
+
+
 class ConsommationSerializer(serializers.ModelSerializer):
+    category = CatalogueCategoryField()
+    total_price = serializers.DecimalField(
+        max_digits=24, decimal_places=2, read_only=True
+    )
+
     class Meta:
         model = Consommation
         fields = [
@@ -26,11 +53,78 @@ class ConsommationSerializer(serializers.ModelSerializer):
             "value",
             "unit_price",
             "date_consommation",
+            "total_price",
         ]
         extra_kwargs = {"user": {"read_only": True}}
 
 
+class ConsommationReadMapper:
+    """
+    Fast read path for listings and exports. Maps rows from
+    `.values(*ConsommationReadMapper.columns)` to the same payload as
+    ConsommationSerializer, without model instances or per-row field objects.
+    """
+
+    columns = (
+        "id",
+        "user_id",
+        "category_id",
+        "value",
+        "unit_price",
+        "date_consommation",
+        "total_price",
+    )
+
+    @staticmethod
+    def format_datetime(value, tz):
+        # Same output as DRF's default ISO 8601 DateTimeField representation.
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    def to_representation(self, row, tz):
+        # Decimals come back from the database at the column scale already.
+        return {
+            "id": row["id"],
+            "user": row["user_id"],
+            "category": row["category_id"],
+            "value": f"{row['value']:f}",
+            "unit_price": f"{row['unit_price']:f}",
+            "date_consommation": self.format_datetime(row["date_consommation"], tz),
+            "total_price": f"{row['total_price']:f}",
+        }
+
+    def iter_map(self, rows):
+        # Resolve the active timezone once per batch, not once per row.
+        tz = timezone.get_current_timezone()
+        for row in rows:
+            yield self.to_representation(row, tz)
+
+    def map(self, rows):
+        return list(self.iter_map(rows))
+
+
+class ConsommationBulkRowSerializer(serializers.Serializer):
+    """
+    Validates one uploaded reading. Category ids are checked against the
+    in-process catalogue instead of one lookup per row.
+    """
+
+    category = serializers.IntegerField()
+    value = serializers.DecimalField(max_digits=12, decimal_places=2)
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=4)
+    date_consommation = serializers.DateTimeField()
+
+    def validate_category(self, category_id):
+        if catalogue.get(category_id) is None:
+            raise serializers.ValidationError(
+                f'Invalid pk "{category_id}" - object does not exist.'
+            )
+        return category_id
+
+
 class AlertSerializer(serializers.ModelSerializer):
+    category = CatalogueCategoryField()
+
     class Meta:
         model = Alert
         fields = ["id", "user", "category", "limit", "status", "message"]
@@ -47,5 +141,25 @@ class NotificationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Notification
-        fields = ["id", "user", "alert", "type", "read", "created_at"]
-        extra_kwargs = {"user": {"read_only": True}}
+        fields = [
+            "id",
+            "user",
+            "alert",
+            "type",
+            "read",
+            "created_at",
+            "category",
+            "reading_at",
+            "value",
+            "baseline",
+            "score",
+        ]
+        # Anomaly details are written by energy.anomalies only.
+        read_only_fields = [
+            "user",
+            "category",
+            "reading_at",
+            "value",
+            "baseline",
+            "score",
+        ]
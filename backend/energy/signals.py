@@ -0,0 +1,169 @@
+from django.db.models import CharField, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Cast, Concat
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .alerts import invalidate_alert_limits
+from .authentication import invalidate_cached_user
+from .categories import invalidate_categories
+from .models import Alert, Category, Consommation, DataVersion, Notification, User
+from .notifications import invalidate_unread_count, publish_new_notifications
+from .rollups import apply_readings, reading_from_instance, reading_from_loaded_values
+from .sync import record_deletions
+from .versions import ALERTS, CONSOMMATIONS, NOTIFICATIONS, next_revisions
+
+
+@receiver(pre_save, sender=Consommation)
+def remember_previous_reading(sender, instance, raw=False, **kwargs):
+    instance._previous_reading = None
+    if raw or instance._state.adding:
+        return
+    previous = reading_from_loaded_values(instance)
+    if previous is None:
+        # Instance was not loaded with every rollup field; read it once.
+        previous = (
+            Consommation.objects.filter(pk=instance.pk)
+            .values_list(
+                "user_id", "category_id", "date_consommation", "value", "unit_price"
+            )
+            .first()
+        )
+    instance._previous_reading = previous
+
+
+@receiver(post_save, sender=Consommation)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_reading", None)
+    if previous is not None:
+        apply_readings([previous], sign=-1)
+    apply_readings([reading_from_instance(instance)])
+    instance._loaded_values = {
+        "user_id": instance.user_id,
+        "category_id": instance.category_id,
+        "date_consommation": instance.date_consommation,
+        "value": instance.value,
+        "unit_price": instance.unit_price,
+    }
+
+
+@receiver(post_delete, sender=Consommation)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    reading = reading_from_loaded_values(instance) or reading_from_instance(instance)
+    apply_readings([reading], sign=-1)
+
+
+# Saves stamp the revision themselves (RevisionedModel); deletes and moves
+# to another user leave a tombstone for the previous owner.
+@receiver(post_save, sender=Consommation)
+def tombstone_moved_consommation(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_reading", None)
+    if not raw and previous is not None and previous[0] != instance.user_id:
+        record_deletions(CONSOMMATIONS, [(previous[0], instance.pk)])
+
+
+def _owner_deleted(origin):
+    # Rows cascading from a user delete need no tombstone (nor could keep one).
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is User
+
+
+@receiver(post_delete, sender=Consommation)
+def tombstone_deleted_consommation(sender, instance, origin=None, **kwargs):
+    if not _owner_deleted(origin):
+        record_deletions(CONSOMMATIONS, [(instance.user_id, instance.pk)])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_catalogue(sender, instance, **kwargs):
+    invalidate_categories()
+
+
+@receiver(pre_delete, sender=Category)
+def restamp_category_notifications(sender, instance, **kwargs):
+    # The SET_NULL that follows is a plain UPDATE without signals: clear the
+    # category here with each owner's next revision so /sync/ and the list
+    # ETags see the change.
+    notifications = Notification.objects.filter(category=instance)
+    user_ids = set(notifications.values_list("user_id", flat=True))
+    if not user_ids:
+        return
+    next_revisions(NOTIFICATIONS, user_ids)
+    owner_key = Concat(
+        Value(f"{NOTIFICATIONS}:"), Cast(OuterRef("user_id"), CharField())
+    )
+    notifications.update(
+        category=None,
+        revision=Subquery(
+            DataVersion.objects.filter(key=owner_key).values("version")[:1]
+        ),
+    )
+
+
+@receiver(pre_save, sender=Alert)
+def remember_previous_alert_scope(sender, instance, raw=False, **kwargs):
+    instance._previous_scope = None
+    if not instance._state.adding:
+        instance._previous_scope = (
+            Alert.objects.filter(pk=instance.pk)
+            .values_list("user_id", "category_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Alert)
+def invalidate_limits_on_alert_save(sender, instance, **kwargs):
+    invalidate_alert_limits(instance.user_id, instance.category_id)
+    previous = getattr(instance, "_previous_scope", None)
+    if previous is not None and previous != (instance.user_id, instance.category_id):
+        invalidate_alert_limits(*previous)
+    if previous is not None and previous[0] != instance.user_id:
+        record_deletions(ALERTS, [(previous[0], instance.pk)])
+
+
+@receiver(pre_delete, sender=Alert)
+def remember_alert_notification(sender, instance, **kwargs):
+    # The cascade deletes the notification without signals (see below).
+    instance._notification_ids = list(
+        Notification.objects.filter(alert_id=instance.pk).values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Alert)
+def invalidate_limits_on_alert_delete(sender, instance, origin=None, **kwargs):
+    invalidate_alert_limits(instance.user_id, instance.category_id)
+    # Deleting an alert cascades to its notification.
+    invalidate_unread_count(instance.user_id)
+    if _owner_deleted(origin):
+        return
+    record_deletions(ALERTS, [(instance.user_id, instance.pk)])
+    record_deletions(
+        NOTIFICATIONS,
+        [
+            (instance.user_id, notification_id)
+            for notification_id in getattr(instance, "_notification_ids", [])
+        ],
+    )
+
+
+# No delete receivers on Notification: they would turn every queryset delete
+# (e.g. bulk-delete) into a fetch plus per-row signals instead of one DELETE.
+# Deleting code paths invalidate the unread counter and record tombstones
+# explicitly.
+@receiver(post_save, sender=Notification)
+def invalidate_unread_count_on_save(sender, instance, **kwargs):
+    invalidate_unread_count(instance.user_id)
+
+
+@receiver(post_save, sender=Notification)
+def publish_created_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_new_notifications([(instance.user_id, instance.alert_id, instance.type)])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,138 @@
+"""
+Descriptive statistics of consommation values per category: count, sum,
+min, max, mean, sample standard deviation and percentiles.
+
+On PostgreSQL everything is computed in one grouped query, percentiles with
+`percentile_cont(...) WITHIN GROUP` (one sort per category for all of
+them). Other engines fetch the (category, value) pairs once and compute the
+same figures with NumPy; np.percentile's default linear interpolation is
+what percentile_cont does.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Min, StdDev, Sum
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 95.0)
+MAX_PERCENTILES = 20
+
+
+class PercentilesCont(Aggregate):
+    """percentile_cont over several fractions at once (PostgreSQL only)."""
+
+    def __init__(self, expression, fractions, **extra):
+        # Imported here: contrib.postgres is not needed on other engines.
+        from django.contrib.postgres.fields import ArrayField
+
+        self.fractions = list(fractions)
+        super().__init__(expression, output_field=ArrayField(FloatField()), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return (
+            f"percentile_cont(%s::double precision[]) WITHIN GROUP (ORDER BY {sql})",
+            [self.fractions, *params],
+        )
+
+
+def percentile_label(percentile):
+    return f"{percentile:g}"
+
+
+def _cents(value):
+    if value is None:
+        return None
+    return str(Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def _result(category_id, count, total, minimum, maximum, mean, stddev, values, percentiles):
+    return {
+        "category": category_id,
+        "count": count,
+        "sum": _cents(total),
+        "min": _cents(minimum),
+        "max": _cents(maximum),
+        "mean": _cents(mean),
+        "stddev": _cents(stddev),
+        "percentiles": {
+            percentile_label(percentile): _cents(value)
+            for percentile, value in zip(percentiles, values)
+        },
+    }
+
+
+def _database_stats(queryset, field, percentiles):
+    rows = (
+        queryset.values("category_id")
+        .annotate(
+            stat_count=Count(field),
+            stat_sum=Sum(field),
+            stat_min=Min(field),
+            stat_max=Max(field),
+            stat_mean=Avg(field),
+            stat_stddev=StdDev(field, sample=True),
+            stat_percentiles=PercentilesCont(
+                field, [percentile / 100 for percentile in percentiles]
+            ),
+        )
+        .order_by("category_id")
+    )
+    return [
+        _result(
+            row["category_id"],
+            row["stat_count"],
+            row["stat_sum"],
+            row["stat_min"],
+            row["stat_max"],
+            row["stat_mean"],
+            row["stat_stddev"],
+            row["stat_percentiles"],
+            percentiles,
+        )
+        for row in rows
+    ]
+
+
+def _numpy_stats(queryset, field, percentiles):
+    rows = list(queryset.order_by("category_id").values_list("category_id", field))
+    if not rows:
+        return []
+    category_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    # Values carry two decimals: sum whole cents so totals stay exact.
+    cents = np.rint(values * 100).astype(np.int64)
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(category_ids)) + 1))
+    ends = np.append(starts[1:], len(rows))
+    results = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        group = values[start:end]
+        count = end - start
+        total = Decimal(int(cents[start:end].sum())) / 100
+        results.append(
+            _result(
+                int(category_ids[start]),
+                count,
+                total,
+                group.min(),
+                group.max(),
+                total / count,
+                group.std(ddof=1) if count > 1 else None,
+                np.percentile(group, percentiles).tolist(),
+                percentiles,
+            )
+        )
+    return results
+
+
+def consommation_stats(queryset, field, percentiles=DEFAULT_PERCENTILES):
+    """
+    Per-category statistics of `field` over the queryset rows (consommations
+    or daily rollups), ordered by category id. Values are strings rounded to
+    cents; stddev is None for a single value.
+    """
+    if connection.vendor == "postgresql":
+        return _database_stats(queryset, field, percentiles)
+    return _numpy_stats(queryset, field, percentiles)
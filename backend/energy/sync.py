@@ -0,0 +1,199 @@
+"""
+Delta sync: rows of a user's consommations, alerts and notifications
+written or deleted since a client's token.
+
+Rows carry the revision of their last write (RevisionedModel), deletes
+leave a SyncTombstone with the revision of the delete. A token is the
+issue time plus the user's counter of each resource when it was issued;
+tokens older than the tombstone retention get a full resync ("reset").
+
+A reset sends the consommations one keyset page at a time: the payload
+carries a `next` cursor that the client passes back (cursor=...) until it
+is null. The token is taken before the first page, so rows written while
+the client pages are sent again by the next delta.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from .models import Alert, Consommation, DataVersion, Notification, SyncTombstone
+from .pagination import ConsommationKeysetPagination
+from .serializers import (
+    AlertSerializer,
+    ConsommationReadMapper,
+    NotificationSerializer,
+)
+from .versions import (
+    ALERTS,
+    CONSOMMATIONS,
+    NOTIFICATIONS,
+    current_version,
+    next_revisions,
+)
+
+SYNC_RESOURCES = (CONSOMMATIONS, ALERTS, NOTIFICATIONS)
+# DataVersion key holding the time (epoch seconds) before which every token
+# gets a full resync, for removals that leave no tombstones.
+SYNC_FLOOR = "sync-floor"
+
+read_mapper = ConsommationReadMapper()
+
+
+def record_deletions(resource, deleted):
+    """
+    Tombstone deleted rows, `deleted` being (user_id, object_id) pairs. Bumps
+    the owners' counters, so call it in the deleting transaction.
+    """
+    deleted = list(deleted)
+    if not deleted:
+        return
+    revisions = next_revisions(resource, [user_id for user_id, _ in deleted])
+    SyncTombstone.objects.bulk_create(
+        [
+            SyncTombstone(
+                user_id=user_id,
+                resource=resource,
+                object_id=object_id,
+                revision=revisions[user_id],
+            )
+            for user_id, object_id in deleted
+        ]
+    )
+
+
+def raise_sync_floor():
+    """
+    Force a full resync of every client holding a token issued until now,
+    e.g. after detaching partitions (too many rows to tombstone one by one).
+    """
+    DataVersion.objects.update_or_create(
+        key=SYNC_FLOOR, defaults={"version": int(time.time())}
+    )
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention; returns how many were removed."""
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
+
+
+def make_token(issued_at, revisions):
+    return ".".join(
+        [str(issued_at), *(str(revisions[resource]) for resource in SYNC_RESOURCES)]
+    )
+
+
+def parse_token(token):
+    """(issued_at, {resource: revision}) of a token from make_token."""
+    try:
+        issued_at, *revisions = (int(part) for part in token.split("."))
+    except ValueError:
+        raise ValidationError({"since": "Invalid sync token."}) from None
+    if len(revisions) != len(SYNC_RESOURCES) or min(issued_at, *revisions) < 0:
+        raise ValidationError({"since": "Invalid sync token."})
+    return issued_at, dict(zip(SYNC_RESOURCES, revisions))
+
+
+def parse_resources(value):
+    if not value:
+        return SYNC_RESOURCES
+    resources = [resource.strip() for resource in value.split(",")]
+    unknown = sorted(set(resources) - set(SYNC_RESOURCES))
+    if unknown:
+        raise ValidationError(
+            {"resources": f"Unknown resource(s): {', '.join(unknown)}."}
+        )
+    return tuple(resource for resource in SYNC_RESOURCES if resource in resources)
+
+
+def consommation_page(user_id, cursor=None, page_size=None):
+    """
+    One page of a full resync: {"changed", "deleted", "next"} with the
+    user's consommations after `cursor` in (date, id) order and the cursor
+    of the following page (None on the last one).
+    """
+    paginator = ConsommationKeysetPagination()
+    rows = Consommation.objects.filter(user_id=user_id).values(
+        *ConsommationReadMapper.columns
+    )
+    try:
+        page = paginator.page(rows, cursor, page_size)
+    except NotFound:
+        raise ValidationError({"cursor": "Invalid cursor."}) from None
+    return {
+        "changed": read_mapper.map(page),
+        "deleted": [],
+        "next": paginator.next_cursor,
+    }
+
+
+def _changed_rows(resource, user_id, since):
+    # since=None: every row, including those written before revisions existed.
+    revision = {} if since is None else {"revision__gt": since}
+    if resource == CONSOMMATIONS:
+        rows = (
+            Consommation.objects.filter(user_id=user_id, **revision)
+            .order_by("date_consommation", "id")
+            .values(*ConsommationReadMapper.columns)
+        )
+        return read_mapper.map(rows)
+    if resource == ALERTS:
+        alerts = Alert.objects.filter(user_id=user_id, **revision).order_by("id")
+        return AlertSerializer(alerts, many=True).data
+    notifications = Notification.objects.filter(user_id=user_id, **revision)
+    return NotificationSerializer(notifications.order_by("id"), many=True).data
+
+
+def changes_since(user_id, token=None, resources=SYNC_RESOURCES, page_size=None):
+    """
+    Payload of GET /sync/: per resource the rows written ("changed") and the
+    ids deleted ("deleted") since `token`, plus the token to send next time.
+    Without a token, or with one older than the tombstone retention or the
+    sync floor, every row is returned and "reset" tells the client to drop
+    its copy first; consommations then come as a first page plus a "next"
+    cursor (see consommation_page).
+    """
+    now = int(time.time())
+    since = dict.fromkeys(SYNC_RESOURCES, 0)
+    reset = token is None
+    if token is not None:
+        issued_at, since = parse_token(token)
+        retention = settings.SYNC_TOMBSTONE_RETENTION_DAYS * 86400
+        if (
+            issued_at > now
+            or now - issued_at > retention
+            or issued_at <= current_version(SYNC_FLOOR)
+        ):
+            reset = True
+            since = dict.fromkeys(SYNC_RESOURCES, 0)
+
+    # Counters first: rows committed meanwhile come back again next time,
+    # which the client applies idempotently, but none can be skipped.
+    revisions = dict(since)
+    payload = {}
+    for resource in resources:
+        revisions[resource] = current_version(resource, user_id)
+        if reset and resource == CONSOMMATIONS:
+            payload[resource] = consommation_page(user_id, page_size=page_size)
+            continue
+        deleted = []
+        if not reset:
+            deleted = list(
+                SyncTombstone.objects.filter(
+                    user_id=user_id, resource=resource, revision__gt=since[resource]
+                )
+                .order_by("revision")
+                .values_list("object_id", flat=True)
+            )
+        payload[resource] = {
+            "changed": _changed_rows(
+                resource, user_id, None if reset else since[resource]
+            ),
+            "deleted": deleted,
+        }
+    return {"token": make_token(now, revisions), "reset": reset, **payload}
@@ -1,8 +1,77 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from importlib import import_module
+from io import StringIO
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
 from django.utils import timezone
 from decimal import Decimal
 
-from .models import Category, Consommation, User
+from .models import (
+    Alert,
+    AnomalyBaseline,
+    Category,
+    Consommation,
+    DailyConsumptionRollup,
+    DataVersion,
+    MonthlyConsumptionRollup,
+    Notification,
+    SyncTombstone,
+    User,
+)
+from .async_views import (
+    consommation_aggregate,
+    consommation_collection,
+    notification_collection,
+)
+from . import alerts as alerts_module
+from . import authentication as authentication_module
+from . import categories as categories_module
+from . import notifications as notifications_module
+from . import passwords as passwords_module
+from .alerts import active_limits, notify_breached_alerts, notify_reading
+from .anomalies import detect_anomalies
+from .authentication import get_cached_user
+from .categories import VERSION_KEY, catalogue
+from .events import get_broker, notification_channel
+from .loading import load_consommations
+from .notifications import unread_count
+from .partitions import (
+    DEFAULT_PARTITION,
+    detach_partitions,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    partition_name,
+    partition_table,
+    unpartition_table,
+)
+from .passwords import HashQueueFull, PasswordHashPool, get_hash_pool
+from .rollups import rebuild_rollups
+from .serializers import ConsommationSerializer
+from .sync import SYNC_FLOOR, make_token, parse_token, raise_sync_floor
+
+# Async views mounted next to the DRF routes so tests can compare payloads.
+urlpatterns = [
+    path("async/consommations/", consommation_collection),
+    path("async/consommations/aggregate/", consommation_aggregate),
+    path("async/notifications/", notification_collection),
+    path("", include("config.urls")),
+]
 
 
 class UserModelTests(TestCase):
@@ -55,3 +124,2114 @@ class ConsommationModelTests(TestCase):
         )
 
         self.assertEqual(consommation.total_price, Decimal("2.00"))
+
+
+class ConsommationAggregateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="aggregate@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Electricite", unit="kWh")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+        for day, value in ((1, "10.00"), (1, "5.00"), (2, "3.00"), (40, "7.00")):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=Decimal(value),
+                unit_price=Decimal("0.1250"),
+                date_consommation=datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc)
+                + timedelta(days=day - 1),
+            )
+
+    def test_aggregate_by_day(self):
+        response = self.client.get(
+            "/api/v1/consommations/aggregate/",
+            {"bucket": "day", "date_to": "2026-01-31"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "period": "2026-01-01",
+                    "category": self.category.id,
+                    "value": "15.00",
+                    "total_price": "1.88",
+                },
+                {
+                    "period": "2026-01-02",
+                    "category": self.category.id,
+                    "value": "3.00",
+                    "total_price": "0.38",
+                },
+            ],
+        )
+
+    def test_aggregate_by_month(self):
+        response = self.client.get(
+            "/api/v1/consommations/aggregate/", {"bucket": "month"}
+        )
+
+        periods = [row["period"] for row in response.json()["results"]]
+        self.assertEqual(periods, ["2026-01-01", "2026-02-01"])
+
+    def test_aggregate_rejects_unknown_bucket(self):
+        response = self.client.get(
+            "/api/v1/consommations/aggregate/", {"bucket": "hour"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ConsommationPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="pages@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+        same_day = datetime(2026, 3, 1, tzinfo=dt_timezone.utc)
+        for _ in range(5):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=Decimal("1.00"),
+                unit_price=Decimal("0.1000"),
+                date_consommation=same_day,
+            )
+
+    def test_list_is_unpaginated_by_default(self):
+        response = self.client.get("/api/v1/consommations/")
+
+        self.assertEqual(len(response.json()), 5)
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        params = {"page_size": 2}
+        while True:
+            body = self.client.get("/api/v1/consommations/", params).json()
+            seen.extend(row["id"] for row in body["results"])
+            if not body["next_cursor"]:
+                break
+            params = {"page_size": 2, "cursor": body["next_cursor"]}
+
+        expected = list(
+            Consommation.objects.order_by("date_consommation", "id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get("/api/v1/consommations/", {"cursor": "nope"})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ConsommationDateFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="dates@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Eau", unit="L")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+        for minute_offset in (-1, 0, 23 * 60 + 59, 24 * 60):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=Decimal("1.00"),
+                unit_price=Decimal("0.0020"),
+                date_consommation=datetime(2026, 4, 10, tzinfo=dt_timezone.utc)
+                + timedelta(minutes=minute_offset),
+            )
+
+    def test_date_range_is_inclusive_of_whole_days(self):
+        response = self.client.get(
+            "/api/v1/consommations/",
+            {"date_from": "2026-04-10", "date_to": "2026-04-10"},
+        )
+
+        self.assertEqual(len(response.json()), 2)
+
+    def test_invalid_date_returns_400(self):
+        response = self.client.get(
+            "/api/v1/consommations/", {"date_from": "2026-02-30"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(connection.vendor == "postgresql", "Query plans are PostgreSQL-specific.")
+    def test_date_range_uses_composite_index(self):
+        queryset = Consommation.objects.filter(
+            user=self.user,
+            category=self.category,
+            date_consommation__gte=datetime(2026, 4, 10, tzinfo=dt_timezone.utc),
+            date_consommation__lt=datetime(2026, 4, 11, tzinfo=dt_timezone.utc),
+        )
+
+        with connection.cursor() as cursor:
+            # The test table is tiny; force the planner to consider indexes.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"ANALYZE {Consommation._meta.db_table}")
+            plan = queryset.explain()
+
+        # Partitions name their copy of the index after the columns.
+        self.assertRegex(
+            plan, "conso_user_cat_date_idx|user_id_category_id_date_consom_idx"
+        )
+
+
+class ConsumptionRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="rollups@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Electricite", unit="kWh")
+
+    def snapshot(self):
+        return {
+            model.__name__: sorted(
+                model.objects.values_list(
+                    "user_id", "category_id", period, "total_value", "total_cost", "count"
+                )
+            )
+            for model, period in (
+                (DailyConsumptionRollup, "day"),
+                (MonthlyConsumptionRollup, "month"),
+            )
+        }
+
+    def test_incremental_rollups_match_rebuild(self):
+        first = Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal("10.00"),
+            unit_price=Decimal("0.2000"),
+            date_consommation=datetime(2026, 5, 1, 8, tzinfo=dt_timezone.utc),
+        )
+        second = Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal("4.00"),
+            unit_price=Decimal("0.2000"),
+            date_consommation=datetime(2026, 5, 1, 20, tzinfo=dt_timezone.utc),
+        )
+        moved = Consommation.objects.get(pk=second.pk)
+        moved.value = Decimal("6.00")
+        moved.date_consommation = datetime(2026, 6, 2, tzinfo=dt_timezone.utc)
+        moved.save()
+        Consommation.objects.get(pk=first.pk).delete()
+
+        incremental = self.snapshot()
+        rebuild_rollups()
+
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(
+            incremental["DailyConsumptionRollup"],
+            [
+                (
+                    self.user.id,
+                    self.category.id,
+                    date(2026, 6, 2),
+                    Decimal("6.00"),
+                    Decimal("1.200000"),
+                    1,
+                )
+            ],
+        )
+
+    def test_migration_backfills_existing_history(self):
+        for day, value in ((1, "10.00"), (1, "4.00"), (20, "6.00")):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=Decimal(value),
+                unit_price=Decimal("0.2000"),
+                date_consommation=datetime(2026, 5, day, 12, tzinfo=dt_timezone.utc),
+            )
+        expected = self.snapshot()
+        DailyConsumptionRollup.objects.all().delete()
+        MonthlyConsumptionRollup.objects.all().delete()
+        migration = import_module("energy.migrations.0006_consumption_rollups")
+
+        migration.backfill_rollups(django_apps, None)
+
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_generate_consumptions_feeds_rollups(self):
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+        response = self.client.post(
+            "/api/v1/generate-consumptions/",
+            {"count": 3, "user_id": self.user.id, "start_date": "30/05/2026"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(DailyConsumptionRollup.objects.count(), 3)
+        monthly_counts = MonthlyConsumptionRollup.objects.order_by("month").values_list(
+            "count", flat=True
+        )
+        self.assertEqual(list(monthly_counts), [2, 1])
+
+
+class ConsommationBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="bulk@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("50.00"),
+            status="active",
+            message="Gaz eleve",
+        )
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def test_json_array_reports_invalid_rows(self):
+        rows = [
+            {
+                "category": self.category.id,
+                "value": "12.50",
+                "unit_price": "0.0800",
+                "date_consommation": "2026-02-01T00:00:00Z",
+            },
+            {
+                "category": 9999,
+                "value": "abc",
+                "unit_price": "0.0800",
+                "date_consommation": "2026-02-02T00:00:00Z",
+            },
+        ]
+
+        response = self.client.post(
+            "/api/v1/consommations/bulk/", rows, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body["created"], 1)
+        self.assertEqual(body["errors"][0]["row"], 2)
+        self.assertEqual(set(body["errors"][0]["errors"]), {"category", "value"})
+        self.assertEqual(Consommation.objects.filter(user=self.user).count(), 1)
+
+    def test_csv_upload_inserts_rows_and_triggers_alerts(self):
+        body = (
+            "category,value,unit_price,date_consommation\n"
+            f"{self.category.id},10.00,0.0800,2026-02-01T00:00:00Z\n"
+            f"{self.category.id},75.00,0.0800,2026-02-02T00:00:00Z\n"
+        )
+
+        with self.settings(CONSOMMATION_BULK_CHUNK_SIZE=1):
+            response = self.client.post(
+                "/api/v1/consommations/bulk/", body, content_type="text/csv"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"created": 2, "errors": []})
+        self.assertTrue(Notification.objects.filter(alert=self.alert).exists())
+        self.assertEqual(DailyConsumptionRollup.objects.filter(user=self.user).count(), 2)
+
+    def test_rejects_non_array_json(self):
+        response = self.client.post(
+            "/api/v1/consommations/bulk/", {"value": 1}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class AlertEvaluationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="alerts@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.gaz = Category.objects.create(name="Gaz", unit="m3")
+        self.eau = Category.objects.create(name="Eau", unit="L")
+
+    def make_alert(self, category, limit, status="active"):
+        return Alert.objects.create(
+            user=self.user,
+            category=category,
+            limit=Decimal(limit),
+            status=status,
+            message=f"{category.name} > {limit}",
+        )
+
+    def make_reading(self, category, value):
+        return Consommation.objects.create(
+            user=self.user,
+            category=category,
+            value=Decimal(value),
+            unit_price=Decimal("0.1000"),
+            date_consommation=timezone.now(),
+        )
+
+    def test_only_matching_active_alerts_are_notified(self):
+        breached = self.make_alert(self.gaz, "30.00", status=" Active ")
+        self.make_alert(self.gaz, "80.00")
+        self.make_alert(self.eau, "10.00")
+        self.make_alert(self.gaz, "5.00", status="inactive")
+        readings = [
+            self.make_reading(self.gaz, "40.00"),
+            self.make_reading(self.eau, "2.00"),
+        ]
+
+        # Breached alerts, already-notified alerts, then in one savepoint the
+        # revision (the user's first: UPDATE, INSERT, UPDATE, SELECT) and one
+        # bulk insert.
+        with self.assertNumQueries(9):
+            count = notify_breached_alerts([reading.pk for reading in readings])
+
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            list(Notification.objects.values_list("alert_id", flat=True)), [breached.id]
+        )
+
+    def test_existing_notifications_are_not_duplicated(self):
+        self.make_alert(self.gaz, "30.00")
+        reading = self.make_reading(self.gaz, "40.00")
+
+        notify_breached_alerts([reading.pk])
+        notify_breached_alerts(Consommation.objects.values("id"))
+
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+class EvaluateAlertsCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="evaluate@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("30.00"),
+            status="active",
+            message="Gaz > 30",
+        )
+
+    def reading(self, when):
+        Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal("40.00"),
+            unit_price=Decimal("0.1000"),
+            date_consommation=timezone.make_aware(when),
+        )
+
+    def evaluate(self, *args):
+        with CaptureQueriesContext(connection) as queries:
+            call_command("evaluate_alerts", *args, stdout=StringIO())
+        return " ".join(query["sql"] for query in queries)
+
+    def test_window_is_a_plain_timestamp_range(self):
+        self.reading(datetime(2026, 3, 10, 23, 30))
+
+        before = self.evaluate("--date-from", "2026-03-01", "--date-to", "2026-03-09")
+        self.assertFalse(Notification.objects.exists())
+        self.evaluate("--date-from", "2026-03-10", "--date-to", "2026-03-10")
+
+        self.assertTrue(Notification.objects.filter(alert=self.alert).exists())
+        # No per-row date cast: the (user, ..., date_consommation) indexes apply.
+        self.assertNotIn("::date", before)
+        self.assertNotIn("django_datetime_cast_date", before)
+
+    def test_invalid_dates_are_rejected(self):
+        for value in ("10/03/2026", "2026-02-30"):
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                call_command("evaluate_alerts", "--date-from", value, stdout=StringIO())
+
+
+class AlertLimitsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="cache@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("30.00"),
+            status="active",
+            message="Gaz > 30",
+        )
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def reading(self, value):
+        return Consommation(
+            user=self.user,
+            category=self.category,
+            value=Decimal(value),
+            unit_price=Decimal("0.1000"),
+            date_consommation=timezone.now(),
+        )
+
+    def test_cached_limits_skip_the_database(self):
+        active_limits(self.user.id, self.category.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(notify_reading(self.reading("10.00")), 0)
+
+    def test_alert_changes_invalidate_the_cache(self):
+        self.assertEqual(notify_reading(self.reading("40.00")), 1)
+
+        self.alert.limit = Decimal("50.00")
+        self.alert.save()
+
+        self.assertEqual(notify_reading(self.reading("40.00")), 0)
+
+        self.alert.delete()
+        self.assertEqual(active_limits(self.user.id, self.category.id), ([], []))
+
+    def test_api_create_notifies_breached_alert(self):
+        response = self.client.post(
+            "/api/v1/consommations/",
+            {
+                "category": self.category.id,
+                "value": "45.00",
+                "unit_price": "0.1000",
+                "date_consommation": "2026-02-01T00:00:00Z",
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Notification.objects.filter(alert=self.alert).exists())
+
+
+class ConsommationExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="export@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Electricite", unit="kWh")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        self.consommation = Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal("15.00"),
+            unit_price=Decimal("0.1250"),
+            date_consommation=datetime(2026, 1, 5, tzinfo=dt_timezone.utc),
+        )
+
+    def test_csv_export_streams_rows_with_total_price(self):
+        response = self.client.get("/api/v1/consommations/export/")
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines,
+            [
+                "id,category,value,unit_price,date_consommation,total_price",
+                f"{self.consommation.id},{self.category.id},15.00,0.1250,"
+                "2026-01-05T00:00:00Z,1.88",
+            ],
+        )
+
+    def test_ndjson_export(self):
+        response = self.client.get(
+            "/api/v1/consommations/export/", {"file_format": "ndjson"}
+        )
+
+        record = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(record["total_price"], "1.88")
+        self.assertEqual(record["category"], self.category.id)
+
+    @override_settings(CONSOMMATION_EXPORT_CHUNK_SIZE=1)
+    async def test_export_streams_asynchronously_under_asgi(self):
+        self.async_client.cookies = self.client.cookies
+        await Consommation.objects.acreate(
+            user=self.user,
+            category=self.category,
+            value=Decimal("2.00"),
+            unit_price=Decimal("0.5000"),
+            date_consommation=datetime(2026, 1, 6, tzinfo=dt_timezone.utc),
+        )
+
+        response = await self.async_client.get("/api/v1/consommations/export/")
+
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(lines.decode().splitlines()), 3)
+
+    def test_export_stays_synchronous_under_wsgi(self):
+        response = self.client.get("/api/v1/consommations/export/")
+
+        self.assertFalse(response.is_async)
+
+
+class ConsommationTotalPriceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="price@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        for value, unit_price in (("15.00", "0.1250"), ("3.00", "0.1250")):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=Decimal(value),
+                unit_price=Decimal(unit_price),
+                date_consommation=timezone.now(),
+            )
+
+    def test_total_price_is_queryable_in_sql(self):
+        queryset = Consommation.objects.filter(user=self.user)
+
+        self.assertEqual(
+            list(
+                queryset.order_by("-total_price").values_list("total_price", flat=True)
+            ),
+            [Decimal("1.88"), Decimal("0.38")],
+        )
+        self.assertEqual(
+            queryset.aggregate(total=Sum("total_price"))["total"], Decimal("2.26")
+        )
+        self.assertEqual(queryset.filter(total_price__gte=Decimal("1")).count(), 1)
+
+    def test_serializer_exposes_read_only_total_price(self):
+        consommation = Consommation.objects.filter(user=self.user).first()
+        data = ConsommationSerializer(consommation).data
+
+        self.assertEqual(data["total_price"], "1.88")
+        self.assertTrue(ConsommationSerializer().fields["total_price"].read_only)
+
+
+class ConsommationReadMapperTests(TestCase):
+    def test_fast_list_matches_model_serializer(self):
+        user = User.objects.create(
+            email="mapper@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        category = Category.objects.create(name="Eau", unit="L")
+        Consommation.objects.create(
+            user=user,
+            category=category,
+            value=Decimal("150"),
+            unit_price=Decimal("0.003"),
+            date_consommation=datetime(2026, 2, 1, 6, 30, tzinfo=dt_timezone.utc),
+        )
+        session = self.client.session
+        session["user_id"] = user.id
+        session.save()
+
+        response = self.client.get("/api/v1/consommations/")
+
+        expected = ConsommationSerializer(Consommation.objects.all(), many=True).data
+        self.assertEqual(response.json(), json.loads(json.dumps(expected)))
+
+
+class NotificationUnreadCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="unread@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def make_alert(self, limit):
+        return Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal(limit),
+            status="active",
+            message=f"Gaz > {limit}",
+        )
+
+    def test_count_is_cached_and_kept_current(self):
+        first = Notification.objects.create(user=self.user, alert=self.make_alert("10"))
+        response = self.client.get("/api/v1/notifications/unread-count/")
+        self.assertEqual(response.json(), {"unread": 1, "stream": False})
+
+        with self.assertNumQueries(1):  # session only, the count is cached
+            self.client.get("/api/v1/notifications/unread-count/")
+
+        self.make_alert("20")
+        reading = Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal("25"),
+            unit_price=Decimal("0.1000"),
+            date_consommation=timezone.now(),
+        )
+        notify_breached_alerts([reading.pk])
+        self.assertEqual(unread_count(self.user.id), 2)
+
+        first.read = True
+        first.save()
+        self.assertEqual(unread_count(self.user.id), 1)
+
+
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="stream@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        self.async_client.cookies = self.client.cookies
+
+    async def test_stream_requires_session(self):
+        self.async_client.cookies.clear()
+
+        response = await self.async_client.get("/api/v1/notifications/stream/")
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_pushes_published_events(self):
+        response = await self.async_client.get("/api/v1/notifications/stream/")
+        events = response.streaming_content
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(await anext(events), b"retry: 5000\n\n")
+
+        get_broker().publish(
+            notification_channel(self.user.id),
+            {"event": "notification", "alert": 7, "type": "alert"},
+        )
+
+        self.assertEqual(
+            await anext(events),
+            b'event: notification\ndata: {"event": "notification", "alert": 7, '
+            b'"type": "alert"}\n\n',
+        )
+        await events.aclose()
+
+    def test_stream_is_refused_outside_asgi(self):
+        response = self.client.get("/api/v1/notifications/stream/")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    async def test_unread_count_advertises_the_stream_under_asgi(self):
+        response = await self.async_client.get("/api/v1/notifications/unread-count/")
+
+        self.assertIs(response.json()["stream"], True)
+
+    def test_new_notifications_are_published_after_commit(self):
+        category = Category.objects.create(name="Gaz", unit="m3")
+        alert = Alert.objects.create(
+            user=self.user,
+            category=category,
+            limit=Decimal("10"),
+            status="active",
+            message="Gaz > 10",
+        )
+
+        with patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.create(user=self.user, alert=alert)
+
+        publish.assert_called_once_with(
+            notification_channel(self.user.id),
+            {"event": "notification", "alert": alert.id, "type": "alert"},
+        )
+
+
+class NotificationBulkActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="bulknotif@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.other = User.objects.create(
+            email="other@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        category = Category.objects.create(name="Gaz", unit="m3")
+        self.notifications = []
+        owners = ((self.user, 1), (self.user, 2), (self.user, 3), (self.other, 4))
+        for owner, limit in owners:
+            alert = Alert.objects.create(
+                user=owner,
+                category=category,
+                limit=Decimal(limit),
+                status="active",
+                message=f"Gaz > {limit}",
+            )
+            self.notifications.append(
+                Notification.objects.create(user=owner, alert=alert)
+            )
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def post(self, action, payload):
+        return self.client.post(
+            f"/api/v1/notifications/{action}/", payload, content_type="application/json"
+        )
+
+    def test_mark_all_read_is_scoped_to_session_user(self):
+        self.assertEqual(unread_count(self.user.id), 3)
+
+        response = self.post("mark-read", {"all": True})
+
+        self.assertEqual(response.json(), {"updated": 3})
+        self.assertEqual(unread_count(self.user.id), 0)
+        self.assertEqual(unread_count(self.other.id), 1)
+
+    def test_bulk_delete_by_ids_ignores_other_users(self):
+        ids = [notification.id for notification in self.notifications]
+        get_cached_user(self.user.id)
+
+        # Session, then in one savepoint: ids, one DELETE, revision bump and
+        # read, one tombstone insert.
+        with self.assertNumQueries(8):
+            response = self.post("bulk-delete", {"ids": ids})
+
+        self.assertEqual(response.json(), {"deleted": 3})
+        self.assertEqual(Notification.objects.get().user, self.other)
+
+    def test_bulk_delete_older_than(self):
+        Notification.objects.filter(pk=self.notifications[0].pk).update(
+            created_at=datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        )
+
+        response = self.post("bulk-delete", {"before": "2026-02-01"})
+
+        self.assertEqual(response.json(), {"deleted": 1})
+
+    def test_selection_is_required(self):
+        self.assertEqual(self.post("mark-read", {}).status_code, 400)
+        self.assertEqual(self.post("bulk-delete", {"ids": "1,2"}).status_code, 400)
+
+
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="login@managenergy.local",
+            password=make_password("Password123"),
+            is_active=True,
+            role="user",
+        )
+
+    def login(self, password):
+        return self.client.post(
+            "/api/v1/login/",
+            data=json.dumps({"email": "Login@managenergy.local", "password": password}),
+            content_type="application/json",
+        )
+
+    def test_login_opens_session(self):
+        response = self.login("Password123")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["id"], self.user.id)
+        self.assertEqual(self.client.session["user_id"], self.user.id)
+
+    def test_login_rejects_wrong_password(self):
+        response = self.login("wrong")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn("user_id", self.client.session)
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+    )
+    def test_login_upgrades_outdated_hash(self):
+        self.user.password = make_password("Password123", hasher="md5")
+        self.user.save(update_fields=["password"])
+
+        response = self.login("Password123")
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login("Password123").status_code, 200)
+
+    def test_register_hashes_password(self):
+        response = self.client.post(
+            "/api/v1/register/",
+            data=json.dumps({"email": "new@managenergy.local", "password": "Secret123"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email="new@managenergy.local")
+        self.assertNotEqual(user.password, "Secret123")
+        self.assertTrue(check_password("Secret123", user.password))
+
+    def test_full_hash_queue_returns_503(self):
+        with patch.object(get_hash_pool(), "submit", side_effect=HashQueueFull):
+            response = self.login("Password123")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_wsgi_login_waits_for_the_pool_within_its_bound(self):
+        # The test client goes through the WSGI handler: the request thread
+        # waits for its hash, so a full queue must answer 503 right away.
+        pool = PasswordHashPool(workers=1, max_pending=1)
+        self.addCleanup(pool._executor.shutdown)
+        release = threading.Event()
+        blockers = [pool.submit(release.wait)]
+        while pool.metrics()["running"] < 1:
+            time.sleep(0.001)
+        blockers.append(pool.submit(release.wait))
+
+        with patch.object(passwords_module, "_pool", pool):
+            response = self.login("Password123")
+            self.assertIsInstance(response.wsgi_request, WSGIRequest)
+            self.assertEqual(response.status_code, 503)
+
+            release.set()
+            for blocker in blockers:
+                blocker.result()
+            self.assertEqual(self.login("Password123").status_code, 200)
+
+        metrics = pool.metrics()
+        self.assertEqual(metrics["rejected"], 1)
+        self.assertEqual(metrics["completed"], 3)
+
+    def test_metrics_report_hash_pool(self):
+        self.login("Password123")
+        self.assertEqual(self.client.get("/api/v1/metrics/").status_code, 403)
+
+        self.user.role = "admin"
+        self.user.save(update_fields=["role"])
+        response = self.client.get("/api/v1/metrics/")
+
+        self.assertEqual(response.status_code, 200)
+        metrics = response.json()["password_hashing"]
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertGreaterEqual(metrics["completed"], 1)
+        self.assertIsNotNone(metrics["latency_p99_ms"])
+
+
+@override_settings(ROOT_URLCONF="energy.tests")
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="async@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Electricite", unit="kWh")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("50"),
+            status="active",
+            message="Electricite > 50",
+        )
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+        for day, value in ((1, "10.00"), (2, "60.00"), (3, "7.25")):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=Decimal(value),
+                unit_price=Decimal("0.1250"),
+                date_consommation=datetime(2026, 1, day, 12, tzinfo=dt_timezone.utc),
+            )
+        Notification.objects.create(user=self.user, alert=self.alert)
+
+    def assertSamePayload(self, path, params=None):
+        expected = self.client.get(f"/api/v1/{path}", params)
+        actual = self.client.get(f"/async/{path}", params)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(
+            actual.content.decode().replace("/async/", "/api/v1/"),
+            json.dumps(expected.json()),
+        )
+
+    def test_list_matches_viewset(self):
+        self.assertSamePayload("consommations/")
+        self.assertSamePayload("consommations/", {"date_from": "2026-01-02"})
+        self.assertSamePayload("consommations/", {"page_size": 2})
+
+    def test_aggregate_matches_viewset(self):
+        self.assertSamePayload("consommations/aggregate/", {"bucket": "month"})
+        self.assertSamePayload("consommations/aggregate/", {"bucket": "hour"})
+
+    def test_notifications_match_viewset(self):
+        self.assertSamePayload("notifications/")
+
+    def test_create_updates_rollups_and_alerts(self):
+        response = self.client.post(
+            "/async/consommations/",
+            data=json.dumps(
+                {
+                    "category": self.category.id,
+                    "value": "80.00",
+                    "unit_price": "0.2000",
+                    "date_consommation": "2026-01-05T08:00:00Z",
+                }
+            ),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["user"], self.user.id)
+        self.assertEqual(response.json()["total_price"], "16.00")
+        self.assertEqual(
+            DailyConsumptionRollup.objects.get(
+                user=self.user, day=date(2026, 1, 5)
+            ).total_value,
+            Decimal("80.00"),
+        )
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 1)
+
+    def test_create_rejects_invalid_rows(self):
+        response = self.client.post(
+            "/async/consommations/",
+            data=json.dumps({"category": 999, "value": "x"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category", response.json())
+
+    def test_requires_session(self):
+        self.client.logout()
+
+        response = self.client.get("/async/consommations/")
+
+        self.assertEqual(response.status_code, 403)
+
+
+class SessionUserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="identity@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Eau", unit="m3")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def create_alert(self):
+        return self.client.post(
+            "/api/v1/alerts/",
+            data=json.dumps(
+                {
+                    "category": self.category.id,
+                    "limit": "10",
+                    "status": "active",
+                    "message": "Eau > 10",
+                }
+            ),
+            content_type="application/json",
+        )
+
+    def test_writes_do_not_query_the_user(self):
+        self.create_alert()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create_alert()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["user"], self.user.id)
+        self.assertFalse(
+            any('FROM "energy_user"' in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_user_save_invalidates_cache(self):
+        self.assertEqual(get_cached_user(self.user.id).role, "user")
+
+        self.user.role = "admin"
+        self.user.save(update_fields=["role"])
+
+        self.assertEqual(get_cached_user(self.user.id).role, "admin")
+
+    def test_cached_user_leaves_out_the_password_hash(self):
+        get_cached_user(self.user.id)
+
+        cached = cache.get(f"session-user:{self.user.id}")
+        self.assertEqual(cached.email, self.user.email)
+        self.assertIn("password", cached.get_deferred_fields())
+        self.assertNotIn(self.user.password, repr(cached.__dict__))
+
+    def test_deleted_user_is_anonymous(self):
+        self.create_alert()
+        self.user.delete()
+
+        self.assertEqual(self.client.get("/api/v1/alerts/").status_code, 403)
+
+
+class SessionModeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="sessions@managenergy.local",
+            password=make_password("Password123"),
+            is_active=True,
+            role="user",
+        )
+
+    def login(self):
+        response = self.client.post(
+            "/api/v1/login/",
+            data=json.dumps(
+                {"email": "sessions@managenergy.local", "password": "Password123"}
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_cached_db_sessions_skip_the_session_table(self):
+        self.login()
+        self.client.get("/api/v1/alerts/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/alerts/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any('"django_session"' in query["sql"] for query in queries.captured_queries)
+        )
+
+    @override_settings(
+        SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies"
+    )
+    def test_logout_revokes_signed_cookie(self):
+        self.login()
+        stolen = self.client.cookies["sessionid"].value
+        self.assertEqual(self.client.get("/api/v1/alerts/").status_code, 200)
+
+        self.client.post("/api/v1/logout/")
+        self.client.cookies["sessionid"] = stolen
+
+        self.assertEqual(self.client.get("/api/v1/alerts/").status_code, 403)
+        self.assertEqual(self.client.post("/api/v1/logout/").status_code, 401)
+
+
+class SeedConsumptionsCommandTests(TestCase):
+    def setUp(self):
+        self.gas = Category.objects.create(name="Gaz", unit="m3")
+        self.water = Category.objects.create(name="Eau", unit="L")
+
+    def seed(self, **options):
+        call_command(
+            "seed_consumptions", users=2, days=120, seed=5, stdout=StringIO(), **options
+        )
+        return list(
+            Consommation.objects.order_by(
+                "user_id", "category_id", "date_consommation"
+            ).values_list("user_id", "category_id", "value", "unit_price")
+        )
+
+    def test_seeds_every_user_category_and_day(self):
+        rows = self.seed(chunk_size=100)
+
+        self.assertEqual(len(rows), 2 * 2 * 120)
+        self.assertEqual(User.objects.filter(email__startswith="seed-").count(), 2)
+        gas_values = [row[2] for row in rows if row[1] == self.gas.id]
+        water_prices = [row[3] for row in rows if row[1] == self.water.id]
+        self.assertTrue(all(25 <= value <= 50 for value in gas_values[:90]))
+        self.assertTrue(all(5 <= value <= 25 for value in gas_values[90:120]))
+        self.assertTrue(
+            all(Decimal("0.001") <= price <= Decimal("0.005") for price in water_prices)
+        )
+        rollup_total = DailyConsumptionRollup.objects.aggregate(
+            total=Sum("total_value")
+        )["total"]
+        self.assertEqual(
+            rollup_total.quantize(Decimal("0.01")), sum(row[2] for row in rows)
+        )
+
+    def test_same_seed_gives_same_data(self):
+        first = self.seed()
+        Consommation.objects.all().delete()
+
+        self.assertEqual(self.seed(chunk_size=7), first)
+
+
+class ConsommationLoaderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="loader@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Electricite", unit="kWh")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("20"),
+            status="active",
+            message="Electricite > 20",
+        )
+        start = datetime(2026, 3, 1, 8, tzinfo=dt_timezone.utc)
+        self.readings = [
+            (
+                self.user.id,
+                self.category.id,
+                start + timedelta(hours=index * 12),
+                Decimal(value),
+                Decimal("0.2000"),
+            )
+            for index, value in enumerate(("4.50", "12.25", "21.00", "7.75"))
+        ]
+
+    def assertLoaded(self, use_copy):
+        loaded = load_consommations(self.readings, chunk_size=3, use_copy=use_copy)
+
+        self.assertEqual(loaded, 4)
+        self.assertEqual(
+            list(
+                Consommation.objects.order_by("date_consommation").values_list(
+                    "value", "total_price"
+                )
+            ),
+            [
+                (Decimal("4.50"), Decimal("0.90")),
+                (Decimal("12.25"), Decimal("2.45")),
+                (Decimal("21.00"), Decimal("4.20")),
+                (Decimal("7.75"), Decimal("1.55")),
+            ],
+        )
+        self.assertEqual(
+            list(
+                DailyConsumptionRollup.objects.order_by("day").values_list(
+                    "day", "total_value", "count"
+                )
+            ),
+            [
+                (date(2026, 3, 1), Decimal("16.75"), 2),
+                (date(2026, 3, 2), Decimal("28.75"), 2),
+            ],
+        )
+        self.assertTrue(Notification.objects.filter(alert=self.alert).exists())
+
+    def test_bulk_create_path(self):
+        self.assertLoaded(use_copy=False)
+
+    @skipUnless(connection.vendor == "postgresql", "COPY is PostgreSQL-specific.")
+    def test_copy_path(self):
+        self.assertLoaded(use_copy=True)
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitioning is PostgreSQL-specific.")
+class ConsommationPartitionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="partitions@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        # Start from the plain table whatever state the database was left in.
+        unpartition_table()
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        for month in (1, 2, 4):
+            self.create_reading(datetime(2025, month, 15, tzinfo=dt_timezone.utc))
+
+    def create_reading(self, date_consommation):
+        return Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal("10.00"),
+            unit_price=Decimal("0.1000"),
+            date_consommation=date_consommation,
+        )
+
+    def partition_names(self):
+        with connection.cursor() as cursor:
+            return [name for name, _bounds in list_partitions(cursor)]
+
+    def test_partitioning_keeps_rows_and_prunes_date_filters(self):
+        partition_table(months_ahead=0)
+
+        names = self.partition_names()
+        self.assertIn(DEFAULT_PARTITION, names)
+        self.assertIn(partition_name(date(2025, 3, 1)), names)
+        self.assertEqual(Consommation.objects.count(), 3)
+        reading = self.create_reading(datetime(2025, 2, 20, tzinfo=dt_timezone.utc))
+        self.assertEqual(reading.total_price, Decimal("1.00"))
+
+        plan = Consommation.objects.filter(
+            user=self.user,
+            date_consommation__gte=datetime(2025, 2, 1, tzinfo=dt_timezone.utc),
+            date_consommation__lt=datetime(2025, 3, 1, tzinfo=dt_timezone.utc),
+        ).explain()
+        self.assertIn(partition_name(date(2025, 2, 1)), plan)
+        self.assertNotIn(partition_name(date(2025, 1, 1)), plan)
+        self.assertNotIn(DEFAULT_PARTITION, plan)
+
+    def test_new_partition_takes_rows_from_default(self):
+        partition_table(months_ahead=0)
+        self.create_reading(datetime(2019, 6, 1, tzinfo=dt_timezone.utc))
+
+        with connection.cursor() as cursor:
+            created = ensure_partitions(cursor, date(2019, 6, 1), date(2019, 6, 1))
+            cursor.execute(f"SELECT count(*) FROM {DEFAULT_PARTITION}")
+            left_in_default = cursor.fetchone()[0]
+
+        self.assertEqual(created, [partition_name(date(2019, 6, 1))])
+        self.assertEqual(left_in_default, 0)
+        self.assertEqual(Consommation.objects.count(), 4)
+
+    def test_command_splits_default_partition(self):
+        partition_table(months_ahead=0)
+        self.create_reading(datetime(2019, 6, 1, tzinfo=dt_timezone.utc))
+
+        call_command("manage_partitions", ahead=0, stdout=StringIO())
+
+        self.assertIn(partition_name(date(2019, 6, 1)), self.partition_names())
+
+    def test_command_archives_old_partitions(self):
+        partition_table(months_ahead=0)
+        stdout = StringIO()
+
+        call_command(
+            "manage_partitions",
+            detach_before="2025-03",
+            archive_schema="energy_archive",
+            stdout=stdout,
+        )
+
+        self.assertIn("2 partition(s) detached.", stdout.getvalue())
+        self.assertEqual(Consommation.objects.count(), 1)
+        # Archived rows leave no tombstones: sync clients start over.
+        self.assertTrue(DataVersion.objects.filter(key=SYNC_FLOOR).exists())
+        self.assertNotIn(partition_name(date(2025, 1, 1)), self.partition_names())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM energy_archive.{partition_name(date(2025, 1, 1))}"
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_archive_schema_must_be_an_identifier(self):
+        partition_table(months_ahead=0)
+        schema = 'archive"; DROP TABLE energy_user; --'
+
+        with self.assertRaises(ValueError):
+            detach_partitions(date(2025, 3, 1), archive_schema=schema)
+        with self.assertRaises(CommandError):
+            call_command(
+                "manage_partitions",
+                detach_before="2025-03",
+                archive_schema=schema,
+                stdout=StringIO(),
+            )
+        self.assertEqual(Consommation.objects.count(), 3)
+
+    def test_unpartition_restores_plain_table(self):
+        partition_table(months_ahead=0)
+        unpartition_table()
+
+        with connection.cursor() as cursor:
+            self.assertFalse(is_partitioned(cursor))
+        self.assertEqual(Consommation.objects.count(), 3)
+        self.create_reading(datetime(2025, 5, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(Consommation.objects.count(), 4)
+
+
+@override_settings(ROOT_URLCONF="energy.tests")
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="etag@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("50"),
+            status="active",
+            message="Gaz > 50",
+        )
+        Notification.objects.create(user=self.user, alert=self.alert)
+        self.create_reading("12.00")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        get_cached_user(self.user.id)
+
+    def create_reading(self, value):
+        return Consommation.objects.create(
+            user=self.user,
+            category=self.category,
+            value=Decimal(value),
+            unit_price=Decimal("0.1000"),
+            date_consommation=datetime(2026, 1, 5, tzinfo=dt_timezone.utc),
+        )
+
+    def revalidate(self, path, etag):
+        return self.client.get(path, headers={"if-none-match": etag})
+
+    def test_unchanged_lists_answer_not_modified(self):
+        for path in (
+            "/api/v1/consommations/?page_size=10",
+            "/api/v1/categories/",
+            "/api/v1/alerts/",
+            "/api/v1/notifications/",
+        ):
+            with self.subTest(path=path):
+                first = self.client.get(path)
+                self.assertEqual(first.status_code, 200)
+                self.assertIn("no-cache", first["Cache-Control"])
+
+                # Session, then the version lookup: no row is read. The
+                # category catalogue is versioned in process.
+                queries = 1 if path == "/api/v1/categories/" else 2
+                with self.assertNumQueries(queries):
+                    second = self.revalidate(path, first["ETag"])
+
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second.content, b"")
+                self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_writes_change_the_etag(self):
+        consommations = self.client.get("/api/v1/consommations/")
+        categories = self.client.get("/api/v1/categories/")
+        notifications = self.client.get("/api/v1/notifications/")
+
+        self.create_reading("30.00")
+        Category.objects.create(name="Eau", unit="L")
+        self.client.post(
+            "/api/v1/notifications/mark-read/",
+            data=json.dumps({"all": True}),
+            content_type="application/json",
+        )
+
+        for path, response in (
+            ("/api/v1/consommations/", consommations),
+            ("/api/v1/categories/", categories),
+            ("/api/v1/notifications/", notifications),
+        ):
+            with self.subTest(path=path):
+                fresh = self.revalidate(path, response["ETag"])
+                self.assertEqual(fresh.status_code, 200)
+                self.assertNotEqual(fresh["ETag"], response["ETag"])
+
+    def test_bulk_load_changes_the_etag(self):
+        response = self.client.get("/api/v1/consommations/")
+
+        load_consommations(
+            [
+                (
+                    self.user.id,
+                    self.category.id,
+                    datetime(2026, 1, 6, tzinfo=dt_timezone.utc),
+                    Decimal("4.00"),
+                    Decimal("0.1000"),
+                )
+            ]
+        )
+
+        self.assertEqual(
+            self.revalidate("/api/v1/consommations/", response["ETag"]).status_code, 200
+        )
+
+    def test_etag_depends_on_query(self):
+        everything = self.client.get("/api/v1/consommations/")
+        filtered = self.client.get(
+            "/api/v1/consommations/", {"category": self.category.id}
+        )
+
+        self.assertNotEqual(everything["ETag"], filtered["ETag"])
+        self.assertEqual(
+            self.revalidate(
+                f"/api/v1/consommations/?category={self.category.id}",
+                everything["ETag"],
+            ).status_code,
+            200,
+        )
+
+    def test_async_lists_answer_not_modified(self):
+        for path in ("/async/consommations/", "/async/notifications/"):
+            with self.subTest(path=path):
+                first = self.client.get(path)
+
+                second = self.revalidate(path, first["ETag"])
+
+                self.assertEqual(second.status_code, 304)
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="sync@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.other = User.objects.create(
+            email="sync-other@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("50"),
+            status="active",
+            message="Gaz > 50",
+        )
+        self.notification = Notification.objects.create(user=self.user, alert=self.alert)
+        self.kept = self.create_reading(self.user, "12.00")
+        self.removed = self.create_reading(self.user, "8.00")
+        self.create_reading(self.other, "99.00")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+
+    def create_reading(self, user, value):
+        return Consommation.objects.create(
+            user=user,
+            category=self.category,
+            value=Decimal(value),
+            unit_price=Decimal("0.1000"),
+            date_consommation=datetime(2026, 1, 5, tzinfo=dt_timezone.utc),
+        )
+
+    def sync(self, **params):
+        response = self.client.get("/api/v1/sync/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, payload, resource, key="changed"):
+        rows = payload[resource][key]
+        return sorted(row if key == "deleted" else row["id"] for row in rows)
+
+    def test_first_sync_returns_every_row(self):
+        payload = self.sync()
+
+        self.assertTrue(payload["reset"])
+        self.assertEqual(
+            self.ids(payload, "consommations"), [self.kept.id, self.removed.id]
+        )
+        self.assertEqual(self.ids(payload, "alerts"), [self.alert.id])
+        self.assertEqual(self.ids(payload, "notifications"), [self.notification.id])
+        self.assertIsNone(payload["consommations"]["next"])
+
+    def test_full_resync_pages_consommations(self):
+        payload = self.sync(page_size=1)
+        pages = [payload["consommations"]]
+        added = self.create_reading(self.user, "30.00")
+        while pages[-1]["next"]:
+            next_page = self.sync(cursor=pages[-1]["next"], page_size=1)
+            pages.append(next_page["consommations"])
+
+        self.assertEqual([len(page["changed"]) for page in pages], [1, 1, 1])
+        self.assertEqual(
+            [row["id"] for page in pages for row in page["changed"]],
+            [self.kept.id, self.removed.id, added.id],
+        )
+        # Written while paging: sent again by the next delta.
+        delta = self.sync(since=payload["token"])
+        self.assertEqual(self.ids(delta, "consommations"), [added.id])
+        invalid = self.client.get("/api/v1/sync/", {"cursor": "not-a-cursor"})
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_next_sync_returns_only_changes_and_tombstones(self):
+        token = self.sync()["token"]
+        added = self.create_reading(self.user, "30.00")
+        removed_id = self.removed.id
+        self.removed.delete()
+        self.alert.message = "Gaz > 50 m3"
+        self.alert.save()
+        self.client.post(
+            "/api/v1/notifications/mark-read/",
+            data=json.dumps({"all": True}),
+            content_type="application/json",
+        )
+        self.create_reading(self.other, "5.00")
+
+        payload = self.sync(since=token)
+
+        self.assertFalse(payload["reset"])
+        self.assertEqual(self.ids(payload, "consommations"), [added.id])
+        self.assertEqual(self.ids(payload, "consommations", "deleted"), [removed_id])
+        self.assertEqual(payload["alerts"]["changed"][0]["message"], "Gaz > 50 m3")
+        self.assertTrue(payload["notifications"]["changed"][0]["read"])
+
+        unchanged = self.sync(since=payload["token"])
+        for resource in ("consommations", "alerts", "notifications"):
+            self.assertEqual(unchanged[resource], {"changed": [], "deleted": []})
+
+    def test_bulk_paths_are_synced(self):
+        token = self.sync()["token"]
+        load_consommations(
+            [
+                (
+                    self.user.id,
+                    self.category.id,
+                    datetime(2026, 1, 6, tzinfo=dt_timezone.utc),
+                    Decimal("60.00"),
+                    Decimal("0.1000"),
+                )
+            ]
+        )
+        self.client.post(
+            "/api/v1/notifications/bulk-delete/",
+            data=json.dumps({"ids": [self.notification.id]}),
+            content_type="application/json",
+        )
+
+        payload = self.sync(since=token)
+
+        self.assertEqual(len(payload["consommations"]["changed"]), 1)
+        self.assertEqual(
+            self.ids(payload, "notifications", "deleted"), [self.notification.id]
+        )
+
+    def test_deleting_an_alert_tombstones_its_notification(self):
+        token = self.sync()["token"]
+
+        self.client.delete(f"/api/v1/alerts/{self.alert.id}/")
+
+        payload = self.sync(since=token)
+        self.assertEqual(self.ids(payload, "alerts", "deleted"), [self.alert.id])
+        self.assertEqual(
+            self.ids(payload, "notifications", "deleted"), [self.notification.id]
+        )
+
+    def test_resources_subset_keeps_other_revisions(self):
+        token = self.sync()["token"]
+        self.alert.save()
+
+        payload = self.sync(since=token, resources="consommations")
+
+        self.assertEqual(set(payload), {"token", "reset", "consommations"})
+        _, before = parse_token(token)
+        _, after = parse_token(payload["token"])
+        self.assertEqual(after["alerts"], before["alerts"])
+        next_payload = self.sync(since=payload["token"])
+        self.assertEqual(self.ids(next_payload, "alerts"), [self.alert.id])
+
+    def test_raised_floor_forces_a_full_resync(self):
+        token = self.sync()["token"]
+
+        raise_sync_floor()
+
+        self.assertTrue(self.sync(since=token)["reset"])
+
+    def test_expired_or_invalid_tokens(self):
+        _, revisions = parse_token(self.sync()["token"])
+
+        expired = self.sync(since=make_token(0, revisions))
+        invalid = self.client.get("/api/v1/sync/", {"since": "not-a-token"})
+        unknown = self.client.get("/api/v1/sync/", {"resources": "users"})
+
+        self.assertTrue(expired["reset"])
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(unknown.status_code, 400)
+
+    def test_prune_command_drops_old_tombstones(self):
+        self.removed.delete()
+        SyncTombstone.objects.update(deleted_at=timezone.now() - timedelta(days=400))
+        stdout = StringIO()
+
+        call_command("prune_sync_tombstones", stdout=stdout)
+
+        self.assertIn("1 tombstone(s)", stdout.getvalue())
+        self.assertFalse(SyncTombstone.objects.exists())
+
+
+class CategoryCatalogueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="catalogue@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.gas = Category.objects.create(name="Gaz", unit="m3")
+        self.water = Category.objects.create(name="Eau", unit="L")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        get_cached_user(self.user.id)
+        catalogue.all()
+
+    def names(self):
+        return [row["name"] for row in self.client.get("/api/v1/categories/").json()]
+
+    def test_list_is_served_without_a_category_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/v1/categories/")
+
+        self.assertEqual([row["name"] for row in response.json()], ["Eau", "Gaz"])
+        self.assertFalse(
+            [query for query in queries if "energy_category" in query["sql"]]
+        )
+
+    def test_writes_are_visible_on_the_next_list(self):
+        self.client.post(
+            "/api/v1/categories/",
+            data=json.dumps({"name": "Electricite", "unit": "kWh"}),
+            content_type="application/json",
+        )
+        self.assertEqual(self.names(), ["Eau", "Electricite", "Gaz"])
+
+        self.client.delete(f"/api/v1/categories/{self.water.id}/")
+        self.assertEqual(self.names(), ["Electricite", "Gaz"])
+
+    def test_unknown_id_is_looked_up_once(self):
+        # bulk_create sends no signal, as a write from another worker.
+        (fuel,) = Category.objects.bulk_create([Category(name="Fioul", unit="L")])
+
+        self.assertEqual(catalogue.get(fuel.id).name, "Fioul")
+        with self.assertNumQueries(1):
+            self.assertIsNone(catalogue.get(fuel.id + 100))
+        with self.assertNumQueries(0):
+            self.assertIsNone(catalogue.get(fuel.id + 100))
+
+    def test_remembered_unknown_ids_are_bounded(self):
+        with patch.object(categories_module, "MAX_MISSING_IDS", 3):
+            for offset in range(1, 8):
+                self.assertIsNone(catalogue.get(self.gas.id + 100 + offset))
+                self.assertLessEqual(len(catalogue._missing), 3)
+
+    def test_non_integral_category_is_rejected(self):
+        payload = {
+            "value": "12.00",
+            "unit_price": "0.1000",
+            "date_consommation": "2026-01-05T00:00:00Z",
+        }
+        for category in (self.gas.id + 0.9, f"{self.gas.id}.9", [self.gas.id], True):
+            with self.subTest(category=category):
+                serializer = ConsommationSerializer(
+                    data={**payload, "category": category}
+                )
+                self.assertFalse(serializer.is_valid())
+                self.assertIn("category", serializer.errors)
+        serializer = ConsommationSerializer(
+            data={**payload, "category": str(self.gas.id)}
+        )
+        serializer.is_valid()
+        self.assertNotIn("category", serializer.errors)
+
+    @override_settings(CATEGORY_CACHE_CHECK_INTERVAL=0)
+    def test_new_shared_version_triggers_a_reload(self):
+        Category.objects.filter(pk=self.gas.pk).update(name="Gaz naturel")
+        self.assertEqual(self.names(), ["Eau", "Gaz"])
+
+        cache.set(VERSION_KEY, "other-worker-write", None)
+
+        self.assertEqual(self.names(), ["Eau", "Gaz naturel"])
+
+    def test_consommation_validation_reads_no_category(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/v1/consommations/",
+                data=json.dumps(
+                    {
+                        "category": self.gas.id,
+                        "value": "12.00",
+                        "unit_price": "0.1000",
+                        "date_consommation": "2026-01-05T00:00:00Z",
+                    }
+                ),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if query["sql"].lstrip().startswith("SELECT")
+                and 'FROM "energy_category"' in query["sql"]
+            ]
+        )
+
+
+class ConsommationStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="stats@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.gas = Category.objects.create(name="Gaz", unit="m3")
+        self.water = Category.objects.create(name="Eau", unit="L")
+        for day, value in ((5, "1.00"), (6, "2.00"), (7, "3.00"), (8, "4.00"), (9, "10.00")):
+            self.create_reading(self.gas, day, value)
+        self.create_reading(self.water, 5, "150.00")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        get_cached_user(self.user.id)
+
+    def create_reading(self, category, day, value, hour=12):
+        return Consommation.objects.create(
+            user=self.user,
+            category=category,
+            value=Decimal(value),
+            unit_price=Decimal("0.1000"),
+            date_consommation=datetime(2026, 1, day, hour, tzinfo=dt_timezone.utc),
+        )
+
+    def stats(self, **params):
+        response = self.client.get("/api/v1/consommations/stats/", params)
+        self.assertEqual(response.status_code, 200)
+        return {row["category"]: row for row in response.json()["results"]}
+
+    def test_summary_per_category(self):
+        results = self.stats(over="reading", percentiles="50,90")
+
+        self.assertEqual(
+            results[self.gas.id],
+            {
+                "category": self.gas.id,
+                "count": 5,
+                "sum": "20.00",
+                "min": "1.00",
+                "max": "10.00",
+                "mean": "4.00",
+                "stddev": "3.54",
+                "percentiles": {"50": "3.00", "90": "7.60"},
+            },
+        )
+        self.assertEqual(results[self.water.id]["count"], 1)
+        self.assertIsNone(results[self.water.id]["stddev"])
+
+    def test_daily_totals_and_window(self):
+        self.create_reading(self.gas, 9, "6.00", hour=13)
+
+        daily = self.stats(category=self.gas.id, date_from="2026-01-06")
+        readings = self.stats(over="reading", category=self.gas.id, date_from="2026-01-06")
+
+        self.assertEqual(list(daily), [self.gas.id])
+        self.assertEqual(daily[self.gas.id]["count"], 4)
+        self.assertEqual(daily[self.gas.id]["max"], "16.00")
+        self.assertEqual(readings[self.gas.id]["count"], 5)
+        self.assertEqual(readings[self.gas.id]["max"], "10.00")
+
+    def test_results_are_cached_until_new_data(self):
+        first = self.stats()
+
+        # Session, then the version lookup: statistics come from the cache.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.stats(), first)
+
+        self.create_reading(self.gas, 10, "30.00")
+        self.assertEqual(self.stats()[self.gas.id]["max"], "30.00")
+
+    def test_unchanged_data_answers_not_modified(self):
+        response = self.client.get("/api/v1/consommations/stats/")
+
+        again = self.client.get(
+            "/api/v1/consommations/stats/", headers={"if-none-match": response["ETag"]}
+        )
+
+        self.assertEqual(again.status_code, 304)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"over": "week"},
+            {"percentiles": "50,101"},
+            {"percentiles": "median"},
+            {"date_from": "05/01/2026"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get("/api/v1/consommations/stats/", params)
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    ROOT_URLCONF="energy.tests",
+    ANOMALY_DETECTION=True,
+    ANOMALY_EWMA_ALPHA=0.2,
+    ANOMALY_Z_THRESHOLD=4,
+    ANOMALY_MIN_READINGS=5,
+)
+class AnomalyDetectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="anomaly@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Electricite", unit="kWh")
+        session = self.client.session
+        session["user_id"] = self.user.id
+        session.save()
+        get_cached_user(self.user.id)
+
+    def readings(self, values, first_day=1):
+        return [
+            (
+                self.user.id,
+                self.category.id,
+                datetime(2026, 1, first_day + index, 12, tzinfo=dt_timezone.utc),
+                Decimal(value),
+                Decimal("0.2000"),
+            )
+            for index, value in enumerate(values)
+        ]
+
+    def anomalies(self):
+        return Notification.objects.filter(user=self.user, type="anomaly")
+
+    def test_spike_after_warmup_is_notified(self):
+        load_consommations(self.readings(["10.00", "11.00", "10.00", "11.00", "10.00"]))
+        self.assertFalse(self.anomalies().exists())  # still warming up
+
+        load_consommations(self.readings(["10.00", "11.00", "10.00"], first_day=6))
+        response = self.client.post(
+            "/api/v1/consommations/",
+            data=json.dumps(
+                {
+                    "category": self.category.id,
+                    "value": "60.00",
+                    "unit_price": "0.2000",
+                    "date_consommation": "2026-01-09T12:00:00Z",
+                }
+            ),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        notification = self.anomalies().get()
+        self.assertIsNone(notification.alert_id)
+        self.assertEqual(notification.category_id, self.category.id)
+        self.assertEqual(notification.value, Decimal("60.00"))
+        self.assertGreater(notification.score, 4)
+        self.assertEqual(
+            AnomalyBaseline.objects.get(user=self.user, category=self.category).count, 9
+        )
+
+    def test_usual_readings_are_not_notified(self):
+        detect_anomalies(self.readings(["10.00", "11.00", "12.00", "10.50"] * 5))
+
+        self.assertFalse(self.anomalies().exists())
+
+    def test_command_matches_incremental_state(self):
+        values = ["10.00", "11.00", "10.50", "9.50", "10.00", "10.50", "45.00", "10.00"]
+        detect_anomalies(self.readings(values))
+        live = AnomalyBaseline.objects.values("count", "mean", "variance").get()
+        live_notifications = list(self.anomalies().values_list("reading_at", "score"))
+        self.anomalies().delete()
+        for _, _, date_value, value, unit_price in self.readings(values):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=value,
+                unit_price=unit_price,
+                date_consommation=date_value,
+            )
+
+        call_command("detect_anomalies", stdout=StringIO())
+        call_command("detect_anomalies", stdout=StringIO())
+
+        rebuilt = AnomalyBaseline.objects.values("count", "mean", "variance").get()
+        self.assertEqual(rebuilt["count"], live["count"])
+        self.assertAlmostEqual(rebuilt["mean"], live["mean"])
+        self.assertAlmostEqual(rebuilt["variance"], live["variance"])
+        self.assertEqual(
+            list(self.anomalies().values_list("reading_at", "score")),
+            live_notifications,
+        )
+        self.assertEqual(len(live_notifications), 1)
+
+    def test_command_since_limits_notifications(self):
+        for _, _, date_value, value, unit_price in self.readings(
+            ["10.00", "11.00", "10.00", "11.00", "10.00", "50.00", "10.00"]
+        ):
+            Consommation.objects.create(
+                user=self.user,
+                category=self.category,
+                value=value,
+                unit_price=unit_price,
+                date_consommation=date_value,
+            )
+
+        call_command("detect_anomalies", "--since", "2026-01-07", stdout=StringIO())
+
+        self.assertFalse(self.anomalies().exists())
+        self.assertEqual(AnomalyBaseline.objects.get().count, 7)
+
+    def test_command_rejects_invalid_since(self):
+        for value in ("07/01/2026", "2026-02-30"):
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                call_command("detect_anomalies", "--since", value, stdout=StringIO())
+
+    def test_async_list_matches_viewset(self):
+        detect_anomalies(
+            self.readings(["10.00", "11.00", "10.00", "11.00", "10.00", "50.00"])
+        )
+
+        viewset = self.client.get("/api/v1/notifications/").json()
+        async_list = self.client.get("/async/notifications/").json()
+
+        self.assertEqual(viewset, async_list)
+        self.assertEqual(viewset[0]["type"], "anomaly")
+        self.assertEqual(viewset[0]["value"], "50.00")
+
+    def test_deleted_category_keeps_restamped_notifications(self):
+        detect_anomalies(
+            self.readings(["10.00", "11.00", "10.00", "11.00", "10.00", "50.00"])
+        )
+        before = self.anomalies().get()
+        token = self.client.get("/api/v1/sync/").json()["token"]
+
+        response = self.client.delete(f"/api/v1/categories/{self.category.id}/")
+
+        self.assertEqual(response.status_code, 204)
+        after = self.anomalies().get()
+        self.assertEqual(after.pk, before.pk)
+        self.assertIsNone(after.category_id)
+        self.assertGreater(after.revision, before.revision)
+        self.assertEqual(unread_count(self.user.id), 1)
+        changes = self.client.get(
+            "/api/v1/sync/", {"since": token, "resources": "notifications"}
+        ).json()
+        self.assertEqual(
+            [row["id"] for row in changes["notifications"]["changed"]], [after.pk]
+        )
+        self.assertIsNone(changes["notifications"]["changed"][0]["category"])
+
+    @override_settings(ANOMALY_DETECTION=False)
+    def test_disabled(self):
+        detect_anomalies(self.readings(["10.00"] * 5 + ["90.00"]))
+
+        self.assertFalse(AnomalyBaseline.objects.exists())
+        self.assertFalse(self.anomalies().exists())
+
+
+class CacheInvalidationOnCommitTests(TestCase):
+    """
+    Writes clear their caches again once they commit: a concurrent reader
+    may refill them with pre-commit rows while the transaction is open.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email="commit@managenergy.local",
+            password="Password123",
+            is_active=True,
+            role="user",
+        )
+        self.category = Category.objects.create(name="Gaz", unit="m3")
+        self.alert = Alert.objects.create(
+            user=self.user,
+            category=self.category,
+            limit=Decimal("30.00"),
+            status="active",
+            message="Gaz > 30",
+        )
+
+    def assert_cleared_after_commit(self, key, write):
+        with self.captureOnCommitCallbacks() as callbacks:
+            write()
+            cache.set(key, "stale")  # concurrent reader, before the commit
+        self.assertEqual(cache.get(key), "stale")
+
+        for callback in callbacks:
+            callback()
+
+        self.assertIsNone(cache.get(key))
+
+    def test_alert_limits(self):
+        def write():
+            self.alert.limit = Decimal("50.00")
+            self.alert.save()
+
+        self.assert_cleared_after_commit(
+            alerts_module._limits_cache_key(self.user.id, self.category.id), write
+        )
+
+    def test_unread_count(self):
+        self.assert_cleared_after_commit(
+            notifications_module._unread_cache_key(self.user.id),
+            lambda: Notification.objects.create(user=self.user, alert=self.alert),
+        )
+
+    def test_session_user(self):
+        def write():
+            self.user.role = "admin"
+            self.user.save()
+
+        self.assert_cleared_after_commit(
+            authentication_module._user_cache_key(self.user.id), write
+        )
@@ -1,6 +1,12 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import (
+    consommation_aggregate,
+    consommation_collection,
+    notification_collection,
+)
 from .views import (
     AlertViewSet,
     CategoryViewSet,
@@ -12,7 +18,10 @@ from .views import (
     generate_consumptions,
     login,
     logout,
+    metrics,
+    notification_stream,
     register,
+    sync,
 )
 
 
@@ -29,6 +38,25 @@ urlpatterns = [
     path("activate/", activate_account, name="activate-account"),
     path("login/", login, name="login"),
     path("logout/", logout, name="logout"),
+    path("metrics/", metrics, name="metrics"),
+    path("sync/", sync, name="sync"),
     path("generate-consumptions/", generate_consumptions, name="generate-consumptions"),
+    # Before the router so "stream" is not taken for a notification id.
+    path("notifications/stream/", notification_stream, name="notification-stream"),
+]
+
+if settings.ASYNC_API_VIEWS:
+    # Shadow the matching router routes; detail routes stay on the viewsets.
+    urlpatterns += [
+        path("consommations/", consommation_collection, name="consommation-list"),
+        path(
+            "consommations/aggregate/",
+            consommation_aggregate,
+            name="consommation-aggregate",
+        ),
+        path("notifications/", notification_collection, name="notification-list"),
+    ]
+
+urlpatterns += [
     path("", include(router.urls)),
 ]
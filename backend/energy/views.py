@@ -1,20 +1,75 @@
+import asyncio
+import codecs
+import csv
 import json
 import secrets
 import random
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from functools import partial
+from itertools import islice
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from django.core.cache import cache
 from django.contrib.auth import logout as django_logout
-from django.contrib.auth.hashers import check_password, make_password
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from rest_framework import viewsets
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import BasePermission
-
-from .models import Alert, Category, Consommation, Notification, User
+from rest_framework.response import Response
+
+from .models import (
+    Alert,
+    Category,
+    Consommation,
+    DailyConsumptionRollup,
+    MonthlyConsumptionRollup,
+    Notification,
+    User,
+)
+from .alerts import notify_reading
+from .anomalies import detect_reading
+from .authentication import asession_user_id, revoke_session, session_user
+from .categories import catalogue
+from .dates import filter_days, parse_day, start_of_day
+from .events import get_broker, notification_channel
+from .notifications import invalidate_unread_count, unread_count
+from .passwords import HashQueueFull, ahash_password, averify_password, get_hash_pool
+from .loading import load_consommations
+from .pagination import ConsommationKeysetPagination
+from .seeding import get_ranges, get_unit_price_range
+from .stats import (
+    DEFAULT_PERCENTILES,
+    MAX_PERCENTILES,
+    consommation_stats,
+    percentile_label,
+)
+from .sync import changes_since, consommation_page, parse_resources, record_deletions
+from .versions import (
+    ALERTS,
+    CATEGORIES,
+    CONSOMMATIONS,
+    NOTIFICATIONS,
+    current_version,
+    list_etag,
+    next_revision,
+    not_modified,
+    with_etag,
+)
 from .serializers import (
     AlertSerializer,
     CategorySerializer,
+    ConsommationBulkRowSerializer,
+    ConsommationReadMapper,
     ConsommationSerializer,
     NotificationSerializer,
     UserSerializer,
@@ -33,13 +88,16 @@ def csrf(request):
 
 
 @csrf_exempt
-def register(request):
+async def register(request):
     """
     POST /api/v1/register/
     Auth: none
     Body: { "email": "...", "password": "..." }
-    Returns: 201 + {id,email,is_active,message} | 409 | 400
-    Description: Create a user account (inactive by default).
+    Returns: 201 + {id,email,is_active,message} | 409 | 400 | 503
+    Description: Create a user account (inactive by default). The password
+    is hashed in the bounded hash pool (energy.passwords): off the event
+    loop under ASGI; under WSGI the worker waits for it and a full queue
+    answers 503.
     """
     if request.method != "POST":
         return JsonResponse({"detail": "Method not allowed."}, status=405)
@@ -69,12 +127,17 @@ def register(request):
             status=400,
         )
 
-    if User.objects.filter(email=email).exists():
+    if await User.objects.filter(email=email).aexists():
         return JsonResponse({"detail": "Email already registered."}, status=409)
 
-    user = User.objects.create(
+    try:
+        encoded = await ahash_password(password)
+    except HashQueueFull:
+        return _hash_pool_busy()
+
+    user = await User.objects.acreate(
         email=email,
-        password=make_password(password),
+        password=encoded,
         is_active=False,
         role="user",
     )
@@ -90,9 +153,17 @@ def register(request):
     )
 
 
+def _hash_pool_busy():
+    response = JsonResponse(
+        {"detail": "Too many authentication requests, retry shortly."}, status=503
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
 def session_required(view_func):
     def _wrapped(request, *args, **kwargs):
-        if _get_session_user_id(request) is None:
+        if session_user(request) is None:
             return JsonResponse({"detail": "Authentication required."}, status=401)
         return view_func(request, *args, **kwargs)
 
@@ -129,7 +200,7 @@ def generate_consumptions(request):
         return JsonResponse({"detail": "start_date is required."}, status=400)
 
     try:
-        start = datetime.strptime(start_date, "%d/%m/%Y")
+        start = timezone.make_aware(datetime.strptime(start_date, "%d/%m/%Y"))
     except ValueError:
         return JsonResponse(
             {"detail": "start_date must be in DD/MM/YYYY format."}, status=400
@@ -140,51 +211,23 @@ def generate_consumptions(request):
     except User.DoesNotExist:
         return JsonResponse({"detail": "User not found."}, status=404)
 
-    categories = list(Category.objects.all().order_by("id"))
+    categories = sorted(catalogue.all(), key=lambda category: category.id)
     if not categories:
         return JsonResponse({"detail": "No categories available."}, status=400)
 
-    def get_ranges(category_name, day_index):
-        name = (category_name or "").lower()
-        if "gaz" in name:
-            if day_index < 90:
-                return (25, 50)
-            return (5, 25)
-        if "eau" in name:
-            return (150, 500)
-        if "electric" in name:
-            return (3.3, 6.7)
-        return (100, 500)
-
-    def get_unit_price(category_name):
-        name = (category_name or "").lower()
-        if "gaz" in name:
-            return round(random.uniform(0.05, 0.12), 4)
-        if "eau" in name:
-            return round(random.uniform(0.001, 0.005), 4)
-        if "electric" in name:
-            return round(random.uniform(0.12, 0.25), 4)
-        return round(random.uniform(0.05, 0.2), 4)
-
-    to_create = []
+    readings = []
     for category in categories:
         for i in range(count):
             date_value = start + timedelta(days=i)
             min_value, max_value = get_ranges(category.name, i)
             value = round(random.uniform(min_value, max_value), 2)
-            unit_price = get_unit_price(category.name)
-            to_create.append(
-                Consommation(
-                    user=user,
-                    category=category,
-                    value=value,
-                    unit_price=unit_price,
-                    date_consommation=date_value,
-                )
-            )
+            price_low, price_high = get_unit_price_range(category.name)
+            unit_price = round(random.uniform(price_low, price_high), 4)
+            readings.append((user.id, category.id, date_value, value, unit_price))
 
-    Consommation.objects.bulk_create(to_create)
-    return JsonResponse({"created": len(to_create)}, status=201)
+    # COPY on PostgreSQL; rollups and alerts are fed from the same readings.
+    created = load_consommations(readings)
+    return JsonResponse({"created": created}, status=201)
 
 
 @csrf_exempt
@@ -226,13 +269,14 @@ def activate_account(request):
 
 
 @csrf_exempt
-def login(request):
+async def login(request):
     """
     POST /api/v1/login/
     Auth: none
     Body: { "email": "...", "password": "..." }
-    Returns: 200 + {token,user{...}} | 403 | 401 | 400
-    Description: Authenticate and return a token + user info.
+    Returns: 200 + {token,user{...}} | 403 | 401 | 400 | 503
+    Description: Authenticate and return a token + user info. Same hash
+    pool and limits as register.
     """
     if request.method != "POST":
         return JsonResponse({"detail": "Method not allowed."}, status=405)
@@ -249,19 +293,25 @@ def login(request):
         return JsonResponse({"detail": "Email and password are required."}, status=400)
 
     try:
-        user = User.objects.get(email=email)
+        user = await User.objects.aget(email=email)
     except User.DoesNotExist:
         return JsonResponse({"detail": "Invalid credentials."}, status=401)
 
     if not user.is_active:
         return JsonResponse({"detail": "Account not activated."}, status=403)
 
-    if not check_password(password, user.password):
+    # Hashing runs in the bounded hash pool, off the event loop (ASGI only:
+    # a WSGI worker blocks here until the hash is done).
+    try:
+        valid = await averify_password(password, user)
+    except HashQueueFull:
+        return _hash_pool_busy()
+    if not valid:
         return JsonResponse({"detail": "Invalid credentials."}, status=401)
 
     token = secrets.token_urlsafe(32)
-    request.session["user_id"] = user.id
-    request.session["auth_token"] = token
+    await request.session.aset("user_id", user.id)
+    await request.session.aset("auth_token", token)
 
     return JsonResponse(
         {
@@ -289,31 +339,149 @@ def logout(request):
     if request.method != "POST":
         return JsonResponse({"detail": "Method not allowed."}, status=405)
 
+    revoke_session(request.session)
     django_logout(request)
     return JsonResponse({"message": "Logged out."}, status=200)
 
 
-def _get_session_user_id(request):
-    return request.session.get("user_id")
+@session_required
+def sync(request):
+    """
+    GET /api/v1/sync/?since=<token>&resources=consommations,alerts,notifications
+    GET /api/v1/sync/?cursor=<next>&page_size=<n>
+    Auth: session (login required)
+    Returns: 200 + {token,reset,<resource>{changed[],deleted[ids]}} | 200 + {consommations{changed[],deleted[],next}} | 400 | 405
+    Description: Rows written and ids deleted since the token returned by the
+    previous call; without a token (or with an expired one) every row, with
+    reset true. `resources` defaults to all three. On reset consommations
+    are paged: follow `consommations.next` with `cursor` until it is null,
+    then sync from the token of the first call.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+
+    user_id = session_user(request).id
+    page_size = request.GET.get("page_size")
+    try:
+        cursor = request.GET.get("cursor")
+        if cursor:
+            payload = {CONSOMMATIONS: consommation_page(user_id, cursor, page_size)}
+        else:
+            resources = parse_resources(request.GET.get("resources"))
+            payload = changes_since(
+                user_id, request.GET.get("since") or None, resources, page_size
+            )
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    return JsonResponse(payload, status=200)
 
 
-def _get_session_user(request):
-    user_id = _get_session_user_id(request)
-    if not user_id:
-        return None
+@session_required
+def metrics(request):
+    """
+    GET /api/v1/metrics/
+    Auth: session (admin role)
+    Returns: 200 + {password_hashing{queue_depth,running,completed,rejected,latency_p50_ms,latency_p99_ms}} | 403 | 405
+    Description: Runtime metrics of the worker process serving the request.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+
+    if session_user(request).role != "admin":
+        return JsonResponse({"detail": "Admin role required."}, status=403)
+
+    return JsonResponse({"password_hashing": get_hash_pool().metrics()}, status=200)
+
+
+def streams_supported(request):
+    """
+    Whether this worker can hold an endless response open. Under WSGI the
+    async stream would be drained into a worker thread that never returns.
+    """
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+async def notification_stream(request):
+    """
+    GET /api/v1/notifications/stream/
+    Auth: session (login required)
+    Returns: 200 + text/event-stream | 204 (not served over ASGI) | 401 | 405
+    Description: Server-Sent Events pushing new notifications as they are
+    created. Needs the ASGI application (config.asgi) to stream; elsewhere
+    204 tells EventSource not to reconnect.
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    if not streams_supported(request):
+        return HttpResponse(status=204)
+
+    user_id = await asession_user_id(request)
+    if user_id is None:
+        return JsonResponse({"detail": "Authentication required."}, status=401)
+
+    subscription = get_broker().subscribe(notification_channel(user_id))
+    response = StreamingHttpResponse(
+        _notification_events(subscription), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def _notification_events(subscription):
     try:
-        return User.objects.get(id=user_id)
-    except User.DoesNotExist:
-        return None
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await subscription.get(
+                    timeout=settings.NOTIFICATION_STREAM_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                # Comment line keeps idle connections open through proxies.
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {message['event']}\ndata: {json.dumps(message)}\n\n"
+    finally:
+        subscription.close()
 
 
 class SessionAuthenticated(BasePermission):
     """
-    Permission: allow access only if the user is authenticated via session.
+    Permission: allow access only if the user is authenticated via session
+    (request.user is set by SessionUserAuthentication, None when anonymous).
     """
 
     def has_permission(self, request, view):
-        return _get_session_user_id(request) is not None
+        return request.user is not None
+
+
+class ConditionalListMixin:
+    """
+    Conditional GET for list routes: the response carries a weak ETag built
+    from the resource's change counter (energy.versions) and a matching
+    If-None-Match is answered with 304 before the queryset is evaluated.
+    `version_shared` marks resources that are the same for every user.
+    """
+
+    version_resource = None
+    version_shared = False
+
+    def list_version(self, user_id):
+        return current_version(self.version_resource, user_id)
+
+    def conditional_list(self, request, build_response):
+        user_id = None if self.version_shared else request.user.id
+        version = self.list_version(user_id)
+        etag = list_etag(request, self.version_resource, user_id, version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return with_etag(build_response(), etag)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_list(
+            request, partial(super().list, request, *args, **kwargs)
+        )
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -330,131 +498,568 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [SessionAuthenticated]
 
     def get_queryset(self):
-        user_id = _get_session_user_id(self.request)
-        if not user_id:
+        if self.request.user is None:
             return User.objects.none()
-        return User.objects.filter(id=user_id)
+        return User.objects.filter(id=self.request.user.id)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     GET/POST /api/v1/categories/
     GET/PUT/PATCH/DELETE /api/v1/categories/{id}/
     Auth: none
     Body (POST/PUT/PATCH): Category fields (name, unit)
-    Returns: Category object(s)
+    Returns: Category object(s) | 304 (list, If-None-Match)
     Description: CRUD for categories.
     """
     queryset = Category.objects.all().order_by("name")
     serializer_class = CategorySerializer
     permission_classes = [SessionAuthenticated]
+    version_resource = CATEGORIES
+    version_shared = True
+
+    def list_version(self, user_id):
+        return catalogue.version
+
+    def list(self, request, *args, **kwargs):
+        # Served from the in-process catalogue (energy.categories): no query.
+        return self.conditional_list(
+            request,
+            lambda: Response(self.get_serializer(catalogue.all(), many=True).data),
+        )
+
+
+def _parse_day(value, param):
+    day = parse_day(value)
+    if day is None:
+        raise ValidationError({param: "Expected a date in YYYY-MM-DD format."})
+    return day
 
 
-class ConsommationViewSet(viewsets.ModelViewSet):
+def _quantize_cents(amount):
+    # Same rounding as Consommation.total_price, applied once per bucket.
+    return Decimal(amount).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _iter_csv_rows(stream):
+    # Decode and parse line by line so large uploads are never fully buffered.
+    lines = codecs.iterdecode(iter(stream.readline, b""), "utf-8-sig")
+    yield from csv.DictReader(lines)
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+EXPORT_COLUMNS = [
+    "id",
+    "category",
+    "value",
+    "unit_price",
+    "date_consommation",
+    "total_price",
+]
+
+
+def _stream_csv(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for record in records:
+        yield writer.writerow([record[column] for column in EXPORT_COLUMNS])
+
+
+def _stream_ndjson(records):
+    for record in records:
+        yield json.dumps({column: record[column] for column in EXPORT_COLUMNS}) + "\n"
+
+
+async def _async_chunks(lines, size):
+    # Under ASGI a sync iterator would be read whole into memory before
+    # anything is sent; pull it in chunks from the sync thread instead (the
+    # one holding the database cursor).
+    next_chunk = sync_to_async(lambda: list(islice(lines, size)), thread_sensitive=True)
+    while chunk := await next_chunk():
+        for line in chunk:
+            yield line
+
+
+EXPORT_FORMATS = {
+    "csv": (_stream_csv, "text/csv", "csv"),
+    "ndjson": (_stream_ndjson, "application/x-ndjson", "ndjson"),
+}
+
+
+def _filter_consommations(queryset, params):
+    consommation_id = params.get("id")
+    category_id = params.get("category")
+    date_from = params.get("date_from")
+    date_to = params.get("date_to")
+
+    if consommation_id:
+        queryset = queryset.filter(id=consommation_id)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    return filter_days(
+        queryset,
+        _parse_day(date_from, "date_from") if date_from else None,
+        _parse_day(date_to, "date_to") if date_to else None,
+    )
+
+
+# Truncation applied on top of the rollup period (None keeps the period as is).
+AGGREGATE_BUCKETS = {
+    "day": None,
+    "week": TruncWeek,
+    "month": TruncMonth,
+    "year": TruncYear,
+}
+
+
+def _aggregate_rows(user_id, params):
+    """Return (bucket, rows) summing the user's rollups per period and category."""
+    bucket = params.get("bucket", "day")
+    if bucket not in AGGREGATE_BUCKETS:
+        raise ValidationError(
+            {"detail": "bucket must be one of: day, week, month, year."}
+        )
+    trunc = AGGREGATE_BUCKETS[bucket]
+    category_id = params.get("category")
+    date_from = params.get("date_from")
+    date_to = params.get("date_to")
+    date_from = _parse_day(date_from, "date_from") if date_from else None
+    date_to = _parse_day(date_to, "date_to") if date_to else None
+
+    # Read pre-summed rollups: monthly ones when the window covers whole
+    # months, daily ones otherwise. Cost is O(buckets), not O(readings).
+    whole_months = (date_from is None or date_from.day == 1) and (
+        date_to is None or (date_to + timedelta(days=1)).day == 1
+    )
+    if bucket in ("month", "year") and whole_months:
+        rollups, period_field = MonthlyConsumptionRollup.objects.all(), "month"
+        if bucket == "month":
+            trunc = None
+    else:
+        rollups, period_field = DailyConsumptionRollup.objects.all(), "day"
+
+    rollups = rollups.filter(user_id=user_id)
+    if category_id:
+        rollups = rollups.filter(category_id=category_id)
+    if date_from:
+        rollups = rollups.filter(**{f"{period_field}__gte": date_from})
+    if date_to:
+        rollups = rollups.filter(**{f"{period_field}__lte": date_to})
+
+    rows = (
+        rollups.annotate(
+            period=F(period_field) if trunc is None else trunc(period_field)
+        )
+        .values("period", "category_id")
+        .annotate(total_value_sum=Sum("total_value"), total_cost_sum=Sum("total_cost"))
+        .order_by("period", "category_id")
+    )
+    return bucket, rows
+
+
+def _aggregate_result(row):
+    return {
+        "period": row["period"].isoformat(),
+        "category": row["category_id"],
+        "value": str(_quantize_cents(row["total_value_sum"])),
+        "total_price": str(_quantize_cents(row["total_cost_sum"])),
+    }
+
+
+STATS_SOURCES = ("day", "reading")
+
+
+def _stats_params(params):
+    """Validated (over, category, date_from, date_to, percentiles) for /stats/."""
+    over = params.get("over", "day")
+    if over not in STATS_SOURCES:
+        raise ValidationError({"detail": "over must be one of: day, reading."})
+    percentiles = DEFAULT_PERCENTILES
+    if params.get("percentiles"):
+        try:
+            percentiles = [float(value) for value in params["percentiles"].split(",")]
+        except ValueError:
+            percentiles = None
+        if (
+            not percentiles
+            or len(percentiles) > MAX_PERCENTILES
+            or any(not 0 <= value <= 100 for value in percentiles)
+        ):
+            raise ValidationError(
+                {
+                    "detail": "percentiles must be up to "
+                    f"{MAX_PERCENTILES} comma-separated numbers between 0 and 100."
+                }
+            )
+    date_from = params.get("date_from")
+    date_to = params.get("date_to")
+    return (
+        over,
+        params.get("category") or None,
+        _parse_day(date_from, "date_from") if date_from else None,
+        _parse_day(date_to, "date_to") if date_to else None,
+        tuple(sorted(set(percentiles))),
+    )
+
+
+def _stats_source(user_id, over, category_id, date_from, date_to):
+    """(queryset, value field) the statistics are computed over."""
+    if over == "reading":
+        params = {"category": category_id}
+        if date_from:
+            params["date_from"] = date_from.isoformat()
+        if date_to:
+            params["date_to"] = date_to.isoformat()
+        queryset = _filter_consommations(
+            Consommation.objects.filter(user_id=user_id), params
+        )
+        return queryset, "value"
+
+    # Daily totals come pre-summed from the rollups (days without readings
+    # are left out).
+    rollups = DailyConsumptionRollup.objects.filter(user_id=user_id, count__gt=0)
+    if category_id:
+        rollups = rollups.filter(category_id=category_id)
+    if date_from:
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(day__lte=date_to)
+    return rollups, "total_value"
+
+
+def _stats_cache_key(user_id, version, over, category_id, date_from, date_to, percentiles):
+    # The version moves on every write to the user's consommations, so
+    # entries never need invalidating: new data simply uses a new key.
+    return "consommation-stats:" + ":".join(
+        (
+            str(user_id),
+            str(version),
+            over,
+            str(category_id or ""),
+            date_from.isoformat() if date_from else "",
+            date_to.isoformat() if date_to else "",
+            ",".join(percentile_label(value) for value in percentiles),
+        )
+    )
+
+
+class ConsommationViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     GET/POST /api/v1/consommations/
     GET/PUT/PATCH/DELETE /api/v1/consommations/{id}/
+    GET /api/v1/consommations/aggregate/
+    GET /api/v1/consommations/stats/
+    GET /api/v1/consommations/export/
+    POST /api/v1/consommations/bulk/
     Auth: none
+    Query (GET list): page_size, cursor (opt-in keyset pagination)
     Body (POST/PUT/PATCH): Consommation fields (user, category, value, unit_price, date_consommation)
-    Returns: Consommation object(s)
+    Returns: Consommation object(s) | {next,next_cursor,results} when paginated | 304 (list, If-None-Match)
     Description: CRUD for consommation data.
     """
-    queryset = Consommation.objects.select_related("user", "category").all()
+    # The serializer only emits FK ids, so no select_related join is needed.
+    queryset = Consommation.objects.all()
     serializer_class = ConsommationSerializer
     permission_classes = [SessionAuthenticated]
+    pagination_class = ConsommationKeysetPagination
+    read_mapper = ConsommationReadMapper()
+    version_resource = CONSOMMATIONS
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        session_user_id = _get_session_user_id(self.request)
-        if session_user_id:
-            queryset = queryset.filter(user_id=session_user_id)
-        else:
+        if self.request.user is None:
             return queryset.none()
+        queryset = queryset.filter(user_id=self.request.user.id)
 
-        consommation_id = self.request.query_params.get("id")
-        category_id = self.request.query_params.get("category")
-        date_from = self.request.query_params.get("date_from")
-        date_to = self.request.query_params.get("date_to")
+        return _filter_consommations(queryset, self.request.query_params)
 
-        if consommation_id:
-            queryset = queryset.filter(id=consommation_id)
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        if date_from:
-            queryset = queryset.filter(date_consommation__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(date_consommation__date__lte=date_to)
+    def list(self, request, *args, **kwargs):
+        return self.conditional_list(request, self._list_response)
 
-        return queryset
+    def _list_response(self):
+        # Fast read path: plain `.values()` rows through a cached field mapper
+        # instead of a model instance and a ModelSerializer pass per row.
+        rows = self.filter_queryset(self.get_queryset()).values(
+            *ConsommationReadMapper.columns
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.read_mapper.map(page))
+        return Response(self.read_mapper.map(rows))
+
+    @action(detail=False, methods=["get"])
+    def aggregate(self, request):
+        """
+        GET /api/v1/consommations/aggregate/?bucket=day&category=1&date_from=2026-01-01&date_to=2026-01-31
+        Auth: session (login required)
+        Returns: 200 + {bucket,results[{period,category,value,total_price}]} | 400
+        Description: Sum values and costs per period and category from the rollups.
+        """
+        bucket, rows = _aggregate_rows(
+            request.user.id, request.query_params
+        )
+        results = [_aggregate_result(row) for row in rows]
+        return Response({"bucket": bucket, "results": results})
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """
+        GET /api/v1/consommations/stats/?over=day|reading&category=1&date_from=2026-01-01&date_to=2026-03-31&percentiles=50,95
+        Auth: session (login required)
+        Returns: 200 + {over,results[{category,count,sum,min,max,mean,stddev,percentiles{}}]} | 304 (If-None-Match) | 400
+        Description: Summary statistics per category of daily totals (default) or single readings.
+        """
+        user_id = request.user.id
+        params = _stats_params(request.query_params)
+        version = current_version(CONSOMMATIONS, user_id)
+        etag = list_etag(request, CONSOMMATIONS, user_id, version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        key = _stats_cache_key(user_id, version, *params)
+        results = cache.get(key)
+        if results is None:
+            over, category_id, date_from, date_to, percentiles = params
+            queryset, field = _stats_source(user_id, over, category_id, date_from, date_to)
+            results = consommation_stats(queryset, field, percentiles)
+            cache.set(key, results, settings.CONSOMMATION_STATS_CACHE_TIMEOUT)
+        return with_etag(Response({"over": params[0], "results": results}), etag)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        GET /api/v1/consommations/export/?file_format=csv|ndjson&category=1&date_from=...
+        Auth: session (login required)
+        Returns: 200 + streamed CSV or NDJSON | 400
+        Description: Stream the consumption history row by row with flat memory use.
+        """
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": "file_format must be one of: csv, ndjson."}, status=400
+            )
+        stream, content_type, extension = EXPORT_FORMATS[file_format]
 
-    def perform_create(self, serializer):
-        user = _get_session_user(self.request)
-        if user is None:
-            raise PermissionDenied("Authentication required.")
-        consommation = serializer.save(user=user)
-
-        # Auto-create a notification if the consumption exceeds an active alert.
-        alerts = Alert.objects.filter(
-            user=user,
-            category=consommation.category,
-            status__iexact="active",
+        rows = (
+            self.get_queryset()
+            .order_by("date_consommation", "id")
+            .values(*ConsommationReadMapper.columns)
+            .iterator(chunk_size=settings.CONSOMMATION_EXPORT_CHUNK_SIZE)
+        )
+        lines = stream(self.read_mapper.iter_map(rows))
+        if streams_supported(request):
+            lines = _async_chunks(lines, settings.CONSOMMATION_EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="consommations.{extension}"'
         )
-        for alert in alerts:
-            if consommation.value >= alert.limit:
-                Notification.objects.get_or_create(user=user, alert=alert)
+        return response
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        POST /api/v1/consommations/bulk/
+        Auth: session (login required)
+        Body: JSON array of {category,value,unit_price,date_consommation}
+              | text/csv with the same header row
+        Returns: 201 + {created,errors[{row,errors}]} | 400
+        Description: Validate and insert many readings in chunks inside one transaction.
+        """
+        user = request.user
+
+        if request.content_type.startswith("text/csv"):
+            if request.stream is None:
+                return Response({"detail": "Empty CSV body."}, status=400)
+            rows = _iter_csv_rows(request.stream)
+        else:
+            rows = request.data
+            if not isinstance(rows, list):
+                return Response(
+                    {"detail": "Expected a JSON array or a text/csv body."},
+                    status=400,
+                )
+
+        validator = ConsommationBulkRowSerializer()
+        numbered_rows = enumerate(rows, start=1)
+        created = 0
+        errors = []
+
+        try:
+            with transaction.atomic():
+                while True:
+                    chunk = list(
+                        islice(numbered_rows, settings.CONSOMMATION_BULK_CHUNK_SIZE)
+                    )
+                    if not chunk:
+                        break
+
+                    readings = []
+                    for row_number, row in chunk:
+                        try:
+                            data = validator.run_validation(row)
+                        except ValidationError as exc:
+                            errors.append({"row": row_number, "errors": exc.detail})
+                            continue
+                        readings.append(
+                            (
+                                user.id,
+                                data["category"],
+                                data["date_consommation"],
+                                data["value"],
+                                data["unit_price"],
+                            )
+                        )
+                    created += load_consommations(readings)
+        except (UnicodeDecodeError, csv.Error):
+            return Response({"detail": "Invalid CSV body."}, status=400)
+
+        status = 201 if created or not errors else 400
+        return Response({"created": created, "errors": errors}, status=status)
+
+    def perform_create(self, serializer):
+        consommation = serializer.save(user=self.request.user)
+
+        # Auto-create a notification if the consumption exceeds an active alert
+        # or stands out from the user's usual readings in that category.
+        notify_reading(consommation)
+        detect_reading(consommation)
 
 
-class AlertViewSet(viewsets.ModelViewSet):
+class AlertViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     GET/POST /api/v1/alerts/
     GET/PUT/PATCH/DELETE /api/v1/alerts/{id}/
     Auth: none
     Body (POST/PUT/PATCH): Alert fields (limit, status, message)
-    Returns: Alert object(s)
+    Returns: Alert object(s) | 304 (list, If-None-Match)
     Description: CRUD for alert rules.
     """
     queryset = Alert.objects.all().order_by("-id")
     serializer_class = AlertSerializer
     permission_classes = [SessionAuthenticated]
+    version_resource = ALERTS
 
     def get_queryset(self):
-        session_user_id = _get_session_user_id(self.request)
-        if not session_user_id:
+        if self.request.user is None:
             return Alert.objects.none()
-        return Alert.objects.filter(user_id=session_user_id).order_by("-id")
+        return Alert.objects.filter(user_id=self.request.user.id).order_by("-id")
 
     def perform_create(self, serializer):
-        user = _get_session_user(self.request)
-        if user is None:
-            raise PermissionDenied("Authentication required.")
-        serializer.save(user=user)
+        serializer.save(user=self.request.user)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     GET/POST /api/v1/notifications/
     GET/PUT/PATCH/DELETE /api/v1/notifications/{id}/
+    GET /api/v1/notifications/unread-count/
+    POST /api/v1/notifications/mark-read/
+    POST /api/v1/notifications/bulk-delete/
     Auth: none
     Body (POST/PUT/PATCH): Notification fields (user, alert)
-    Returns: Notification object(s)
+    Returns: Notification object(s) | 304 (list, If-None-Match)
     Description: CRUD for notifications.
     """
-    queryset = Notification.objects.select_related("user", "alert").all()
+    # The serializer only emits FK ids, so no select_related join is needed.
+    queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [SessionAuthenticated]
+    version_resource = NOTIFICATIONS
 
     def get_queryset(self):
-        session_user_id = _get_session_user_id(self.request)
-        if not session_user_id:
+        if self.request.user is None:
             return Notification.objects.none()
-        return Notification.objects.filter(user_id=session_user_id).select_related(
-            "user", "alert"
+        return Notification.objects.filter(user_id=self.request.user.id)
+
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        """
+        GET /api/v1/notifications/unread-count/
+        Auth: session (login required)
+        Returns: 200 + {unread,stream}
+        Description: Unread notification count for the header badge (cached);
+        `stream` tells whether /notifications/stream/ can be opened.
+        """
+        return Response(
+            {
+                "unread": unread_count(request.user.id),
+                "stream": streams_supported(request),
+            }
         )
 
+    def _bulk_selection(self, request):
+        # Notifications of the session user picked by ids, age and/or "all".
+        payload = request.data if isinstance(request.data, dict) else {}
+        ids = payload.get("ids")
+        before = payload.get("before")
+        if ids is None and not before and payload.get("all") is not True:
+            raise ValidationError(
+                {"detail": "Provide ids, before (YYYY-MM-DD) or all: true."}
+            )
+
+        queryset = Notification.objects.filter(user_id=request.user.id)
+        if ids is not None:
+            if not isinstance(ids, list) or not all(
+                isinstance(notification_id, int) for notification_id in ids
+            ):
+                raise ValidationError({"ids": "Expected a list of notification ids."})
+            queryset = queryset.filter(id__in=ids)
+        if before:
+            queryset = queryset.filter(
+                created_at__lt=start_of_day(_parse_day(before, "before"))
+            )
+        return queryset
+
+    @action(detail=False, methods=["post"], url_path="mark-read")
+    def mark_read(self, request):
+        """
+        POST /api/v1/notifications/mark-read/
+        Auth: session (login required)
+        Body: { "ids": [1, 2] } | { "before": "2026-02-01" } | { "all": true }
+        Returns: 200 + {updated} | 400
+        Description: Mark the selected notifications read with a single UPDATE.
+        """
+        selection = self._bulk_selection(request).filter(read=False)
+        with transaction.atomic():
+            revision = next_revision(NOTIFICATIONS, request.user.id)
+            updated = selection.update(read=True, revision=revision)
+        invalidate_unread_count(request.user.id)
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """
+        POST /api/v1/notifications/bulk-delete/
+        Auth: session (login required)
+        Body: { "ids": [1, 2] } | { "before": "2026-02-01" } | { "all": true }
+        Returns: 200 + {deleted} | 400
+        Description: Delete the selected notifications with a single DELETE
+        (their ids are kept as sync tombstones).
+        """
+        selection = self._bulk_selection(request)
+        with transaction.atomic():
+            ids = list(selection.values_list("id", flat=True))
+            deleted, _ = Notification.objects.filter(id__in=ids).delete()
+            record_deletions(NOTIFICATIONS, [(request.user.id, id_) for id_ in ids])
+        invalidate_unread_count(request.user.id)
+        return Response({"deleted": deleted})
+
+    def perform_destroy(self, instance):
+        deleted = [(instance.user_id, instance.pk)]  # delete() clears the pk
+        with transaction.atomic():
+            instance.delete()
+            record_deletions(NOTIFICATIONS, deleted)
+        invalidate_unread_count(instance.user_id)
+
     def perform_create(self, serializer):
-        user = _get_session_user(self.request)
-        if user is None:
-            raise PermissionDenied("Authentication required.")
+        user = self.request.user
         alert = serializer.validated_data.get("alert")
         if alert and alert.user_id != user.id:
             raise PermissionDenied("Cannot attach alert from another user.")
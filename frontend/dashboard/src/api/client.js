@@ -1,6 +1,6 @@
 const API_BASE = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api/v1'
 
-const buildUrl = (path) => `${API_BASE}${path}`
+export const buildUrl = (path) => `${API_BASE}${path}`
 
 const getCookie = (name) => {
   const value = `; ${document.cookie}`
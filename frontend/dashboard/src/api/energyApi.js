@@ -1,4 +1,4 @@
-import { apiRequest } from './client.js'
+import { apiRequest, buildUrl } from './client.js'
 
 export const login = (payload) =>
   apiRequest('/login/', {
@@ -25,7 +25,41 @@ export const logout = () =>
 
 export const fetchCategories = () => apiRequest('/categories/')
 
-export const fetchConsumptions = () => apiRequest('/consommations/')
+export const fetchConsumptions = (params = {}) => {
+  const query = new URLSearchParams(params).toString()
+  return apiRequest(`/consommations/${query ? `?${query}` : ''}`)
+}
+
+// Rows written/deleted since `since` (omit it for a full copy, reset: true).
+// A full copy pages consommations: pass `consommations.next` back as `cursor`.
+export const fetchChanges = ({ since, resources, cursor, pageSize } = {}) => {
+  const query = new URLSearchParams({
+    ...(since ? { since } : {}),
+    ...(resources ? { resources: resources.join(',') } : {}),
+    ...(cursor ? { cursor } : {}),
+    ...(pageSize ? { page_size: pageSize } : {}),
+  }).toString()
+  return apiRequest(`/sync/${query ? `?${query}` : ''}`)
+}
+
+export const fetchConsumptionAggregates = (params = {}) => {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, value]) => value !== undefined && value !== '')
+  )
+  return apiRequest(`/consommations/aggregate/?${query}`)
+}
+
+// Per-category count/sum/min/max/mean/stddev/percentiles; `over` is day or reading.
+export const fetchConsumptionStats = (params = {}) => {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, value]) => value !== undefined && value !== '')
+  )
+  return apiRequest(`/consommations/stats/?${query}`)
+}
+
+// Direct download link: the export is streamed, not parsed as JSON.
+export const consumptionExportUrl = (fileFormat = 'csv') =>
+  buildUrl(`/consommations/export/?file_format=${fileFormat}`)
 
 export const createConsumption = (payload) =>
   apiRequest('/consommations/', {
@@ -65,6 +99,13 @@ export const deleteAlert = (id) =>
 
 export const fetchNotifications = () => apiRequest('/notifications/')
 
+export const fetchUnreadNotificationCount = () =>
+  apiRequest('/notifications/unread-count/')
+
+// Server-Sent Events stream of new notifications (session cookie auth).
+export const openNotificationStream = () =>
+  new EventSource(buildUrl('/notifications/stream/'), { withCredentials: true })
+
 export const createNotification = (payload) =>
   apiRequest('/notifications/', {
     method: 'POST',
@@ -76,3 +117,16 @@ export const updateNotification = (id, payload) =>
     method: 'PATCH',
     body: JSON.stringify(payload),
   })
+
+// payload: { ids: [...] } | { before: 'YYYY-MM-DD' } | { all: true }
+export const markNotificationsRead = (payload) =>
+  apiRequest('/notifications/mark-read/', {
+    method: 'POST',
+    body: JSON.stringify(payload),
+  })
+
+export const bulkDeleteNotifications = (payload) =>
+  apiRequest('/notifications/bulk-delete/', {
+    method: 'POST',
+    body: JSON.stringify(payload),
+  })
@@ -1,9 +1,9 @@
-import { createContext, useContext, useEffect, useMemo, useState } from 'react'
+import { createContext, useContext, useEffect, useMemo, useRef, useState } from 'react'
 import {
   createConsumption,
   deleteConsumption,
   fetchCategories,
-  fetchConsumptions,
+  fetchChanges,
   updateConsumption,
 } from '../api/energyApi.js'
 import { useAuth } from './AuthContext.jsx'
@@ -31,8 +31,38 @@ const mapConsumption = (item) => ({
   energyType: item.category,
   quantity: Number(item.value ?? 0),
   unitPrice: Number(item.unit_price ?? 0),
+  totalPrice: Number(item.total_price ?? 0),
 })
 
+const byDateThenId = (a, b) => a.date.localeCompare(b.date) || a.id - b.id
+
+const SYNC_PAGE_SIZE = 500
+
+// /sync/ call; a full copy (reset) is fetched page by page through `next`.
+const fetchConsumptionChanges = async (since) => {
+  const changes = await fetchChanges({
+    since,
+    resources: ['consommations'],
+    pageSize: SYNC_PAGE_SIZE,
+  })
+  let { next } = changes.consommations
+  while (next) {
+    const page = await fetchChanges({ cursor: next, pageSize: SYNC_PAGE_SIZE })
+    changes.consommations.changed.push(...page.consommations.changed)
+    next = page.consommations.next
+  }
+  return changes
+}
+
+// Apply a /sync/ delta ({changed, deleted}) to the local copy.
+const applyChanges = (current, { changed, deleted }) => {
+  if (!changed.length && !deleted.length) return current
+  const byId = new Map(current.map((item) => [item.id, item]))
+  deleted.forEach((id) => byId.delete(id))
+  changed.forEach((row) => byId.set(row.id, mapConsumption(row)))
+  return [...byId.values()].sort(byDateThenId)
+}
+
 export function DataProvider({ children }) {
   const { user } = useAuth()
   const [items, setItems] = useState([])
@@ -40,9 +70,12 @@ export function DataProvider({ children }) {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
   const [loaded, setLoaded] = useState(false)
+  // Token of the last /sync/ call: refreshes only fetch what changed since.
+  const syncToken = useRef(null)
 
   useEffect(() => {
     // Reset cached data when auth identity changes.
+    syncToken.current = null
     setItems([])
     setCategories([])
     setError('')
@@ -63,12 +96,16 @@ export function DataProvider({ children }) {
     setLoading(true)
     setError('')
     try {
-      const [categoriesData, consumptionsData] = await Promise.all([
+      // Categories are revalidated with their ETag (304 when unchanged).
+      const [categoriesData, changes] = await Promise.all([
         fetchCategories(),
-        fetchConsumptions(),
+        fetchConsumptionChanges(syncToken.current),
       ])
       setCategories(categoriesData || [])
-      setItems((consumptionsData || []).map(mapConsumption))
+      setItems((current) =>
+        applyChanges(changes.reset ? [] : current, changes.consommations)
+      )
+      syncToken.current = changes.token
       setLoaded(true)
     } catch (err) {
       setError(err.data?.detail || err.message)
@@ -1,10 +1,13 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { Outlet, NavLink, useNavigate } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext.jsx'
 import AppFooter from '../components/AppFooter.jsx'
 import {
   fetchAlerts,
   fetchNotifications,
+  fetchUnreadNotificationCount,
+  markNotificationsRead,
+  openNotificationStream,
   updateNotification,
 } from '../api/energyApi.js'
 import { formatDateFR } from '../utils/formatDate.js'
@@ -17,7 +20,11 @@ export default function AppLayout() {
   const navigate = useNavigate()
   const [notifications, setNotifications] = useState([])
   const [alerts, setAlerts] = useState([])
+  const [unreadCount, setUnreadCount] = useState(0)
   const [open, setOpen] = useState(false)
+  // Read by the stream listener without reopening the stream on toggle.
+  const openRef = useRef(open)
+  openRef.current = open
   const [loading, setLoading] = useState(false)
 
   const handleLogout = () => {
@@ -40,21 +47,53 @@ export default function AppLayout() {
     }
   }
 
+  const loadUnreadCount = async () => {
+    if (!user) return
+    const data = await fetchUnreadNotificationCount()
+    setUnreadCount(data?.unread || 0)
+  }
+
   useEffect(() => {
-    // Preload notifications once user session is available.
-    if (user) {
+    if (open) {
       loadNotifications()
     }
-  }, [user])
+  }, [open])
 
-  const unreadCount = useMemo(
-    () => notifications.filter((n) => !n.read).length,
-    [notifications]
-  )
+  useEffect(() => {
+    // The badge only needs the (cached) count; full lists load with the panel.
+    // New notifications are then pushed by the server when it can stream
+    // (ASGI deployments), one stream for the whole session.
+    if (!user) return undefined
+    let stream = null
+    let cancelled = false
+    fetchUnreadNotificationCount().then((data) => {
+      if (cancelled) return
+      setUnreadCount(data?.unread || 0)
+      if (!data?.stream) return
+      stream = openNotificationStream()
+      stream.addEventListener('notification', () => {
+        loadUnreadCount()
+        if (openRef.current) loadNotifications()
+      })
+    })
+    return () => {
+      cancelled = true
+      if (stream) stream.close()
+    }
+  }, [user])
 
   const handleMarkRead = async (notificationId) => {
     await updateNotification(notificationId, { read: true })
-    await loadNotifications()
+    setNotifications((prev) =>
+      prev.map((n) => (n.id === notificationId ? { ...n, read: true } : n))
+    )
+    await loadUnreadCount()
+  }
+
+  const handleMarkAllRead = async () => {
+    await markNotificationsRead({ all: true })
+    setNotifications((prev) => prev.map((n) => ({ ...n, read: true })))
+    setUnreadCount(0)
   }
 
   return (
@@ -114,13 +153,24 @@ export default function AppLayout() {
                 <div className="notif-panel">
                   <div className="notif-header">
                     <span className="fw-bold">Notifications</span>
-                    <button
-                      className="btn btn-sm btn-outline"
-                      type="button"
-                      onClick={() => setOpen(false)}
-                    >
-                      Fermer
-                    </button>
+                    <div className="d-flex gap-2">
+                      {unreadCount ? (
+                        <button
+                          className="btn btn-sm btn-outline"
+                          type="button"
+                          onClick={handleMarkAllRead}
+                        >
+                          Tout marquer lu
+                        </button>
+                      ) : null}
+                      <button
+                        className="btn btn-sm btn-outline"
+                        type="button"
+                        onClick={() => setOpen(false)}
+                      >
+                        Fermer
+                      </button>
+                    </div>
                   </div>
                   {loading ? (
                     <div className="text-muted small">Chargement...</div>
@@ -140,7 +190,9 @@ export default function AppLayout() {
                           className={`notif-item ${isRead ? 'is-read' : ''}`}
                         >
                           <div className="notif-title">
-                            {alert?.message || 'Alerte'}
+                            {notification.type === 'anomaly'
+                              ? `Consommation inhabituelle : ${notification.value} (habituellement ${notification.baseline})`
+                              : alert?.message || 'Alerte'}
                           </div>
                           <div className="notif-meta">
                             {formatDateFR(notification.created_at)}
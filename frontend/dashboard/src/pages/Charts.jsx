@@ -10,6 +10,10 @@ import {
   Legend,
 } from 'chart.js'
 import { Bar, Line } from 'react-chartjs-2'
+import {
+  fetchConsumptionAggregates,
+  fetchConsumptionStats,
+} from '../api/energyApi.js'
 import { useData } from '../contexts/DataContext.jsx'
 import { formatDateFR } from '../utils/formatDate.js'
 
@@ -31,6 +35,10 @@ export default function Charts() {
   const [typeFilter, setTypeFilter] = useState('all')
   const [groupBy, setGroupBy] = useState('day')
   const [selectedMonth, setSelectedMonth] = useState('')
+  const [monthRows, setMonthRows] = useState([])
+  const [dayRows, setDayRows] = useState([])
+  const [statsRows, setStatsRows] = useState([])
+  const [chartError, setChartError] = useState('')
 
   useEffect(() => {
     if (!loaded) {
@@ -38,13 +46,6 @@ export default function Charts() {
     }
   }, [loaded, refresh])
 
-  const toDate = (value) => {
-    if (!value) return null
-    const parsed = new Date(`${value}T00:00:00`)
-    if (Number.isNaN(parsed.getTime())) return null
-    return parsed
-  }
-
   const formatDateKey = (date) =>
     `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(
       date.getDate()
@@ -67,25 +68,21 @@ export default function Charts() {
     return new Date(now.getFullYear(), now.getMonth(), 1)
   }, [])
 
-  const currentWindowItems = useMemo(
-    () =>
-      items.filter((item) => {
-        const date = toDate(item.date)
-        return date ? date >= currentMonthStart : false
-      }),
-    [items, currentMonthStart]
-  )
-
-  const monthOptions = useMemo(() => {
-    const months = new Set()
-    currentWindowItems.forEach((item) => {
-      const date = toDate(item.date)
-      if (!date) return
-      const key = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`
-      months.add(key)
+  useEffect(() => {
+    // Monthly buckets are summed server-side; they also drive the month picker.
+    // `items` changes after every create/update/delete, so totals are refetched.
+    fetchConsumptionAggregates({
+      bucket: 'month',
+      date_from: formatDateKey(currentMonthStart),
     })
-    return Array.from(months).sort()
-  }, [currentWindowItems])
+      .then((data) => setMonthRows(data?.results || []))
+      .catch((err) => setChartError(err.data?.detail || err.message))
+  }, [currentMonthStart, items])
+
+  const monthOptions = useMemo(
+    () => Array.from(new Set(monthRows.map((row) => row.period.slice(0, 7)))).sort(),
+    [monthRows]
+  )
 
   useEffect(() => {
     // Default to the latest available month when daily view is selected.
@@ -94,35 +91,45 @@ export default function Charts() {
     }
   }, [monthOptions, selectedMonth])
 
-  const getPeriodKey = (date) => {
-    if (groupBy === 'month') {
-      return `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`
+  useEffect(() => {
+    if (groupBy !== 'day' || !selectedMonth) return
+    const [year, month] = selectedMonth.split('-').map(Number)
+    fetchConsumptionAggregates({
+      bucket: 'day',
+      date_from: `${selectedMonth}-01`,
+      date_to: formatDateKey(new Date(year, month, 0)),
+    })
+      .then((data) => setDayRows(data?.results || []))
+      .catch((err) => setChartError(err.data?.detail || err.message))
+  }, [groupBy, selectedMonth, items])
+
+  // Statistics cover the window shown by the charts.
+  const statsWindow = useMemo(() => {
+    if (groupBy === 'day' && selectedMonth) {
+      const [year, month] = selectedMonth.split('-').map(Number)
+      return {
+        date_from: `${selectedMonth}-01`,
+        date_to: formatDateKey(new Date(year, month, 0)),
+      }
     }
-    return formatDateKey(date)
-  }
+    return { date_from: formatDateKey(currentMonthStart) }
+  }, [groupBy, selectedMonth, currentMonthStart])
 
-  const buildSeries = (source) => {
-    const map = new Map()
-    source.forEach((item) => {
-      const date = toDate(item.date)
-      if (!date) return
-      const key = getPeriodKey(date)
-      map.set(key, (map.get(key) || 0) + Number(item.value || item.quantity || 0))
-    })
-    const labels = Array.from(map.keys()).sort()
-    const values = labels.map((label) => map.get(label) || 0)
-    return { labels, values }
-  }
+  useEffect(() => {
+    // Typical and peak days per category, computed server-side from daily totals.
+    fetchConsumptionStats({ over: 'day', percentiles: '50,95', ...statsWindow })
+      .then((data) => setStatsRows(data?.results || []))
+      .catch((err) => setChartError(err.data?.detail || err.message))
+  }, [statsWindow, items])
+
+  const getPeriodKey = (period) =>
+    groupBy === 'month' ? period.slice(0, 7) : period.slice(0, 10)
 
-  const buildCostSeries = (source) => {
+  const buildSeries = (source, field) => {
     const map = new Map()
-    source.forEach((item) => {
-      const date = toDate(item.date)
-      if (!date) return
-      const key = getPeriodKey(date)
-      const total =
-        Number(item.quantity || 0) * Number(item.unitPrice || 0)
-      map.set(key, (map.get(key) || 0) + total)
+    source.forEach((row) => {
+      const key = getPeriodKey(row.period)
+      map.set(key, (map.get(key) || 0) + Number(row[field] || 0))
     })
     const labels = Array.from(map.keys()).sort()
     const values = labels.map((label) => map.get(label) || 0)
@@ -130,29 +137,28 @@ export default function Charts() {
   }
 
   // Date scope is shared by all charts. Type filter is applied after this step.
-  const dateScopedItems = useMemo(() => {
-    let data = currentWindowItems
-    if (groupBy === 'day' && selectedMonth) {
-      data = data.filter((item) => {
-        const date = toDate(item.date)
-        if (!date) return false
-        const key = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`
-        return key === selectedMonth
-      })
-    }
-    return data
-  }, [currentWindowItems, groupBy, selectedMonth])
+  const dateScopedRows = groupBy === 'day' ? dayRows : monthRows
 
-  const filteredItems = useMemo(() => {
-    if (typeFilter === 'all') return dateScopedItems
-    return dateScopedItems.filter(
-      (item) => String(item.energyType) === String(typeFilter)
+  const filteredRows = useMemo(() => {
+    if (typeFilter === 'all') return dateScopedRows
+    return dateScopedRows.filter(
+      (row) => String(row.category) === String(typeFilter)
     )
-  }, [dateScopedItems, typeFilter])
+  }, [dateScopedRows, typeFilter])
 
   const energy =
     typeFilter === 'all' ? null : getCategoryById(categories, typeFilter)
 
+  const statsTable = statsRows
+    .filter(
+      (row) => typeFilter === 'all' || String(row.category) === String(typeFilter)
+    )
+    .map((row) => ({
+      ...row,
+      category: getCategoryById(categories, row.category),
+    }))
+    .filter((row) => row.category)
+
   const palette = [
     'rgba(6, 182, 212, 0.7)',
     'rgba(59, 130, 246, 0.7)',
@@ -162,7 +168,7 @@ export default function Charts() {
 
   const quantityCharts = useMemo(() => {
     if (typeFilter !== 'all') {
-      const series = buildSeries(filteredItems)
+      const series = buildSeries(filteredRows, 'value')
       return [
         {
           title: energy ? `Quantite (${energy.unit})` : 'Quantite',
@@ -181,10 +187,10 @@ export default function Charts() {
 
     // In "all categories" mode, render one chart per category.
     return categories.map((category, index) => {
-      const categoryItems = dateScopedItems.filter(
-        (item) => String(item.energyType) === String(category.id)
+      const categoryRows = dateScopedRows.filter(
+        (row) => String(row.category) === String(category.id)
       )
-      const series = buildSeries(categoryItems)
+      const series = buildSeries(categoryRows, 'value')
       return {
         title: `${category.name} (${category.unit})`,
         labels: series.labels.map(formatPeriodLabel),
@@ -198,10 +204,10 @@ export default function Charts() {
         ],
       }
     })
-  }, [typeFilter, filteredItems, dateScopedItems, categories, energy, groupBy])
+  }, [typeFilter, filteredRows, dateScopedRows, categories, energy, groupBy])
 
-  const costSeries = useMemo(() => buildCostSeries(filteredItems), [
-    filteredItems,
+  const costSeries = useMemo(() => buildSeries(filteredRows, 'total_price'), [
+    filteredRows,
     groupBy,
   ])
 
@@ -307,7 +313,9 @@ export default function Charts() {
         </div>
       </div>
 
-      {error ? <div className="alert alert-danger">{error}</div> : null}
+      {error || chartError ? (
+        <div className="alert alert-danger">{error || chartError}</div>
+      ) : null}
 
       <div className="row g-4">
         {quantityCharts.map((chart) => (
@@ -329,6 +337,50 @@ export default function Charts() {
           </div>
         </div>
       </div>
+
+      <div className="card border-0 shadow-sm mt-4">
+        <div className="card-body">
+          <h2 className="h6 fw-bold mb-3">Statistiques journalieres</h2>
+          {statsTable.length ? (
+            <div className="table-responsive">
+              <table className="table align-middle mb-0">
+                <thead>
+                  <tr>
+                    <th>Type d'energie</th>
+                    <th>Jours</th>
+                    <th>Moyenne</th>
+                    <th>Jour median</th>
+                    <th>95e percentile</th>
+                    <th>Maximum</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {statsTable.map((row) => (
+                    <tr key={row.category.id}>
+                      <td>{row.category.name}</td>
+                      <td>{row.count}</td>
+                      <td>
+                        {row.mean} {row.category.unit}
+                      </td>
+                      <td>
+                        {row.percentiles['50']} {row.category.unit}
+                      </td>
+                      <td>
+                        {row.percentiles['95']} {row.category.unit}
+                      </td>
+                      <td>
+                        {row.max} {row.category.unit}
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          ) : (
+            <p className="text-muted small mb-0">Aucune donnee sur la periode.</p>
+          )}
+        </div>
+      </div>
     </div>
   )
 }
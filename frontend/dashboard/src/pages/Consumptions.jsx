@@ -1,5 +1,6 @@
 import { useEffect, useMemo, useState } from 'react'
 import { Link } from 'react-router-dom'
+import { consumptionExportUrl } from '../api/energyApi.js'
 import { useData } from '../contexts/DataContext.jsx'
 import { formatDateFR } from '../utils/formatDate.js'
 
@@ -43,8 +44,8 @@ export default function Consumptions() {
         left = Number(a.unitPrice || 0)
         right = Number(b.unitPrice || 0)
       } else if (sortBy === 'total') {
-        left = Number(a.quantity || 0) * Number(a.unitPrice || 0)
-        right = Number(b.quantity || 0) * Number(b.unitPrice || 0)
+        left = Number(a.totalPrice || 0)
+        right = Number(b.totalPrice || 0)
       }
 
       if (left < right) return sortDir === 'asc' ? -1 : 1
@@ -67,7 +68,7 @@ export default function Consumptions() {
     () =>
       filteredItems.reduce(
         (acc, item) =>
-          acc + Number(item.quantity || 0) * Number(item.unitPrice || 0),
+          acc + Number(item.totalPrice || 0),
         0
       ),
     [filteredItems]
@@ -91,6 +92,9 @@ export default function Consumptions() {
           <p className="text-muted small mb-0">
             Ajoutez, modifiez et supprimez des enregistrements.
           </p>
+          <a className="btn btn-sm btn-outline mt-2" href={consumptionExportUrl()}>
+            Exporter CSV
+          </a>
         </div>
         <div className="d-flex gap-3 flex-wrap">
           <div className="stat-card">
@@ -182,8 +186,7 @@ export default function Consumptions() {
               <tbody>
                     {sortedItems.map((item) => {
                       const energy = getCategoryById(categories, item.energyType)
-                      const total =
-                        Number(item.quantity || 0) * Number(item.unitPrice || 0)
+                      const total = Number(item.totalPrice || 0)
                       return (
                         <tr key={item.id}>
                       <td>{formatDateFR(item.date)}</td>